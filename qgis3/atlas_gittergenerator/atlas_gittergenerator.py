@@ -20,14 +20,21 @@ from qgis.core import (
     QgsTextFormat,
     QgsTextBufferSettings,
     QgsVectorLayerSimpleLabeling,
-    QgsCoordinateTransform
+    QgsCoordinateTransform,
+    QgsSpatialIndex,
+    QgsWkbTypes
 )
 
+from . import grid_core
+from .grid_core import GridLattice
+
 
 class GridGeneratorThread(QThread):
     progressChanged = pyqtSignal(int)
     finished = pyqtSignal(list)
 
+    SCANLINE_MIN_CELLS = 64
+
     def __init__(self, transformed_features, to_original, grid_width, grid_height, xmin, xmax, ymin, ymax):
         super().__init__()
         self.transformed_features = transformed_features
@@ -39,67 +46,64 @@ class GridGeneratorThread(QThread):
         self.ymin = ymin
         self.ymax = ymax
 
+    def get_scanline_rings(self, geom, lattice):
+        if geom.type() != QgsWkbTypes.PolygonGeometry or geom.constGet().hasCurvedSegments():
+            return None
+
+        bbox = geom.boundingBox()
+        cell_count = (bbox.width() / lattice.grid_width + 1) * (bbox.height() / lattice.grid_height + 1)
+        if cell_count < self.SCANLINE_MIN_CELLS:
+            return None
+
+        polygons = geom.asMultiPolygon() if geom.isMultipart() else [geom.asPolygon()]
+        return [[[(pt.x(), pt.y()) for pt in ring] for ring in polygon] for polygon in polygons]
+
     def run(self):
+        lattice = GridLattice.from_extent(
+            self.xmin, self.ymin, self.xmax, self.ymax, self.grid_width, self.grid_height,
+            progress_callback=self.progressChanged.emit
+        )
+
+        spatial_index = QgsSpatialIndex()
+        bounds = []
+        exact = []
+        rings = {}
+        for geom_id, geom in enumerate(self.transformed_features):
+            bbox = geom.boundingBox()
+            spatial_index.addFeature(geom_id, bbox)
+            bounds.append((bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum()))
+            exact.append(geom.type() == QgsWkbTypes.PointGeometry and not geom.isMultipart())
+
+            geom_rings = None if exact[-1] else self.get_scanline_rings(geom, lattice)
+            if geom_rings is not None:
+                rings[geom_id] = geom_rings
+
+        def intersects_cell(row_index, col_index):
+            rect = QgsRectangle(*lattice.get_cell_bounds(row_index, col_index))
+            geom_rect = QgsGeometry.fromRect(rect)
+            return any(
+                self.transformed_features[geom_id].intersects(geom_rect)
+                for geom_id in spatial_index.intersects(rect)
+            )
+
+        if lattice.can_use_lattice():
+            keys = lattice.enumerate_lattice(bounds, exact, rings, intersects_cell)
+        else:
+            keys = lattice.enumerate_by_bounds(bounds, intersects_cell)
+
         features = []
-        row, y = 1, self.ymin
-        total_rows = int((self.ymax - self.ymin) / self.grid_height) + 1
-        processed_rows = 0
-
-        while y < self.ymax:
-            x, col = self.xmin, 1
-            while x < self.xmax:
-                rect = QgsRectangle(x, y, x + self.grid_width, y + self.grid_height)
-                geom_rect = QgsGeometry.fromRect(rect)
-
-                if any(geom.intersects(geom_rect) for geom in self.transformed_features):
-                    feat = QgsFeature()
-                    feat.setGeometry(QgsGeometry.fromRect(self.to_original.transformBoundingBox(rect)))
-                    features.append((feat, feat.geometry().centroid().asPoint(), row, col))
-
-                x += self.grid_width
-                col += 1
-
-            y += self.grid_height
-            row += 1
-            processed_rows += 1
-            percent = int(100 * processed_rows / total_rows)
-            self.progressChanged.emit(percent)
+        for row_index, col_index in keys:
+            rect = QgsRectangle(*lattice.get_cell_bounds(row_index, col_index))
+            feat = QgsFeature()
+            feat.setGeometry(QgsGeometry.fromRect(self.to_original.transformBoundingBox(rect)))
+            features.append((feat, feat.geometry().centroid().asPoint(), row_index + 1, col_index + 1))
 
+        self.progressChanged.emit(100)
         self.finished.emit(features)
 
 
 class AtlasGitterGenerator:
-    paper_sizes_mm = {
-        "A6": (105, 148),
-        "A5": (148, 210),
-        "A4": (210, 297),
-        "A3": (297, 420),
-        "A2": (420, 594),
-        "A1": (594, 841),
-        "A0": (841, 1189),
-        "B6": (125, 176),
-        "B5": (176, 250),
-        "B4": (250, 353),
-        "B3": (353, 500),
-        "B2": (500, 707),
-        "B1": (707, 1000),
-        "B0": (1000, 1414),
-        "Letter": (216, 279),
-        "Legal": (216, 356),
-        "ANSI A": (216, 279),
-        "ANSI B": (279, 432),
-        "ANSI C": (432, 559),
-        "ANSI D": (559, 864),
-        "ANSI E": (864, 1118),
-        "Arch A": (229, 305),
-        "Arch B": (305, 457),
-        "Arch C": (457, 610),
-        "Arch D": (610, 914),
-        "Arch E": (914, 1219),
-        "Arch E1": (762, 1067),
-        "Arch E2": (660, 965),
-        "Arch E3": (686, 991)
-    }
+    paper_sizes_mm = grid_core.PAPER_SIZES_MM
 
     def __init__(self, iface):
         self.iface = iface
@@ -264,25 +268,19 @@ class AtlasGitterGenerator:
         center_y = (extent.yMinimum() + extent.yMaximum()) / 2.0
 
         if layer.crs().isGeographic():
-            zone = int((center_x + 180) / 6) + 1
-            epsg_code = 32600 + zone if center_y >= 0 else 32700 + zone
+            epsg_code = grid_core.get_utm_epsg(center_x, center_y)
             return QgsCoordinateReferenceSystem("EPSG:{0}".format(epsg_code))
         return layer.crs()
 
     def get_column_label(self, index):
-        result = ""
-        index -= 1
-        while index >= 0:
-            result = chr(index % 26 + 65) + result
-            index = index // 26 - 1
-        return result
+        return grid_core.get_column_label(index)
 
     def add_grid_features(self, features, grid_layer, provider):
-        sorted_feats = sorted(features, key=lambda x: (-x[1].y(), x[1].x()))
+        sorted_feats = grid_core.sort_top_down(features, lambda x: (x[1].x(), x[1].y()))
         prepared_feats = []
 
         for i, (feat, _, row, col) in enumerate(sorted_feats):
-            label = "{0}{1}".format(self.get_column_label(col), row)
+            label = grid_core.get_cell_label(col, row)
             feat.setFields(grid_layer.fields())
             feat.setAttribute("grid", label)
             feat.setAttribute("serial", i + 1)
@@ -342,16 +340,10 @@ class AtlasGitterGenerator:
                 )
                 return
         else:
-            height_mm, width_mm = self.paper_sizes_mm[paper_size]
-            if orientation == "landscape":
-                grid_width_mm = width_mm
-                grid_height_mm = height_mm
-            else:
-                grid_width_mm = height_mm
-                grid_height_mm = width_mm
+            grid_width_mm, grid_height_mm = grid_core.get_grid_dimensions_mm(orientation, paper_size)
 
-        grid_width = grid_width_mm / 1000.0 * scale
-        grid_height = grid_height_mm / 1000.0 * scale
+        grid_width = grid_core.get_ground_size(grid_width_mm, scale)
+        grid_height = grid_core.get_ground_size(grid_height_mm, scale)
 
         layers = QgsProject.instance().mapLayersByName(layer_name)
         if not layers:
@@ -416,10 +408,13 @@ class AtlasGitterGenerator:
             dialog.close()
             return
 
-        bounds = QgsGeometry.unaryUnion(transformed_features).boundingBox()
-        offset = 10
-        xmin, xmax = bounds.xMinimum() - offset, bounds.xMaximum() + offset
-        ymin, ymax = bounds.yMinimum() - offset, bounds.yMaximum() + offset
+        xmin, ymin, xmax, ymax = grid_core.get_union_bounds(
+            (bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum())
+            for bbox in (geom.boundingBox() for geom in transformed_features)
+        )
+        offset = grid_core.GRID_OFFSET
+        xmin, xmax = xmin - offset, xmax + offset
+        ymin, ymax = ymin - offset, ymax + offset
 
         if self.manual_size_checkbox.isChecked():
             try:
@@ -440,27 +435,14 @@ class AtlasGitterGenerator:
                 progress.close()
                 return
         else:
-            height_mm, width_mm = self.paper_sizes_mm[paper_size]
-            if orientation == "landscape":
-                grid_width_mm = width_mm
-                grid_height_mm = height_mm
-            else:
-                grid_width_mm = height_mm
-                grid_height_mm = width_mm
+            grid_width_mm, grid_height_mm = grid_core.get_grid_dimensions_mm(orientation, paper_size)
             size_string = paper_size
 
-        layer_base_name = layer.name().replace(" ", "_").replace(":", "_")
-        source_mode = "selected" if selected_only else "layer"
-        base_name = "Gitter_1:{0}_{1}_{2}_{3}_{4}".format(
-            scale, orientation, size_string, source_mode, layer_base_name
-        )
-
         existing_names = [l.name() for l in QgsProject.instance().mapLayers().values()]
-        counter = 1
-        grid_layer_name = "{0}_{1:02d}".format(base_name, counter)
-        while grid_layer_name in existing_names:
-            counter += 1
-            grid_layer_name = "{0}_{1:02d}".format(base_name, counter)
+        grid_layer_name = grid_core.build_output_layer_name(
+            layer.name(), scale, orientation, size_string, selected_only, existing_names,
+            replaced_chars=(" ", ":")
+        )
 
         grid_layer = QgsVectorLayer("Polygon?crs={0}".format(target_crs.authid()), grid_layer_name, "memory")
         provider = grid_layer.dataProvider()
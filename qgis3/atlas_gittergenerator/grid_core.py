@@ -0,0 +1,656 @@
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Grid logic without any QGIS or Qt dependency. The same module ships with the QGIS 3
+# and the QGIS 4 plugin; geometries only appear as bounding boxes, ring coordinates and
+# a caller supplied cell predicate.
+
+PAPER_SIZES_MM = {
+    "A6": (105, 148),
+    "A5": (148, 210),
+    "A4": (210, 297),
+    "A3": (297, 420),
+    "A2": (420, 594),
+    "A1": (594, 841),
+    "A0": (841, 1189),
+    "B6": (125, 176),
+    "B5": (176, 250),
+    "B4": (250, 353),
+    "B3": (353, 500),
+    "B2": (500, 707),
+    "B1": (707, 1000),
+    "B0": (1000, 1414),
+    "Letter": (216, 279),
+    "Legal": (216, 356),
+    "ANSI A": (216, 279),
+    "ANSI B": (279, 432),
+    "ANSI C": (432, 559),
+    "ANSI D": (559, 864),
+    "ANSI E": (864, 1118),
+    "Arch A": (229, 305),
+    "Arch B": (305, 457),
+    "Arch C": (457, 610),
+    "Arch D": (610, 914),
+    "Arch E": (914, 1219),
+    "Arch E1": (762, 1067),
+    "Arch E2": (660, 965),
+    "Arch E3": (686, 991)
+}
+
+GRID_OFFSET = 10.0
+
+ORDER_ROWS = "rows"
+ORDER_SERPENTINE = "serpentine"
+ORDER_HILBERT = "hilbert"
+ORDER_MORTON = "morton"
+ORDERS = [ORDER_ROWS, ORDER_SERPENTINE, ORDER_HILBERT, ORDER_MORTON]
+
+RADIX_BITS = 16
+
+# (name, row offset, column offset) of the neighbouring sheets; rows count upwards.
+NEIGHBOUR_OFFSETS = (
+    ("n", 1, 0),
+    ("ne", 1, 1),
+    ("e", 0, 1),
+    ("se", -1, 1),
+    ("s", -1, 0),
+    ("sw", -1, -1),
+    ("w", 0, -1),
+    ("nw", 1, -1)
+)
+
+
+def get_column_label(index):
+    result = ""
+    index -= 1
+    while index >= 0:
+        result = chr(index % 26 + 65) + result
+        index = index // 26 - 1
+    return result
+
+
+def get_cell_label(col, row):
+    # Cells added to a live grid may lie left of or above the original grid.
+    if col < 1 or row < 1:
+        return None
+    return f"{get_column_label(col)}{row}"
+
+
+def get_quadtree_label(row_index, col_index, depth, root_top_row):
+    # Label of the root cell followed by one quadrant digit per level: 1 NW, 2 NE, 3 SW, 4 SE.
+    label = get_cell_label((col_index >> depth) + 1, root_top_row - (row_index >> depth) + 1)
+    for level in range(depth - 1, -1, -1):
+        north = (row_index >> level) & 1
+        east = (col_index >> level) & 1
+        label += f"-{(1 - north) * 2 + east + 1}"
+    return label
+
+
+def get_grid_dimensions_mm(orientation, paper_size):
+    height_mm, width_mm = PAPER_SIZES_MM[paper_size]
+    if orientation == "landscape":
+        return width_mm, height_mm
+    return height_mm, width_mm
+
+
+def get_ground_size(size_mm, scale):
+    return (size_mm / 1000.0) * scale
+
+
+def get_utm_epsg(center_x, center_y):
+    zone = int((center_x + 180) / 6) + 1
+    return 32600 + zone if center_y >= 0 else 32700 + zone
+
+
+def sort_top_down(cells, get_center):
+    # Atlas numbering runs from the top row down and from left to right within a row.
+    return sorted(cells, key=lambda cell: (-get_center(cell)[1], get_center(cell)[0]))
+
+
+def get_hilbert_index(x, y, size):
+    # size is a power of two that covers both coordinates; the curve starts at (0, 0).
+    index = 0
+    s = size // 2
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        index += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = size - 1 - x
+                y = size - 1 - y
+            x, y = y, x
+        s //= 2
+    return index
+
+
+def get_morton_index(x, y):
+    index = 0
+    bit = 0
+    while x or y:
+        index |= (x & 1) << (2 * bit) | (y & 1) << (2 * bit + 1)
+        x >>= 1
+        y >>= 1
+        bit += 1
+    return index
+
+
+def radix_argsort(values, bit_count):
+    # Stable LSD radix sort that returns the positions of values in ascending order; the
+    # passes are linear in the number of values, unlike a comparison sort.
+    positions = list(range(len(values)))
+    mask = (1 << RADIX_BITS) - 1
+    for shift in range(0, max(1, bit_count), RADIX_BITS):
+        buckets = {}
+        for position in positions:
+            buckets.setdefault((values[position] >> shift) & mask, []).append(position)
+        positions = [position for digit in sorted(buckets) for position in buckets[digit]]
+    return positions
+
+
+def get_neighbour_serials(key, serial_map):
+    row_index, col_index = key
+    return tuple(
+        serial_map.get((row_index + row_offset, col_index + col_offset))
+        for _, row_offset, col_offset in NEIGHBOUR_OFFSETS
+    )
+
+
+def build_output_layer_name(layer_name, scale, orientation, size_string, selected_only, existing_names,
+                            replaced_chars=(" ", ":", "/")):
+    layer_base_name = layer_name
+    for char in replaced_chars:
+        layer_base_name = layer_base_name.replace(char, "_")
+    source_mode = "selected" if selected_only else "layer"
+    base_name = f"Gitter_1:{scale}_{orientation}_{size_string}_{source_mode}_{layer_base_name}"
+
+    existing_names = set(existing_names)
+    counter = 1
+    final_name = f"{base_name}_{counter:02d}"
+
+    while final_name in existing_names:
+        counter += 1
+        final_name = f"{base_name}_{counter:02d}"
+
+    return final_name
+
+
+def get_union_bounds(bounds):
+    xmin = ymin = math.inf
+    xmax = ymax = -math.inf
+    for bbox_xmin, bbox_ymin, bbox_xmax, bbox_ymax in bounds:
+        xmin = min(xmin, bbox_xmin)
+        ymin = min(ymin, bbox_ymin)
+        xmax = max(xmax, bbox_xmax)
+        ymax = max(ymax, bbox_ymax)
+    return xmin, ymin, xmax, ymax
+
+
+class CellKeys:
+    # Hit cells as two parallel int arrays sorted by (row, col), about 8 bytes per cell
+    # instead of a tuple with two boxed integers. Coordinates are derived from the grid
+    # origin and cell size only when the features are written.
+    def __init__(self, rows=None, cols=None):
+        self.rows = rows if rows is not None else array("i")
+        self.cols = cols if cols is not None else array("i")
+
+    @classmethod
+    def from_keys(cls, keys):
+        cell_keys = cls()
+        for row_index, col_index in keys:
+            cell_keys.append(row_index, col_index)
+        return cell_keys
+
+    @classmethod
+    def from_numpy(cls, rows, cols):
+        cell_keys = cls()
+        cell_keys.rows.frombytes(rows.astype(np.intc).tobytes())
+        cell_keys.cols.frombytes(cols.astype(np.intc).tobytes())
+        return cell_keys
+
+    def append(self, row_index, col_index):
+        self.rows.append(row_index)
+        self.cols.append(col_index)
+
+    def extend(self, other, row_offset=0):
+        self.rows.extend(row_index + row_offset for row_index in other.rows)
+        self.cols.extend(other.cols)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return zip(self.rows, self.cols)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CellKeys(self.rows[index], self.cols[index])
+        return self.rows[index], self.cols[index]
+
+
+class GridLattice:
+    RANGE_EPSILON = 1e-9
+    MAX_LATTICE_CELLS = 50_000_000
+
+    def __init__(self, grid_width, grid_height, xmin, ymin, column_count, row_count,
+                 progress_callback=None, cancel_check=None):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.xmin = xmin
+        self.ymin = ymin
+        self.column_count = column_count
+        self.row_count = row_count
+        self.progress_callback = progress_callback
+        self.cancel_check = cancel_check
+        self.cells_visited = 0
+
+    def get_descriptor(self):
+        return GridLattice(
+            self.grid_width, self.grid_height, self.xmin, self.ymin, self.column_count, self.row_count
+        )
+
+    @classmethod
+    def from_extent(cls, xmin, ymin, xmax, ymax, grid_width, grid_height, offset=0.0, **kwargs):
+        xmin, ymin, xmax, ymax = xmin - offset, ymin - offset, xmax + offset, ymax + offset
+        return cls(
+            grid_width=grid_width,
+            grid_height=grid_height,
+            xmin=xmin,
+            ymin=ymin,
+            column_count=max(1, math.ceil((xmax - xmin) / grid_width)),
+            row_count=max(1, math.ceil((ymax - ymin) / grid_height)),
+            **kwargs
+        )
+
+    def is_cancelled(self):
+        return self.cancel_check is not None and self.cancel_check()
+
+    def report_progress(self, percent):
+        if self.progress_callback is not None:
+            self.progress_callback(percent)
+
+    def get_column_count(self):
+        return self.column_count
+
+    def get_row_count(self):
+        return self.row_count
+
+    def get_index_range(self, lower, upper, origin, size, count):
+        first = math.ceil((lower - origin) / size - self.RANGE_EPSILON) - 1
+        last = math.floor((upper - origin) / size + self.RANGE_EPSILON)
+        return max(0, first), min(count - 1, last)
+
+    def get_cell_bounds(self, row_index, col_index):
+        x = self.xmin + col_index * self.grid_width
+        y = self.ymin + row_index * self.grid_height
+        return x, y, x + self.grid_width, y + self.grid_height
+
+    def get_covered_keys(self, xmin, ymin, xmax, ymax):
+        first_row, last_row = self.get_index_range(ymin, ymax, self.ymin, self.grid_height, self.get_row_count())
+        first_col, last_col = self.get_index_range(xmin, xmax, self.xmin, self.grid_width, self.get_column_count())
+        for row_index in range(first_row, last_row + 1):
+            for col_index in range(first_col, last_col + 1):
+                yield row_index, col_index
+
+    def mark_edge_cells(self, x1, y1, x2, y2, boundary, total_rows, total_cols):
+        first_col, last_col = self.get_index_range(
+            min(x1, x2), max(x1, x2), self.xmin, self.grid_width, total_cols
+        )
+
+        for col_index in range(first_col, last_col + 1):
+            if x1 == x2:
+                y_start, y_end = y1, y2
+            else:
+                col_xmin = self.xmin + col_index * self.grid_width
+                t_start = (max(col_xmin, min(x1, x2)) - x1) / (x2 - x1)
+                t_end = (min(col_xmin + self.grid_width, max(x1, x2)) - x1) / (x2 - x1)
+                y_start = y1 + t_start * (y2 - y1)
+                y_end = y1 + t_end * (y2 - y1)
+
+            first_row, last_row = self.get_index_range(
+                min(y_start, y_end), max(y_start, y_end), self.ymin, self.grid_height, total_rows
+            )
+            for row_index in range(first_row, last_row + 1):
+                boundary.add((row_index, col_index))
+
+    def add_row_crossings(self, x1, y1, x2, y2, crossings, total_rows):
+        if y1 == y2:
+            return
+
+        y_low, y_high = min(y1, y2), max(y1, y2)
+        first_row = max(0, math.ceil((y_low - self.ymin) / self.grid_height - 0.5) - 1)
+        last_row = min(total_rows - 1, math.floor((y_high - self.ymin) / self.grid_height - 0.5) + 1)
+
+        for row_index in range(first_row, last_row + 1):
+            row_center = self.ymin + (row_index + 0.5) * self.grid_height
+            if y_low <= row_center < y_high:
+                crossings.setdefault(row_index, []).append(
+                    x1 + (row_center - y1) * (x2 - x1) / (y2 - y1)
+                )
+
+    def classify_polygon_cells(self, parts, total_rows, total_cols):
+        # Cells touched by an edge are boundary cells and still need GEOS. Every other cell
+        # lies entirely inside or outside, which an even-odd pass over the edge crossings at
+        # the row centre decides from the cell centre alone. parts holds the rings of every
+        # polygon part; each part is filled on its own so that overlapping parts of a
+        # multipolygon do not cancel each other out.
+        boundary = set()
+        part_crossings = []
+
+        for rings in parts:
+            crossings = {}
+            for ring in rings:
+                for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+                    self.mark_edge_cells(x1, y1, x2, y2, boundary, total_rows, total_cols)
+                    self.add_row_crossings(x1, y1, x2, y2, crossings, total_rows)
+            part_crossings.append(crossings)
+
+        interior = set()
+        for crossings in part_crossings:
+            for row_index, row_crossings in crossings.items():
+                row_crossings.sort()
+                for start, end in zip(row_crossings[0::2], row_crossings[1::2]):
+                    first_col = max(0, math.ceil((start - self.xmin) / self.grid_width - 0.5))
+                    last_col = min(total_cols - 1, math.floor((end - self.xmin) / self.grid_width - 0.5))
+                    for col_index in range(first_col, last_col + 1):
+                        if (row_index, col_index) not in boundary:
+                            interior.add((row_index, col_index))
+
+        return boundary, interior
+
+    def can_use_lattice(self):
+        return np is not None and self.get_row_count() * self.get_column_count() <= self.MAX_LATTICE_CELLS
+
+    def build_coverage_mask(self, first_rows, last_rows, first_cols, last_cols, total_rows, total_cols):
+        valid = (first_rows <= last_rows) & (first_cols <= last_cols)
+        first_rows, last_rows = first_rows[valid], last_rows[valid]
+        first_cols, last_cols = first_cols[valid], last_cols[valid]
+
+        delta = np.zeros((total_rows + 1, total_cols + 1), dtype=np.int32)
+        np.add.at(delta, (first_rows, first_cols), 1)
+        np.add.at(delta, (first_rows, last_cols + 1), -1)
+        np.add.at(delta, (last_rows + 1, first_cols), -1)
+        np.add.at(delta, (last_rows + 1, last_cols + 1), 1)
+
+        coverage = delta.cumsum(axis=0).cumsum(axis=1)
+        return coverage[:total_rows, :total_cols] > 0
+
+    def enumerate_lattice(self, bounds, exact, rings, intersects_cell):
+        # bounds holds one (xmin, ymin, xmax, ymax) box per geometry, exact marks points and
+        # axis-aligned rectangles, rings maps geometry ids to the ring coordinates of each
+        # polygon part for the scanline path and intersects_cell(row, col) runs the exact test for a candidate.
+        total_rows = self.get_row_count()
+        total_cols = self.get_column_count()
+
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        exact = np.asarray(exact, dtype=bool)
+        scanline = np.zeros(len(bounds), dtype=bool)
+        boundary = set()
+        interior = set()
+
+        for geom_id, geom_rings in rings.items():
+            if self.is_cancelled():
+                return None
+
+            scanline[geom_id] = True
+            polygon_boundary, polygon_interior = self.classify_polygon_cells(geom_rings, total_rows, total_cols)
+            boundary.update(polygon_boundary)
+            interior.update(polygon_interior)
+
+        col_lower = (bounds[:, 0] - self.xmin) / self.grid_width
+        row_lower = (bounds[:, 1] - self.ymin) / self.grid_height
+        col_upper = (bounds[:, 2] - self.xmin) / self.grid_width
+        row_upper = (bounds[:, 3] - self.ymin) / self.grid_height
+
+        # Polygons on the scanline path only contribute their boundary cells as candidates.
+        regular = ~scanline
+        candidates = self.build_coverage_mask(
+            np.clip(np.ceil(row_lower[regular] - self.RANGE_EPSILON).astype(np.int64) - 1, 0, total_rows - 1),
+            np.clip(np.floor(row_upper[regular] + self.RANGE_EPSILON).astype(np.int64), 0, total_rows - 1),
+            np.clip(np.ceil(col_lower[regular] - self.RANGE_EPSILON).astype(np.int64) - 1, 0, total_cols - 1),
+            np.clip(np.floor(col_upper[regular] + self.RANGE_EPSILON).astype(np.int64), 0, total_cols - 1),
+            total_rows,
+            total_cols
+        )
+        if boundary:
+            boundary_rows, boundary_cols = zip(*boundary)
+            candidates[list(boundary_rows), list(boundary_cols)] = True
+
+        # Points and axis-aligned rectangles coincide with their bounding box, so every
+        # cell that certainly overlaps that box is a hit without any GEOS call.
+        if exact.any():
+            hits = self.build_coverage_mask(
+                np.clip(np.ceil(row_lower[exact] + self.RANGE_EPSILON).astype(np.int64) - 1, 0, total_rows - 1),
+                np.clip(np.floor(row_upper[exact] - self.RANGE_EPSILON).astype(np.int64), 0, total_rows - 1),
+                np.clip(np.ceil(col_lower[exact] + self.RANGE_EPSILON).astype(np.int64) - 1, 0, total_cols - 1),
+                np.clip(np.floor(col_upper[exact] - self.RANGE_EPSILON).astype(np.int64), 0, total_cols - 1),
+                total_rows,
+                total_cols
+            )
+        else:
+            hits = np.zeros((total_rows, total_cols), dtype=bool)
+
+        if interior:
+            interior_rows, interior_cols = zip(*interior)
+            hits[list(interior_rows), list(interior_cols)] = True
+
+        test_rows, test_cols = np.nonzero(candidates & ~hits)
+        total_tests = len(test_rows)
+        last_percent = -1
+
+        for i, (row_index, col_index) in enumerate(zip(test_rows.tolist(), test_cols.tolist())):
+            if self.is_cancelled():
+                return None
+
+            self.cells_visited += 1
+            if intersects_cell(row_index, col_index):
+                hits[row_index, col_index] = True
+
+            percent = int(((i + 1) / total_tests) * 100)
+            if percent != last_percent:
+                last_percent = percent
+                self.report_progress(percent)
+
+        hit_rows, hit_cols = np.nonzero(hits)
+        return CellKeys.from_numpy(hit_rows, hit_cols)
+
+    def enumerate_by_bounds(self, bounds, intersects_cell):
+        # Pure Python fallback for the lattice: every cell that touches a bounding box is
+        # tested once.
+        candidates = set()
+        for bbox in bounds:
+            candidates.update(self.get_covered_keys(*bbox))
+
+        total_tests = len(candidates)
+        last_percent = -1
+        hits = CellKeys()
+
+        for i, key in enumerate(sorted(candidates)):
+            if self.is_cancelled():
+                return None
+
+            self.cells_visited += 1
+            if intersects_cell(*key):
+                hits.append(*key)
+
+            percent = int(((i + 1) / total_tests) * 100)
+            if percent != last_percent:
+                last_percent = percent
+                self.report_progress(percent)
+
+        return hits
+
+    def get_candidates_within(self, parent, parent_keys):
+        # Every cell that touches a geometry overlaps at least one occupied cell of the
+        # coarser parent grid, so only cells covered by the parent hits need a test.
+        candidates = set()
+        for parent_key in parent_keys:
+            candidates.update(self.get_covered_keys(*parent.get_cell_bounds(*parent_key)))
+        return sorted(candidates)
+
+    @staticmethod
+    def get_child_keys(keys):
+        # Quadtree children on a lattice with half the cell size and the same origin.
+        children = []
+        for row_index, col_index in keys:
+            for child_row in (2 * row_index, 2 * row_index + 1):
+                for child_col in (2 * col_index, 2 * col_index + 1):
+                    children.append((child_row, child_col))
+        return sorted(children)
+
+    def get_parent_key(self, key, parent, parent_hits):
+        # The parent is the occupied coarse cell with the largest overlap; ties go to the
+        # lowest (row, col) key.
+        xmin, ymin, xmax, ymax = self.get_cell_bounds(*key)
+        best_key = None
+        best_area = -1.0
+
+        for parent_key in parent.get_covered_keys(xmin, ymin, xmax, ymax):
+            if parent_key not in parent_hits:
+                continue
+
+            parent_xmin, parent_ymin, parent_xmax, parent_ymax = parent.get_cell_bounds(*parent_key)
+            overlap_x = min(xmax, parent_xmax) - max(xmin, parent_xmin)
+            overlap_y = min(ymax, parent_ymax) - max(ymin, parent_ymin)
+            area = max(0.0, overlap_x) * max(0.0, overlap_y)
+            if area > best_area:
+                best_key = parent_key
+                best_area = area
+
+        return best_key
+
+    def get_row_weights(self, bounds):
+        # Estimated work per row: every bounding box adds the number of columns it spans
+        # to each of its rows.
+        total_rows = self.get_row_count()
+        total_cols = self.get_column_count()
+        deltas = [0] * (total_rows + 1)
+
+        for bbox_xmin, bbox_ymin, bbox_xmax, bbox_ymax in bounds:
+            first_row, last_row = self.get_index_range(bbox_ymin, bbox_ymax, self.ymin, self.grid_height, total_rows)
+            first_col, last_col = self.get_index_range(bbox_xmin, bbox_xmax, self.xmin, self.grid_width, total_cols)
+            if first_row > last_row or first_col > last_col:
+                continue
+
+            deltas[first_row] += last_col - first_col + 1
+            deltas[last_row + 1] -= last_col - first_col + 1
+
+        weights = []
+        running = 0
+        for delta in deltas[:-1]:
+            running += delta
+            weights.append(running)
+        return weights
+
+    def split_row_bands(self, band_count, bounds):
+        weights = self.get_row_weights(bounds)
+        total_weight = sum(weights)
+        if total_weight == 0:
+            return []
+
+        target = total_weight / band_count
+        bands = []
+        first_row = 0
+        band_weight = 0
+
+        for row_index, weight in enumerate(weights):
+            band_weight += weight
+            if band_weight >= target or row_index == len(weights) - 1:
+                if band_weight > 0:
+                    bands.append((first_row, row_index, band_weight))
+                first_row = row_index + 1
+                band_weight = 0
+
+        return bands
+
+    def iter_top_down(self, keys):
+        # keys are sorted by (row, col) with row 0 at the bottom; atlas numbering starts with
+        # the top row, so walk the rows backwards while keeping columns ascending.
+        rows = keys.rows
+        cols = keys.cols
+        row_end = len(rows)
+        while row_end > 0:
+            row_start = row_end - 1
+            row_index = rows[row_start]
+            while row_start > 0 and rows[row_start - 1] == row_index:
+                row_start -= 1
+
+            for i in range(row_start, row_end):
+                yield row_index, cols[i]
+            row_end = row_start
+
+    def iter_serpentine(self, keys):
+        # Boustrophedon order: every other occupied row runs right to left, so consecutive
+        # pages stay neighbours across row ends.
+        row = []
+        reverse = False
+        for key in self.iter_top_down(keys):
+            if row and key[0] != row[0][0]:
+                yield from reversed(row) if reverse else row
+                reverse = not reverse
+                row = []
+            row.append(key)
+        yield from reversed(row) if reverse else row
+
+    def get_curve_order(self, keys, order):
+        # Curve coordinates start at the top left cell of the hit extent.
+        if np is not None:
+            rows = np.frombuffer(keys.rows, dtype=np.intc).astype(np.int64)
+            cols = np.frombuffer(keys.cols, dtype=np.intc).astype(np.int64)
+            x = cols - cols.min()
+            y = rows.max() - rows
+            size = 1 << max(1, int(max(x.max(), y.max())).bit_length())
+            if order == ORDER_HILBERT:
+                values = np.zeros(len(x), dtype=np.int64)
+                s = size // 2
+                while s > 0:
+                    rx = (x & s) > 0
+                    ry = (y & s) > 0
+                    values += s * s * ((3 * rx) ^ ry)
+                    flip = ~ry & rx
+                    x = np.where(flip, size - 1 - x, x)
+                    y = np.where(flip, size - 1 - y, y)
+                    x, y = np.where(ry, x, y), np.where(ry, y, x)
+                    s //= 2
+            else:
+                values = np.zeros(len(x), dtype=np.int64)
+                for bit in range(size.bit_length()):
+                    values |= ((x >> bit) & 1) << (2 * bit) | ((y >> bit) & 1) << (2 * bit + 1)
+
+            # 16 bit digits keep NumPy on its radix sort for every stable pass.
+            positions = np.arange(len(values))
+            for shift in range(0, 2 * size.bit_length(), RADIX_BITS):
+                digits = ((values[positions] >> shift) & ((1 << RADIX_BITS) - 1)).astype(np.uint16)
+                positions = positions[np.argsort(digits, kind="stable")]
+            return positions.tolist()
+
+        col_min = min(keys.cols)
+        row_max = max(keys.rows)
+        size = 1 << max(1, max(max(keys.cols) - col_min, row_max - min(keys.rows)).bit_length())
+        if order == ORDER_HILBERT:
+            values = [get_hilbert_index(col - col_min, row_max - row, size) for row, col in keys]
+        else:
+            values = [get_morton_index(col - col_min, row_max - row) for row, col in keys]
+        return radix_argsort(values, 2 * size.bit_length())
+
+    def build_serial_map(self, keys, order=ORDER_ROWS, first_serial=1):
+        # (row, col) -> serial in one pass; the dict keeps the serial order for iteration.
+        return {key: serial for serial, key in enumerate(self.iter_ordered(keys, order), start=first_serial)}
+
+    def iter_ordered(self, keys, order=ORDER_ROWS):
+        # Yields the keys in serial number order.
+        if order == ORDER_SERPENTINE:
+            yield from self.iter_serpentine(keys)
+        elif order in (ORDER_HILBERT, ORDER_MORTON) and len(keys) > 1:
+            rows = keys.rows
+            cols = keys.cols
+            for i in self.get_curve_order(keys, order):
+                yield rows[i], cols[i]
+        else:
+            yield from self.iter_top_down(keys)
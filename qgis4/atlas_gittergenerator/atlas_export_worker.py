@@ -0,0 +1,60 @@
+import os
+import sys
+
+from qgis.core import QgsApplication, QgsLayoutExporter, QgsProject
+
+
+# Runs as a separate process started by AtlasExportTask and exports one contiguous range
+# of atlas pages:
+# atlas_export_worker.py <prefix path> <project> <layout> <output dir> <pdf|png> <first> <last>
+
+def export_pages(project_path, layout_name, output_dir, output_format, first_page, last_page):
+    project = QgsProject.instance()
+    if not project.read(project_path):
+        raise RuntimeError(f"Unable to read the project {project_path}")
+
+    layout = project.layoutManager().layoutByName(layout_name)
+    if layout is None:
+        raise RuntimeError(f"The layout '{layout_name}' was not found.")
+
+    atlas = layout.atlas()
+    exporter = QgsLayoutExporter(layout)
+    if not atlas.beginRender():
+        raise RuntimeError("The atlas could not be prepared.")
+
+    try:
+        for page_index in range(first_page, last_page + 1):
+            if not atlas.seekTo(page_index):
+                raise RuntimeError(f"Atlas page {page_index + 1} was not found.")
+
+            path = os.path.join(output_dir, f"page_{page_index + 1:05d}.{output_format}")
+            # The image exporter picks the format from the suffix, so the extension stays last.
+            temp_path = os.path.join(output_dir, f"page_{page_index + 1:05d}.part.{output_format}")
+            if output_format == "pdf":
+                result = exporter.exportToPdf(temp_path, QgsLayoutExporter.PdfExportSettings())
+            else:
+                result = exporter.exportToImage(temp_path, QgsLayoutExporter.ImageExportSettings())
+
+            if result != QgsLayoutExporter.ExportResult.Success:
+                raise RuntimeError(f"Atlas page {page_index + 1} could not be exported.")
+
+            # The plugin counts finished pages by their file names.
+            os.replace(temp_path, path)
+    finally:
+        atlas.endRender()
+
+
+def main(argv):
+    prefix_path, project_path, layout_name, output_dir, output_format, first_page, last_page = argv
+
+    QgsApplication.setPrefixPath(prefix_path, True)
+    app = QgsApplication([], False)
+    app.initQgis()
+    try:
+        export_pages(project_path, layout_name, output_dir, output_format, int(first_page), int(last_page))
+    finally:
+        app.exitQgis()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
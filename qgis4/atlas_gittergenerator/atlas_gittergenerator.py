@@ -1,154 +1,519 @@
 import os
-import math
+import time
+import threading
 
 from qgis.PyQt.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QComboBox, QLineEdit, QHBoxLayout,
-    QCheckBox, QPushButton, QMessageBox, QProgressDialog, QApplication
+    QCheckBox, QPushButton, QMessageBox, QProgressBar, QFileDialog,
+    QListWidget, QListWidgetItem, QSpinBox
 )
 from qgis.PyQt.QtGui import QAction, QIcon, QFont, QColor
-from qgis.PyQt.QtCore import QThread, pyqtSignal, Qt, QMetaType, QSettings
+from qgis.PyQt.QtCore import pyqtSignal, Qt
 
 from qgis.core import (
     Qgis,
+    QgsApplication,
     QgsProject,
-    QgsCoordinateReferenceSystem,
     QgsCoordinateTransform,
-    QgsRectangle,
     QgsVectorLayer,
-    QgsFeature,
-    QgsGeometry,
-    QgsField,
     QgsFillSymbol,
     QgsPalLayerSettings,
     QgsTextFormat,
     QgsTextBufferSettings,
     QgsVectorLayerSimpleLabeling,
-    QgsPointXY
+    QgsFeatureRequest,
+    QgsVectorLayerFeatureSource,
+    QgsMessageLog,
+    QgsTask,
+    QgsFeedback,
+    QgsPrintLayout
 )
 
-
-class GridGeneratorThread(QThread):
-    progressChanged = pyqtSignal(int)
-    finished = pyqtSignal(list)
+from .grid_engine import GridEngine, SourceGeometries
+from .grid_output import GridOutput
+from .grid_builder import GridBuilder
+from . import grid_core
+from .grid_core import CellKeys
+from .processing_provider import AtlasGridProvider
+from .live_grid import LiveGridUpdater
+from .grid_cache import GridCache
+from .run_stats import RunStats
+from . import atlas_layout
+
+
+class GridGeneratorTask(QgsTask):
+    phaseChanged = pyqtSignal(str)
+    levelStarted = pyqtSignal(int)
+    # grid descriptor, top row, CellKeys batch and the optional per-cell values ("labels",
+    # "parents", "neighbours", "sources", "coverage"), each a dict by (row, col)
+    cellsReady = pyqtSignal(object, int, object, dict)
+    # cells per second, remaining seconds (negative while unknown)
+    rateChanged = pyqtSignal(float, float)
+    gridFinished = pyqtSignal(int)
     failed = pyqtSignal(str)
     cancelled = pyqtSignal()
-
-    def __init__(self, transformed_geometries, grid_width, grid_height, xmin, xmax, ymin, ymax):
-        super().__init__()
-        self.transformed_geometries = transformed_geometries
-        self.grid_width = grid_width
-        self.grid_height = grid_height
-        self.xmin = xmin
-        self.xmax = xmax
-        self.ymin = ymin
-        self.ymax = ymax
-        self._cancel_requested = False
+    noGeometries = pyqtSignal()
+
+    PHASE_PREPARING = "preparing"
+    PHASE_CELLS = "cells"
+    PHASE_WRITING = "writing"
+
+    PREPARE_PROGRESS_SHARE = 25
+    WRITE_PROGRESS_SHARE = 10
+    BATCH_SIZE = 5000
+    MAX_PENDING_BATCHES = 2
+    PROGRESS_INTERVAL = 0.5
+    GRID_OFFSET = GridBuilder.GRID_OFFSET
+
+    def __init__(self, description, feature_source, request, feature_count, to_processing, levels,
+                 intersection_engine=GridEngine.ENGINE_PREPARED,
+                 enumeration_mode=GridEngine.ENUMERATION_LATTICE,
+                 worker_count=1, cache=None, cache_parameters=None, stats=None,
+                 ordering=grid_core.ORDER_ROWS, neighbours=False, sources=False, coverage=False,
+                 min_coverage=0.0, split_thresholds=None):
+        super().__init__(description, QgsTask.Flag.CanCancel)
+        self.feedback = QgsFeedback()
+        self.feature_source = feature_source
+        self.request = request
+        self.feature_count = feature_count
+        self.to_processing = to_processing
+        self.intersection_engine = intersection_engine
+        self.enumeration_mode = enumeration_mode
+        self.worker_count = worker_count
+        self.ordering = ordering
+        self.neighbours = neighbours
+        self.sources = sources
+        self.coverage = coverage
+        # Cells whose coverage fraction is below this are dropped before writing.
+        self.min_coverage = min_coverage
+        # (maximum features, maximum vertices) per cell for the adaptive quadtree, where every
+        # level halves the cells of the previous one and only cells above a limit are split.
+        self.split_thresholds = split_thresholds
+        # (scale, grid_width, grid_height) per level, coarsest first
+        self.levels = levels
+        # (processing CRS, width mm, height mm, orientation) for the result cache key
+        self.cache = cache
+        self.cache_parameters = cache_parameters
+        self.cache_hits = 0
+        self.stats = stats if stats is not None else RunStats()
+        self.grid_origin = None
+        self.top_row = None
+        self.total_cells = None
+        self.error = None
+        self._level_index = 0
+        self._cells_emitted = 0
+        self._start_time = None
+        self._phase = None
+        self._phase_start = None
+        self._phase_cells_emitted = 0
+        self._engine = None
+        self._last_percent = -1
+        self._last_progress_time = 0.0
+        self._batch_slots = threading.Semaphore(self.MAX_PENDING_BATCHES)
 
     def cancel(self):
-        self._cancel_requested = True
+        self.feedback.cancel()
+        super().cancel()
 
-    def run(self):
-        try:
-            if self.grid_width <= 0 or self.grid_height <= 0:
-                self.failed.emit("Invalid grid size.")
-                return
+    def is_cancelled(self):
+        return self.feedback.isCanceled()
 
-            total_rows = max(1, math.ceil((self.ymax - self.ymin) / self.grid_height))
-            processed_rows = 0
-            cells = []
+    def release_batch(self):
+        self._batch_slots.release()
 
-            y = self.ymin
-            row_from_bottom = 1
+    def report_progress(self, percent):
+        now = time.monotonic()
+        if percent == self._last_percent:
+            return
+        if percent < 100 and now - self._last_progress_time < self.PROGRESS_INTERVAL:
+            return
 
-            while y < self.ymax:
-                if self._cancel_requested:
-                    self.cancelled.emit()
-                    return
+        self._last_percent = percent
+        self._last_progress_time = now
+        self.feedback.setProgress(percent)
+        self.setProgress(percent)
+
+        elapsed = now - self._start_time
+        if elapsed <= 0:
+            return
+        remaining = elapsed * (100 - percent) / percent if percent > 0 else -1.0
+        self.rateChanged.emit(self.get_cell_rate(now), remaining)
+
+    def set_phase(self, phase):
+        self._phase = phase
+        self._phase_start = time.monotonic()
+        self._phase_cells_emitted = self._cells_emitted
+        self.phaseChanged.emit(phase)
+
+    def get_cell_rate(self, now):
+        # Cells tested per second while the engine runs and cells written per second while
+        # writing, each timed from the start of its phase.
+        if self._phase == self.PHASE_CELLS and self._engine is not None:
+            count = self._engine.cells_visited
+        elif self._phase == self.PHASE_WRITING:
+            count = self._cells_emitted - self._phase_cells_emitted
+        else:
+            return 0.0
+
+        phase_elapsed = now - self._phase_start
+        return count / phase_elapsed if phase_elapsed > 0 else 0.0
+
+    def get_level_progress_range(self):
+        level_share = (100 - self.PREPARE_PROGRESS_SHARE) / len(self.levels)
+        start = self.PREPARE_PROGRESS_SHARE + self._level_index * level_share
+        write_share = level_share * self.WRITE_PROGRESS_SHARE / (100 - self.PREPARE_PROGRESS_SHARE)
+        return start, level_share - write_share, write_share
+
+    def report_cell_progress(self, percent):
+        start, cell_share, _ = self.get_level_progress_range()
+        self.report_progress(int(start + percent * cell_share / 100))
+
+    def emit_batch(self, descriptor, top_row, batch_keys, cell_attributes):
+        # Wait until the GUI thread has written enough of the previous batches, so that
+        # only a bounded number of cell batches is alive at any time.
+        while not self._batch_slots.acquire(timeout=0.1):
+            if self.is_cancelled():
+                return False
+
+        batch_attributes = {
+            name: {key: get_value(key) for key in batch_keys}
+            for name, get_value in cell_attributes.items()
+        }
+        self.cellsReady.emit(descriptor, top_row, batch_keys, batch_attributes)
+        self._cells_emitted += len(batch_keys)
+        return True
+
+    def wait_for_batches(self):
+        # The GUI thread must have written every batch before the result is reported.
+        for _ in range(self.MAX_PENDING_BATCHES):
+            while not self._batch_slots.acquire(timeout=0.1):
+                if self.is_cancelled():
+                    return False
+        return True
+
+    def emit_cells(self, engine, keys, cell_attributes=None, top_row=None):
+        level_start, cell_share, write_share = self.get_level_progress_range()
+        start = level_start + cell_share
+        if not keys:
+            self.report_progress(int(start + write_share))
+            return True
+
+        descriptor = engine.get_descriptor()
+        if top_row is None:
+            top_row = keys[-1][0]
+        batch_keys = CellKeys()
+        emitted = 0
+        cell_attributes = dict(cell_attributes or {})
+
+        # Neighbour serials need the serial of every cell before the first batch is written.
+        ordered_keys = engine.iter_ordered(keys, self.ordering)
+        if self.neighbours:
+            serial_map = engine.build_serial_map(keys, self.ordering)
+            ordered_keys = iter(serial_map)
+            cell_attributes["neighbours"] = lambda key: grid_core.get_neighbour_serials(key, serial_map)
+
+        for row_index, col_index in ordered_keys:
+            batch_keys.append(row_index, col_index)
+            if len(batch_keys) < self.BATCH_SIZE:
+                continue
+
+            if not self.emit_batch(descriptor, top_row, batch_keys, cell_attributes):
+                return False
+
+            emitted += len(batch_keys)
+            batch_keys = CellKeys()
+            self.report_progress(int(start + emitted / len(keys) * write_share))
+
+        if batch_keys and not self.emit_batch(descriptor, top_row, batch_keys, cell_attributes):
+            return False
+
+        self.report_progress(int(start + write_share))
+        return True
+
+    def prepare_geometries(self, fingerprint=None):
+        source = SourceGeometries()
+        completed = source.add_features(
+            self.feature_source.getFeatures(self.request),
+            to_processing=self.to_processing,
+            feature_count=self.feature_count,
+            progress_callback=lambda percent: self.report_progress(
+                int(percent * self.PREPARE_PROGRESS_SHARE / 100)
+            ),
+            cancel_check=self.is_cancelled,
+            fingerprint=fingerprint,
+            stats=self.stats
+        )
+        return source if completed else None
+
+    def get_parent_labeler(self, engine, parent, parent_keys, parent_top_row):
+        # Labels count rows from the top, so the parent's label depends on its topmost hit.
+        parent_hits = set(parent_keys)
+
+        def get_label(key):
+            parent_key = engine.get_parent_key(key, parent, parent_hits)
+            if parent_key is None:
+                return None
+            return grid_core.get_cell_label(parent_key[1] + 1, parent_top_row - parent_key[0] + 1)
+
+        return get_label
+
+    def collect_cell_sources(self, engine, keys):
+        # Cached engines come without callbacks, and the cell progress is already complete.
+        engine.progress_callback = None
+        engine.cancel_check = self.is_cancelled
+        with self.stats.phase("collect_sources"):
+            geometry_ids = engine.collect_cell_sources(keys)
+        if geometry_ids is None:
+            return None
+
+        feature_ids = engine.source.feature_ids
+        cell_sources = {
+            key: tuple(feature_ids[geom_id] for geom_id in geom_ids)
+            for key, geom_ids in geometry_ids.items()
+        }
+        self.stats.add_count("cell_sources", sum(len(fids) for fids in cell_sources.values()))
+        return cell_sources
+
+    def measure_cell_coverage(self, engine, keys):
+        engine.progress_callback = None
+        engine.cancel_check = self.is_cancelled
+        with self.stats.phase("coverage"):
+            return engine.measure_cell_coverage(keys)
+
+    def filter_by_coverage(self, keys, cell_coverage):
+        kept = CellKeys.from_keys(key for key in keys if cell_coverage[key][3] >= self.min_coverage)
+        self.stats.add_count("cells_below_min_coverage", len(keys) - len(kept))
+        return kept
+
+    def split_cells(self, engine, keys):
+        engine.progress_callback = None
+        engine.cancel_check = self.is_cancelled
+        with self.stats.phase("cell_load"):
+            load = engine.measure_cell_load(keys)
+        if load is None:
+            return None, None
+
+        max_features, max_vertices = self.split_thresholds
+        split = CellKeys()
+        leaves = CellKeys()
+        for key in keys:
+            feature_count, vertex_count = load[key]
+            if feature_count > max_features or vertex_count > max_vertices:
+                split.append(*key)
+            else:
+                leaves.append(*key)
+        self.stats.add_count("cells_split", len(split))
+        return split, leaves
+
+    def needs_all_hits(self):
+        # The source, coverage and split passes need every geometry per cell, not only the
+        # first hit, so the enumeration records them.
+        return self.sources or self.coverage or self.min_coverage > 0 or self.split_thresholds is not None
+
+    def get_quadtree_labeler(self, depth, root_top_row):
+        def get_label(key):
+            return grid_core.get_quadtree_label(key[0], key[1], depth, root_top_row)
+
+        return get_label
+
+    def run(self):
+        self._start_time = time.monotonic()
+        try:
+            if any(grid_width <= 0 or grid_height <= 0 for _, grid_width, grid_height in self.levels):
+                self.error = "Invalid grid size."
+                return False
+
+            self.set_phase(self.PHASE_PREPARING)
+            fingerprint = GridCache.create_fingerprint() if self.cache is not None else None
+            with self.stats.phase("ingest"):
+                source = self.prepare_geometries(fingerprint)
+            if source is None:
+                return False
+
+            if source.is_empty():
+                return True
+
+            parent = None
+            parent_keys = None
+            parent_written_keys = None
+            parent_top_row = None
+            total_cells = 0
+
+            adaptive = self.split_thresholds is not None
+            root_top_row = None
+
+            for level_index, (scale, grid_width, grid_height) in enumerate(self.levels):
+                self._level_index = level_index
+                self.levelStarted.emit(scale)
+                self.set_phase(self.PHASE_CELLS)
+
+                # Quadtree levels below the root depend on the split cells, not only on the scale.
+                cache_key = None
+                cached = None
+                if self.cache is not None and not (adaptive and parent is not None):
+                    source_crs, processing_crs, width_mm, height_mm, orientation = self.cache_parameters
+                    cache_key = self.cache.make_key(
+                        fingerprint, source_crs, processing_crs, scale, width_mm, height_mm, orientation,
+                        self.GRID_OFFSET
+                    )
+                    with self.stats.phase("cache_load"):
+                        cached = self.cache.load(cache_key)
+
+                if cached is not None:
+                    engine = GridEngine(
+                        source,
+                        cached["grid_width"],
+                        cached["grid_height"],
+                        cached["xmin"],
+                        cached["ymin"],
+                        cached["column_count"],
+                        cached["row_count"]
+                    )
+                    keys = cached["keys"]
+                    self._engine = engine
+                    self.cache_hits += 1
+                    self.report_cell_progress(100)
+                else:
+                    engine_options = {
+                        "enumeration_mode": self.enumeration_mode,
+                        "record_hits": self.needs_all_hits(),
+                        "progress_callback": self.report_cell_progress,
+                        "cancel_check": self.is_cancelled
+                    }
+                    if adaptive and parent is not None:
+                        engine = parent.get_child_engine(**engine_options)
+                    else:
+                        engine = GridEngine.for_source(
+                            source,
+                            grid_width,
+                            grid_height,
+                            offset=self.GRID_OFFSET,
+                            intersection_engine=self.intersection_engine,
+                            **engine_options
+                        )
+
+                    self._engine = engine
+                    with self.stats.phase("cell_loop"):
+                        if adaptive and parent is not None:
+                            keys = engine.run_children(parent_keys)
+                        elif parent is not None:
+                            keys = engine.run_within(parent, parent_keys)
+                        elif self.worker_count > 1:
+                            keys = engine.run_parallel(self.worker_count)
+                        else:
+                            keys = engine.run()
+
+                    if keys is None:
+                        return False
+
+                    engine.log_predicate_counts()
+                    if cache_key is not None:
+                        with self.stats.phase("cache_store"):
+                            self.cache.store(cache_key, engine, keys)
+
+                cell_coverage = None
+                if self.coverage or self.min_coverage > 0:
+                    cell_coverage = self.measure_cell_coverage(engine, keys)
+                    if cell_coverage is None:
+                        return False
+
+                # The next level descends from every hit and labels count from the topmost hit,
+                # so the coverage filter only decides which cells are written.
+                hit_keys = keys
+                top_row = hit_keys[-1][0] if hit_keys else None
+                cell_attributes = {}
+                split_keys = hit_keys
+                if adaptive:
+                    if parent is None:
+                        root_top_row = top_row
+                    if level_index < len(self.levels) - 1:
+                        split_keys, keys = self.split_cells(engine, hit_keys)
+                        if split_keys is None:
+                            return False
+                    else:
+                        split_keys = CellKeys()
+
+                    if keys:
+                        cell_attributes["labels"] = self.get_quadtree_labeler(level_index, root_top_row)
+                    if level_index > 0:
+                        parent_labeler = self.get_quadtree_labeler(level_index - 1, root_top_row)
+                        cell_attributes["parents"] = lambda key: parent_labeler((key[0] >> 1, key[1] >> 1))
+                elif parent is not None:
+                    cell_attributes["parents"] = self.get_parent_labeler(
+                        engine, parent, parent_written_keys, parent_top_row
+                    )
+
+                if self.min_coverage > 0:
+                    keys = self.filter_by_coverage(keys, cell_coverage)
 
-                x = self.xmin
-                col = 1
+                if self.sources:
+                    cell_sources = self.collect_cell_sources(engine, keys)
+                    if cell_sources is None:
+                        return False
+                    cell_attributes["sources"] = lambda key: cell_sources.get(key, ())
 
-                while x < self.xmax:
-                    if self._cancel_requested:
-                        self.cancelled.emit()
-                        return
+                # Counted after the coverage, split and source passes, which test cells again.
+                self.stats.add_engine(engine)
 
-                    rect = QgsRectangle(x, y, x + self.grid_width, y + self.grid_height)
-                    rect_geom = QgsGeometry.fromRect(rect)
+                if self.coverage:
+                    cell_attributes["coverage"] = cell_coverage.__getitem__
 
-                    if any(geom.intersects(rect_geom) for geom in self.transformed_geometries):
-                        cx = x + (self.grid_width / 2.0)
-                        cy = y + (self.grid_height / 2.0)
-                        cells.append((
-                            rect.xMinimum(),
-                            rect.yMinimum(),
-                            rect.xMaximum(),
-                            rect.yMaximum(),
-                            row_from_bottom,
-                            col,
-                            cx,
-                            cy
-                        ))
+                self.set_phase(self.PHASE_WRITING)
+                with self.stats.phase("emit"):
+                    emitted = self.emit_cells(engine, keys, cell_attributes, top_row)
+                if not emitted:
+                    return False
 
-                    x += self.grid_width
-                    col += 1
+                self.stats.add_count("cells_emitted", len(keys))
+                total_cells += len(keys)
+                self.grid_origin = (engine.xmin, engine.ymin)
+                self.top_row = keys[-1][0] if keys else None
+                if not split_keys:
+                    break
 
-                y += self.grid_height
-                row_from_bottom += 1
-                processed_rows += 1
+                parent = engine
+                parent_keys = split_keys
+                parent_written_keys = keys
+                parent_top_row = top_row
 
-                percent = int((processed_rows / total_rows) * 100)
-                self.progressChanged.emit(percent)
+            if not self.wait_for_batches():
+                return False
 
-            self.finished.emit(cells)
+            self.stats.add_count("cache_hits", self.cache_hits)
+            self.report_progress(100)
+            self.total_cells = total_cells
+            return True
 
         except Exception as e:
-            self.failed.emit(str(e))
-
-
-class AtlasGitterGenerator:
-    paper_sizes_mm = {
-        "A6": (105, 148),
-        "A5": (148, 210),
-        "A4": (210, 297),
-        "A3": (297, 420),
-        "A2": (420, 594),
-        "A1": (594, 841),
-        "A0": (841, 1189),
-        "B6": (125, 176),
-        "B5": (176, 250),
-        "B4": (250, 353),
-        "B3": (353, 500),
-        "B2": (500, 707),
-        "B1": (707, 1000),
-        "B0": (1000, 1414),
-        "Letter": (216, 279),
-        "Legal": (216, 356),
-        "ANSI A": (216, 279),
-        "ANSI B": (279, 432),
-        "ANSI C": (432, 559),
-        "ANSI D": (559, 864),
-        "ANSI E": (864, 1118),
-        "Arch A": (229, 305),
-        "Arch B": (305, 457),
-        "Arch C": (457, 610),
-        "Arch D": (610, 914),
-        "Arch E": (914, 1219),
-        "Arch E1": (762, 1067),
-        "Arch E2": (660, 965),
-        "Arch E3": (686, 991)
-    }
+            self.error = str(e)
+            return False
+
+    def finished(self, result):
+        if self.error is not None:
+            self.failed.emit(self.error)
+        elif not result:
+            self.cancelled.emit()
+        elif self.total_cells is None:
+            self.noGeometries.emit()
+        else:
+            self.gridFinished.emit(self.total_cells)
 
+
+class AtlasGitterGenerator(GridBuilder):
     def __init__(self, iface):
         self.iface = iface
         self.plugin_dir = os.path.dirname(__file__)
-        self.worker = None
+        self.jobs = set()
+        self.provider = None
+        self.live_updaters = {}
 
-    def tr(self, en, de):
-        lang = QSettings().value("locale/userLocale", "en")
-        return de if str(lang)[:2].lower() == "de" else en
+    def initProcessing(self):
+        self.provider = AtlasGridProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
 
     def initGui(self):
+        self.initProcessing()
+
         icon_path = os.path.join(self.plugin_dir, "icon.png")
         plugin_name = self.tr("Atlas Grid Generator", "Atlas-Gittergenerator")
 
@@ -163,10 +528,63 @@ class AtlasGitterGenerator:
         self.iface.addToolBarIcon(self.action)
         self.iface.addPluginToMenu(plugin_name, self.action)
 
+        self.export_action = QAction(
+            self.tr("Export atlas in parallel...", "Atlas parallel exportieren..."), self.iface.mainWindow()
+        )
+        self.export_action.triggered.connect(self.show_export_dialog)
+        self.iface.addPluginToMenu(plugin_name, self.export_action)
+
+        QgsProject.instance().layersAdded.connect(self.attach_live_grids)
+        QgsProject.instance().layersWillBeRemoved.connect(self.detach_live_grids)
+        self.attach_live_grids()
+
     def unload(self):
         plugin_name = self.tr("Atlas Grid Generator", "Atlas-Gittergenerator")
         self.iface.removeToolBarIcon(self.action)
         self.iface.removePluginMenu(plugin_name, self.action)
+        self.iface.removePluginMenu(plugin_name, self.export_action)
+        if self.provider is not None:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
+
+        QgsProject.instance().layersAdded.disconnect(self.attach_live_grids)
+        QgsProject.instance().layersWillBeRemoved.disconnect(self.detach_live_grids)
+        self.detach_live_grids(list(self.live_updaters))
+
+        for task in list(self.jobs):
+            task.cancel()
+
+    def attach_live_grids(self, layers=None):
+        # Grid layers keep their live parameters as custom properties, so live grids of a
+        # loaded project are picked up again once their source layer is available.
+        project = QgsProject.instance()
+        for grid_layer in project.mapLayers().values():
+            if grid_layer.id() in self.live_updaters or not isinstance(grid_layer, QgsVectorLayer):
+                continue
+            if not LiveGridUpdater.is_live_grid(grid_layer):
+                continue
+
+            source_layer = project.mapLayer(LiveGridUpdater.get_property(grid_layer, "source_layer"))
+            if not isinstance(source_layer, QgsVectorLayer):
+                continue
+
+            try:
+                updater = LiveGridUpdater(grid_layer, source_layer, self)
+                updater.start()
+            except (TypeError, ValueError):
+                continue
+            self.live_updaters[grid_layer.id()] = updater
+
+    def detach_live_grids(self, layer_ids):
+        for layer_id in layer_ids:
+            updater = self.live_updaters.pop(layer_id, None)
+            if updater is not None:
+                updater.stop()
+
+        for grid_id, updater in list(self.live_updaters.items()):
+            if updater.source_layer.id() in layer_ids:
+                updater.stop()
+                del self.live_updaters[grid_id]
 
     def show_dialog(self):
         dialog = QDialog(self.iface.mainWindow())
@@ -231,6 +649,74 @@ class AtlasGitterGenerator:
 
         self.custom_scale_checkbox.stateChanged.connect(self.toggle_scale_mode)
 
+        self.pyramid_checkbox = QCheckBox(
+            self.tr(
+                "Create a multi-scale grid pyramid:",
+                "Mehrstufige Gitterpyramide erstellen:"
+            )
+        )
+        self.pyramid_checkbox.setToolTip(
+            self.tr(
+                "Creates grids for all checked scales in one run. Finer grids are only tested "
+                "inside occupied cells of the next coarser grid and reference them as parent.",
+                "Erstellt Gitter für alle angehakten Maßstäbe in einem Durchlauf. Feinere Gitter "
+                "werden nur innerhalb belegter Zellen des nächstgröberen Gitters geprüft und "
+                "verweisen auf diese als übergeordnete Zelle."
+            )
+        )
+        layout.addWidget(self.pyramid_checkbox)
+
+        self.pyramid_list = QListWidget()
+        for scale in self.scale_options:
+            item = QListWidgetItem(scale)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Unchecked)
+            self.pyramid_list.addItem(item)
+        self.pyramid_list.setMaximumHeight(110)
+        self.pyramid_list.setEnabled(False)
+        layout.addWidget(self.pyramid_list)
+
+        self.pyramid_checkbox.stateChanged.connect(self.toggle_pyramid_mode)
+
+        self.adaptive_checkbox = QCheckBox(
+            self.tr(
+                "Create an adaptive grid (quadtree) from the selected scale:",
+                "Adaptives Gitter (Quadtree) ab dem gewählten Maßstab erstellen:"
+            )
+        )
+        self.adaptive_checkbox.setToolTip(
+            self.tr(
+                "Splits every sheet with more features or vertices than the limits into 2x2 sheets "
+                "at half the scale, down to the given number of levels. Only occupied sheets are "
+                "split, and every sheet stores its scale.",
+                "Teilt jedes Blatt mit mehr Objekten oder Stützpunkten als den Grenzwerten in 2x2 "
+                "Blätter im halben Maßstab, bis zur angegebenen Anzahl an Stufen. Nur belegte Blätter "
+                "werden geteilt, und jedes Blatt speichert seinen Maßstab."
+            )
+        )
+        layout.addWidget(self.adaptive_checkbox)
+
+        adaptive_layout = QHBoxLayout()
+        self.adaptive_levels = QSpinBox()
+        self.adaptive_levels.setRange(2, 8)
+        self.adaptive_levels.setValue(3)
+        self.adaptive_features = QSpinBox()
+        self.adaptive_features.setRange(1, 1000000)
+        self.adaptive_features.setValue(50)
+        self.adaptive_vertices = QSpinBox()
+        self.adaptive_vertices.setRange(1, 100000000)
+        self.adaptive_vertices.setValue(10000)
+        adaptive_layout.addWidget(QLabel(self.tr("Levels:", "Stufen:")))
+        adaptive_layout.addWidget(self.adaptive_levels)
+        adaptive_layout.addWidget(QLabel(self.tr("Max. features:", "Max. Objekte:")))
+        adaptive_layout.addWidget(self.adaptive_features)
+        adaptive_layout.addWidget(QLabel(self.tr("Max. vertices:", "Max. Stützpunkte:")))
+        adaptive_layout.addWidget(self.adaptive_vertices)
+        layout.addLayout(adaptive_layout)
+
+        self.toggle_adaptive_mode()
+        self.adaptive_checkbox.stateChanged.connect(self.toggle_adaptive_mode)
+
         layout.addWidget(QLabel(self.tr("Layout format:", "Layout-Format:")))
         self.format_combo = QComboBox()
         self.format_combo.addItem(self.tr("Landscape", "Querformat"), "landscape")
@@ -273,6 +759,175 @@ class AtlasGitterGenerator:
         self.manual_height.setEnabled(False)
         self.manual_size_checkbox.stateChanged.connect(self.toggle_manual_size_mode)
 
+        self.parallel_checkbox = QCheckBox(
+            self.tr(
+                "Use parallel processing (all CPU cores)",
+                "Parallele Verarbeitung verwenden (alle CPU-Kerne)"
+            )
+        )
+        self.parallel_checkbox.setToolTip(
+            self.tr(
+                "Splits the grid into row bands that are processed in separate processes.",
+                "Teilt das Gitter in Zeilenbänder auf, die in getrennten Prozessen verarbeitet werden."
+            )
+        )
+        layout.addWidget(self.parallel_checkbox)
+
+        self.live_checkbox = QCheckBox(
+            self.tr(
+                "Keep grid updated while the layer is edited",
+                "Gitter beim Bearbeiten des Layers aktuell halten"
+            )
+        )
+        self.live_checkbox.setToolTip(
+            self.tr(
+                "Adds and removes only the cells around edited features. Not available for grid "
+                "pyramids, selected features, neighbour sheet attributes, relation tables, coverage "
+                "statistics or FlatGeobuf output.",
+                "Ergänzt und entfernt nur die Zellen um bearbeitete Objekte. Nicht verfügbar für "
+                "Gitterpyramiden, ausgewählte Objekte, Nachbarblatt-Attribute, Beziehungstabellen, "
+                "Abdeckungsstatistik oder FlatGeobuf-Ausgabe."
+            )
+        )
+        layout.addWidget(self.live_checkbox)
+
+        self.neighbours_checkbox = QCheckBox(
+            self.tr("Write neighbour sheet attributes", "Nachbarblatt-Attribute schreiben")
+        )
+        self.neighbours_checkbox.setToolTip(
+            self.tr(
+                "Stores the serial number and grid label of the eight adjacent sheets "
+                "(n, ne, e, se, s, sw, w, nw) with every cell, e.g. for margin references in atlas layouts.",
+                "Speichert die laufende Nummer und Gitterbezeichnung der acht angrenzenden Blätter "
+                "(n, ne, e, se, s, sw, w, nw) bei jeder Zelle, z. B. für Randverweise in Atlas-Layouts."
+            )
+        )
+        layout.addWidget(self.neighbours_checkbox)
+
+        self.sources_checkbox = QCheckBox(
+            self.tr("Write cell/source feature relation table", "Beziehungstabelle Zelle/Quellobjekt schreiben")
+        )
+        self.sources_checkbox.setToolTip(
+            self.tr(
+                "Records every source feature that intersects a cell in a table (cell_serial, source_fid) "
+                "and adds a project relation to the grid layer. Not available for grid pyramids or "
+                "FlatGeobuf output.",
+                "Speichert jedes Quellobjekt, das eine Zelle schneidet, in einer Tabelle (cell_serial, "
+                "source_fid) und legt eine Projektbeziehung zum Gitterlayer an. Nicht verfügbar für "
+                "Gitterpyramiden oder FlatGeobuf-Ausgabe."
+            )
+        )
+        layout.addWidget(self.sources_checkbox)
+
+        self.coverage_checkbox = QCheckBox(
+            self.tr("Write coverage statistics", "Abdeckungsstatistik schreiben")
+        )
+        self.coverage_checkbox.setToolTip(
+            self.tr(
+                "Stores the number of intersecting features, the covered area, the line length and "
+                "the covered fraction of the cell with every cell.",
+                "Speichert die Anzahl der schneidenden Objekte, die abgedeckte Fläche, die Linienlänge "
+                "und den abgedeckten Anteil der Zelle bei jeder Zelle."
+            )
+        )
+        layout.addWidget(self.coverage_checkbox)
+
+        min_coverage_layout = QHBoxLayout()
+        min_coverage_layout.addWidget(QLabel(self.tr("Minimum coverage (%):", "Mindestabdeckung (%):")))
+        self.min_coverage = QSpinBox()
+        self.min_coverage.setRange(0, 100)
+        self.min_coverage.setValue(0)
+        self.min_coverage.setToolTip(
+            self.tr(
+                "Drops cells whose covered fraction is below this value before they are written. "
+                "Lines count as covering a cell when they are as long as the cell is wide, points "
+                "cover it completely. 0 keeps every intersecting cell.",
+                "Verwirft Zellen, deren abgedeckter Anteil unter diesem Wert liegt, bevor sie "
+                "geschrieben werden. Linien decken eine Zelle ab, wenn sie so lang sind wie die Zelle "
+                "breit ist, Punkte decken sie vollständig ab. 0 behält jede schneidende Zelle."
+            )
+        )
+        min_coverage_layout.addWidget(self.min_coverage)
+        layout.addLayout(min_coverage_layout)
+
+        self.cache_checkbox = QCheckBox(
+            self.tr("Reuse cached results of identical runs", "Ergebnisse identischer Läufe wiederverwenden")
+        )
+        self.cache_checkbox.setToolTip(
+            self.tr(
+                "Stores the grid cells of every run on disk and reuses them when the geometries, "
+                "processing CRS, scale and layout format are unchanged.",
+                "Speichert die Gitterzellen jedes Laufs auf der Festplatte und verwendet sie wieder, "
+                "wenn Geometrien, Verarbeitungs-KBS, Maßstab und Layoutformat unverändert sind."
+            )
+        )
+        self.cache_checkbox.setChecked(True)
+        layout.addWidget(self.cache_checkbox)
+
+        self.stats_checkbox = QCheckBox(
+            self.tr("Record detailed run statistics", "Detaillierte Laufstatistik aufzeichnen")
+        )
+        self.stats_checkbox.setToolTip(
+            self.tr(
+                "Also measures the peak Python memory of the whole QGIS process, including other "
+                "running jobs, and writes the statistics to a JSON file next to the output file. "
+                "Phase timings are always written to the message log.",
+                "Misst zusätzlich den maximalen Python-Speicher des gesamten QGIS-Prozesses, "
+                "einschließlich anderer laufender Jobs, und schreibt die Statistik in eine "
+                "JSON-Datei neben der Ausgabedatei. Phasenzeiten stehen immer im Protokoll."
+            )
+        )
+        layout.addWidget(self.stats_checkbox)
+
+        self.layout_checkbox = QCheckBox(
+            self.tr("Create print layout atlas", "Drucklayout-Atlas erstellen")
+        )
+        self.layout_checkbox.setToolTip(
+            self.tr(
+                "Adds a print layout with the grid as atlas coverage layer, the page size of the "
+                "grid cells and a map that follows the page extent stored with every cell. "
+                "Not available for grid pyramids.",
+                "Fügt ein Drucklayout mit dem Gitter als Atlas-Abdeckungslayer, der Seitengröße der "
+                "Gitterzellen und einer Karte hinzu, die dem bei jeder Zelle gespeicherten "
+                "Seitenausschnitt folgt. Nicht verfügbar für Gitterpyramiden."
+            )
+        )
+        layout.addWidget(self.layout_checkbox)
+
+        layout.addWidget(QLabel(self.tr("Page order:", "Seitenreihenfolge:")))
+        self.order_combo = QComboBox()
+        for order, name in self.get_order_names().items():
+            self.order_combo.addItem(name, order)
+        self.order_combo.setToolTip(
+            self.tr(
+                "Order of the serial numbers. Space-filling curves keep consecutive atlas pages "
+                "close to each other, which helps tile and WMS caches during export.",
+                "Reihenfolge der laufenden Nummern. Raumfüllende Kurven halten aufeinanderfolgende "
+                "Atlasseiten nah beieinander, was Kachel- und WMS-Caches beim Export hilft."
+            )
+        )
+        layout.addWidget(self.order_combo)
+
+        layout.addWidget(QLabel(self.tr("Output:", "Ausgabe:")))
+        self.output_combo = QComboBox()
+        self.output_combo.addItem(self.tr("Temporary layer", "Temporärer Layer"), GridOutput.FORMAT_MEMORY)
+        self.output_combo.addItem("GeoPackage", GridOutput.FORMAT_GEOPACKAGE)
+        self.output_combo.addItem("FlatGeobuf", GridOutput.FORMAT_FLATGEOBUF)
+        layout.addWidget(self.output_combo)
+
+        output_path_layout = QHBoxLayout()
+        self.output_path = QLineEdit()
+        self.output_path.setPlaceholderText(self.tr("Output file", "Ausgabedatei"))
+        self.output_browse_button = QPushButton("...")
+        self.output_browse_button.clicked.connect(lambda: self.browse_output_path(dialog))
+        output_path_layout.addWidget(self.output_path)
+        output_path_layout.addWidget(self.output_browse_button)
+        layout.addLayout(output_path_layout)
+
+        self.output_path.setEnabled(False)
+        self.output_browse_button.setEnabled(False)
+        self.output_combo.currentIndexChanged.connect(self.toggle_output_mode)
+
         run_button = QPushButton(self.tr("Create grid", "Gitter erstellen"))
         run_button.clicked.connect(lambda: self.generate_grid(dialog))
         layout.addWidget(run_button)
@@ -283,46 +938,270 @@ class AtlasGitterGenerator:
         dialog.setMinimumWidth(390)
         dialog.exec()
 
+    def show_export_dialog(self):
+        dialog = QDialog(self.iface.mainWindow())
+        dialog.setWindowTitle(self.tr("Export atlas in parallel", "Atlas parallel exportieren"))
+
+        layout = QVBoxLayout()
+
+        layout.addWidget(QLabel(self.tr("Atlas layout:", "Atlas-Layout:")))
+        self.export_layout_combo = QComboBox()
+        for print_layout in QgsProject.instance().layoutManager().printLayouts():
+            if isinstance(print_layout, QgsPrintLayout) and print_layout.atlas().enabled():
+                self.export_layout_combo.addItem(print_layout.name(), print_layout.name())
+        layout.addWidget(self.export_layout_combo)
+
+        layout.addWidget(QLabel(self.tr("Format:", "Format:")))
+        self.export_format_combo = QComboBox()
+        self.export_format_combo.addItem("PDF", atlas_layout.FORMAT_PDF)
+        self.export_format_combo.addItem("PNG", atlas_layout.FORMAT_PNG)
+        layout.addWidget(self.export_format_combo)
+
+        layout.addWidget(QLabel(self.tr("Output folder:", "Ausgabeordner:")))
+        folder_layout = QHBoxLayout()
+        self.export_dir = QLineEdit()
+        folder_layout.addWidget(self.export_dir)
+        browse_button = QPushButton("...")
+        browse_button.clicked.connect(lambda: self.browse_export_dir(dialog))
+        folder_layout.addWidget(browse_button)
+        layout.addLayout(folder_layout)
+
+        worker_layout = QHBoxLayout()
+        worker_layout.addWidget(QLabel(self.tr("Worker processes:", "Arbeitsprozesse:")))
+        self.export_workers = QSpinBox()
+        self.export_workers.setRange(1, max(1, os.cpu_count() or 1) * 2)
+        self.export_workers.setValue(os.cpu_count() or 1)
+        worker_layout.addWidget(self.export_workers)
+        layout.addLayout(worker_layout)
+
+        self.export_merge_checkbox = QCheckBox(
+            self.tr("Merge PDF pages into one file", "PDF-Seiten in eine Datei zusammenführen")
+        )
+        if atlas_layout.PdfWriter is None:
+            self.export_merge_checkbox.setToolTip(
+                self.tr(
+                    "Requires the Python package pypdf.",
+                    "Erfordert das Python-Paket pypdf."
+                )
+            )
+        self.export_merge_checkbox.setChecked(atlas_layout.PdfWriter is not None)
+        layout.addWidget(self.export_merge_checkbox)
+        self.export_format_combo.currentIndexChanged.connect(self.toggle_export_merge)
+        self.toggle_export_merge()
+
+        run_button = QPushButton(self.tr("Export", "Exportieren"))
+        run_button.clicked.connect(lambda: self.export_atlas(dialog))
+        layout.addWidget(run_button)
+
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(8)
+        dialog.setLayout(layout)
+        dialog.setMinimumWidth(390)
+        dialog.exec()
+
+    def toggle_export_merge(self):
+        is_pdf = self.export_format_combo.currentData() == atlas_layout.FORMAT_PDF
+        self.export_merge_checkbox.setEnabled(is_pdf and atlas_layout.PdfWriter is not None)
+
+    def browse_export_dir(self, parent):
+        path = QFileDialog.getExistingDirectory(
+            parent,
+            self.tr("Output folder", "Ausgabeordner"),
+            self.export_dir.text()
+        )
+        if path:
+            self.export_dir.setText(path)
+
+    def export_atlas(self, dialog):
+        layout_name = self.export_layout_combo.currentData()
+        output_dir = self.export_dir.text().strip()
+        if layout_name is None or not output_dir:
+            QMessageBox.warning(
+                dialog,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "Please choose an atlas layout and an output folder.",
+                    "Bitte ein Atlas-Layout und einen Ausgabeordner wählen."
+                )
+            )
+            return
+
+        project = QgsProject.instance()
+        print_layout = project.layoutManager().layoutByName(layout_name)
+        coverage_layer = print_layout.atlas().coverageLayer()
+        # Memory layers are saved without their features, so the export processes would
+        # find an empty atlas.
+        if coverage_layer is None or coverage_layer.providerType() == "memory":
+            QMessageBox.warning(
+                dialog,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "The atlas coverage layer is a temporary layer whose features are not stored in "
+                    "the project. Please make it permanent (e.g. as GeoPackage) before the export.",
+                    "Der Abdeckungslayer des Atlas ist ein temporärer Layer, dessen Objekte nicht im "
+                    "Projekt gespeichert werden. Bitte ihn vor dem Export dauerhaft speichern "
+                    "(z. B. als GeoPackage)."
+                )
+            )
+            return
+
+        if not project.fileName():
+            QMessageBox.warning(
+                dialog,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "The export processes read the saved project, so please save the project first.",
+                    "Die Exportprozesse lesen das gespeicherte Projekt, bitte zuerst das Projekt speichern."
+                )
+            )
+            return
+
+        if project.isDirty():
+            answer = QMessageBox.question(
+                dialog,
+                self.tr("Save project", "Projekt speichern"),
+                self.tr(
+                    "The project has unsaved changes that the export would not include. Save it now?",
+                    "Das Projekt hat ungespeicherte Änderungen, die der Export nicht enthielte. Jetzt speichern?"
+                )
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+            if not project.write():
+                QMessageBox.critical(
+                    dialog,
+                    self.tr("Error", "Fehler"),
+                    self.tr(
+                        f"The project could not be saved:\n{project.error()}",
+                        f"Das Projekt konnte nicht gespeichert werden:\n{project.error()}"
+                    )
+                )
+                return
+
+        page_count = print_layout.atlas().updateFeatures()
+        if page_count == 0:
+            QMessageBox.information(
+                dialog,
+                self.tr("Information", "Hinweis"),
+                self.tr("The atlas has no pages.", "Der Atlas hat keine Seiten.")
+            )
+            return
+
+        output_format = self.export_format_combo.currentData()
+        merged_path = None
+        if self.export_merge_checkbox.isEnabled() and self.export_merge_checkbox.isChecked():
+            merged_path = os.path.join(output_dir, f"{layout_name}.pdf")
+
+        task = atlas_layout.AtlasExportTask(
+            self.tr(f"Exporting atlas {layout_name}", f"Atlas {layout_name} wird exportiert"),
+            project.fileName(),
+            layout_name,
+            output_dir,
+            output_format,
+            page_count,
+            self.export_workers.value(),
+            merged_path
+        )
+        message_bar = self.iface.messageBar()
+
+        def on_export_finished(path):
+            message_bar.pushMessage(
+                self.tr("Done", "Fertig"),
+                self.tr(
+                    f"{page_count} atlas pages were exported to {path}.",
+                    f"{page_count} Atlasseiten wurden nach {path} exportiert."
+                ),
+                Qgis.MessageLevel.Success
+            )
+
+        def on_export_failed(message):
+            QMessageBox.critical(
+                self.iface.mainWindow(),
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    f"Atlas export failed:\n{message}",
+                    f"Atlas-Export fehlgeschlagen:\n{message}"
+                )
+            )
+
+        def on_export_cancelled():
+            message_bar.pushMessage(
+                layout_name,
+                self.tr("The atlas export was cancelled.", "Der Atlas-Export wurde abgebrochen."),
+                Qgis.MessageLevel.Info
+            )
+
+        def on_task_ended():
+            self.jobs.discard(task)
+
+        task.exportFinished.connect(on_export_finished)
+        task.failed.connect(on_export_failed)
+        task.cancelled.connect(on_export_cancelled)
+        task.taskCompleted.connect(on_task_ended)
+        task.taskTerminated.connect(on_task_ended)
+
+        self.jobs.add(task)
+        QgsApplication.taskManager().addTask(task)
+        dialog.close()
+
     def toggle_scale_mode(self):
         is_custom = self.custom_scale_checkbox.isChecked()
         self.scale_combo.setEnabled(not is_custom)
         self.scale_input.setEnabled(is_custom)
 
+    def toggle_pyramid_mode(self):
+        is_pyramid = self.pyramid_checkbox.isChecked()
+        self.pyramid_list.setEnabled(is_pyramid)
+        self.custom_scale_checkbox.setEnabled(not is_pyramid)
+        if is_pyramid:
+            self.scale_combo.setEnabled(False)
+            self.scale_input.setEnabled(False)
+        else:
+            self.toggle_scale_mode()
+
+    def toggle_adaptive_mode(self):
+        is_adaptive = self.adaptive_checkbox.isChecked()
+        self.adaptive_levels.setEnabled(is_adaptive)
+        self.adaptive_features.setEnabled(is_adaptive)
+        self.adaptive_vertices.setEnabled(is_adaptive)
+
     def toggle_manual_size_mode(self):
         is_manual = self.manual_size_checkbox.isChecked()
         self.manual_width.setEnabled(is_manual)
         self.manual_height.setEnabled(is_manual)
         self.paper_combo.setEnabled(not is_manual)
 
-    def get_processing_crs(self, layer):
-        source_crs = layer.crs()
-        extent = layer.extent()
-
-        if not source_crs.isValid() or extent.isEmpty():
-            return QgsCoordinateReferenceSystem("EPSG:25832")
-
-        if source_crs.isGeographic():
-            center_x = (extent.xMinimum() + extent.xMaximum()) / 2.0
-            center_y = (extent.yMinimum() + extent.yMaximum()) / 2.0
-            zone = int((center_x + 180) / 6) + 1
-            epsg_code = 32600 + zone if center_y >= 0 else 32700 + zone
-            return QgsCoordinateReferenceSystem(f"EPSG:{epsg_code}")
-
-        return source_crs
-
-    def get_column_label(self, index):
-        result = ""
-        index -= 1
-        while index >= 0:
-            result = chr(index % 26 + 65) + result
-            index = index // 26 - 1
-        return result
-
-    def get_grid_dimensions_mm(self, orientation, paper_size):
-        height_mm, width_mm = self.paper_sizes_mm[paper_size]
-        if orientation == "landscape":
-            return width_mm, height_mm
-        return height_mm, width_mm
+    def toggle_output_mode(self):
+        is_file = self.output_combo.currentData() != GridOutput.FORMAT_MEMORY
+        self.output_path.setEnabled(is_file)
+        self.output_browse_button.setEnabled(is_file)
+
+    def browse_output_path(self, parent):
+        output_format = self.output_combo.currentData()
+        extension = GridOutput.FILE_EXTENSIONS[output_format]
+        path, _ = QFileDialog.getSaveFileName(
+            parent,
+            self.tr("Save grid as", "Gitter speichern unter"),
+            self.output_path.text(),
+            f"{self.output_combo.currentText()} (*{extension})"
+        )
+        if path:
+            self.output_path.setText(GridOutput.normalize_path(path, output_format))
+
+    def get_output_path(self, parent, output_format):
+        if output_format == GridOutput.FORMAT_MEMORY:
+            return ""
+
+        path = self.output_path.text().strip()
+        if not path:
+            QMessageBox.warning(
+                parent,
+                self.tr("Error", "Fehler"),
+                self.tr("Please choose an output file.", "Bitte eine Ausgabedatei wählen.")
+            )
+            return None
+
+        return GridOutput.normalize_path(path, output_format)
 
     def get_scale_value(self, parent):
         if self.custom_scale_checkbox.isChecked():
@@ -342,6 +1221,26 @@ class AtlasGitterGenerator:
         scale_label = self.scale_combo.currentData().replace("1:", "")
         return int(scale_label)
 
+    def get_pyramid_scales(self, parent):
+        scales = set()
+        for i in range(self.pyramid_list.count()):
+            item = self.pyramid_list.item(i)
+            if item.checkState() == Qt.CheckState.Checked:
+                scales.add(int(item.text().replace("1:", "")))
+
+        if len(scales) < 2:
+            QMessageBox.warning(
+                parent,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "Please check at least two scales for the grid pyramid.",
+                    "Bitte mindestens zwei Maßstäbe für die Gitterpyramide anhaken."
+                )
+            )
+            return None
+
+        return sorted(scales, reverse=True)
+
     def get_grid_size_mm(self, parent, orientation, paper_size):
         if self.manual_size_checkbox.isChecked():
             try:
@@ -366,57 +1265,27 @@ class AtlasGitterGenerator:
         return grid_width_mm, grid_height_mm, paper_size
 
     def build_output_layer_name(self, layer_name, scale, orientation, size_string, selected_only):
-        layer_base_name = layer_name.replace(" ", "_").replace(":", "_").replace("/", "_")
-        source_mode = "selected" if selected_only else "layer"
-        base_name = f"Gitter_1:{scale}_{orientation}_{size_string}_{source_mode}_{layer_base_name}"
-
         existing_names = [l.name() for l in QgsProject.instance().mapLayers().values()]
-        counter = 1
-        final_name = f"{base_name}_{counter:02d}"
-
-        while final_name in existing_names:
-            counter += 1
-            final_name = f"{base_name}_{counter:02d}"
-
-        return final_name
-
-    def rect_to_source_polygon(self, rect, to_source_transform=None):
-        points = [
-            QgsPointXY(rect.xMinimum(), rect.yMinimum()),
-            QgsPointXY(rect.xMaximum(), rect.yMinimum()),
-            QgsPointXY(rect.xMaximum(), rect.yMaximum()),
-            QgsPointXY(rect.xMinimum(), rect.yMaximum())
-        ]
-
-        if to_source_transform is not None:
-            points = [to_source_transform.transform(pt) for pt in points]
-
-        points.append(points[0])
-        return QgsGeometry.fromPolygonXY([points])
-
-    def add_grid_features(self, raw_cells, grid_layer, provider, to_source_transform=None):
-        if not raw_cells:
-            return 0
-
-        sorted_cells = sorted(raw_cells, key=lambda item: (-item[7], item[6]))
-        max_bottom_row = max(item[4] for item in raw_cells)
-
-        new_features = []
-        for serial, cell in enumerate(sorted_cells, start=1):
-            x_min, y_min, x_max, y_max, row_from_bottom, col, _, _ = cell
-            rect = QgsRectangle(x_min, y_min, x_max, y_max)
-
-            feat = QgsFeature(grid_layer.fields())
-            feat.setGeometry(self.rect_to_source_polygon(rect, to_source_transform))
-
-            row_from_top = max_bottom_row - row_from_bottom + 1
-            feat.setAttribute("grid", f"{self.get_column_label(col)}{row_from_top}")
-            feat.setAttribute("serial", serial)
+        return grid_core.build_output_layer_name(
+            layer_name, scale, orientation, size_string, selected_only, existing_names
+        )
 
-            new_features.append(feat)
+    def report_run_stats(self, stats, output=None, outcome="finished"):
+        stats.set_info("outcome", outcome)
+        stats.stop()
+        stats.log()
+        if output is None or not output.is_file_output():
+            return
 
-        provider.addFeatures(new_features)
-        return len(new_features)
+        stats_path = f"{os.path.splitext(output.path)[0]}.stats.json"
+        try:
+            stats.write_json(stats_path)
+        except OSError as e:
+            QgsMessageLog.logMessage(
+                f"Run statistics could not be written to {stats_path}: {e}",
+                "Atlas Grid Generator",
+                Qgis.MessageLevel.Warning
+            )
 
     def generate_grid(self, dialog):
         layer_name = self.layer_combo.currentData()
@@ -432,16 +1301,109 @@ class AtlasGitterGenerator:
             )
             return
 
-        scale = self.get_scale_value(dialog)
-        if scale is None:
+        pyramid = self.pyramid_checkbox.isChecked()
+        adaptive = self.adaptive_checkbox.isChecked()
+        if pyramid and adaptive:
+            QMessageBox.warning(
+                dialog,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "Please choose either a grid pyramid or an adaptive grid.",
+                    "Bitte entweder eine Gitterpyramide oder ein adaptives Gitter wählen."
+                )
+            )
             return
 
+        if pyramid:
+            scales = self.get_pyramid_scales(dialog)
+            if scales is None:
+                return
+        else:
+            scale = self.get_scale_value(dialog)
+            if scale is None:
+                return
+            scales = [scale]
+
         grid_width_mm, grid_height_mm, size_string = self.get_grid_size_mm(dialog, orientation, paper_size)
         if grid_width_mm is None or grid_height_mm is None:
             return
 
-        grid_width = (grid_width_mm / 1000.0) * scale
-        grid_height = (grid_height_mm / 1000.0) * scale
+        output_format = self.output_combo.currentData()
+        live = self.live_checkbox.isChecked()
+        neighbours = self.neighbours_checkbox.isChecked()
+        sources = self.sources_checkbox.isChecked()
+        coverage = self.coverage_checkbox.isChecked()
+        min_coverage = self.min_coverage.value() / 100.0
+        if live and (pyramid or adaptive or selected_only or neighbours or sources or coverage
+                     or min_coverage > 0 or output_format == GridOutput.FORMAT_FLATGEOBUF):
+            QMessageBox.warning(
+                dialog,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "Live grids cannot be combined with grid pyramids, adaptive grids, selected features, "
+                    "neighbour sheet attributes, relation tables, coverage statistics or FlatGeobuf output.",
+                    "Live-Gitter sind nicht mit Gitterpyramiden, adaptiven Gittern, ausgewählten Objekten, "
+                    "Nachbarblatt-Attributen, Beziehungstabellen, Abdeckungsstatistik oder "
+                    "FlatGeobuf-Ausgabe kombinierbar."
+                )
+            )
+            return
+
+        if adaptive and neighbours:
+            QMessageBox.warning(
+                dialog,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "Neighbour sheet attributes need sheets of one size and are not available for adaptive grids.",
+                    "Nachbarblatt-Attribute brauchen gleich große Blätter und sind für adaptive Gitter nicht verfügbar."
+                )
+            )
+            return
+
+        if sources and (pyramid or output_format == GridOutput.FORMAT_FLATGEOBUF):
+            QMessageBox.warning(
+                dialog,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "The cell/source relation table needs unique serial numbers and a second table in "
+                    "the output, so it is not available for grid pyramids or FlatGeobuf output.",
+                    "Die Beziehungstabelle Zelle/Quellobjekt braucht eindeutige laufende Nummern und eine "
+                    "zweite Tabelle in der Ausgabe und ist daher nicht für Gitterpyramiden oder "
+                    "FlatGeobuf-Ausgabe verfügbar."
+                )
+            )
+            return
+
+        create_layout = self.layout_checkbox.isChecked()
+        if create_layout and pyramid:
+            QMessageBox.warning(
+                dialog,
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    "A print layout atlas needs a single scale and cannot be created for grid pyramids.",
+                    "Ein Drucklayout-Atlas braucht einen einzigen Maßstab und kann nicht für Gitterpyramiden erstellt werden."
+                )
+            )
+            return
+
+        output_path = self.get_output_path(dialog, output_format)
+        if output_path is None:
+            return
+
+        levels = [
+            (scale, (grid_width_mm / 1000.0) * scale, (grid_height_mm / 1000.0) * scale)
+            for scale in scales
+        ]
+        split_thresholds = None
+        if adaptive:
+            # Every quadtree level halves the cell size of the level above.
+            _, grid_width, grid_height = levels[0]
+            levels = [
+                (round(scale / 2 ** depth), grid_width / 2 ** depth, grid_height / 2 ** depth)
+                for depth in range(self.adaptive_levels.value())
+            ]
+            scales = [level_scale for level_scale, _, _ in levels]
+            split_thresholds = (self.adaptive_features.value(), self.adaptive_vertices.value())
 
         layers = QgsProject.instance().mapLayersByName(layer_name)
         if not layers:
@@ -472,11 +1434,11 @@ class AtlasGitterGenerator:
                     )
                 )
                 return
-            source_features = list(layer.getSelectedFeatures())
+            total = layer.selectedFeatureCount()
         else:
-            source_features = list(layer.getFeatures())
+            total = layer.featureCount()
 
-        if not source_features:
+        if total == 0:
             QMessageBox.information(
                 dialog,
                 self.tr("Information", "Hinweis"),
@@ -484,6 +1446,11 @@ class AtlasGitterGenerator:
             )
             return
 
+        request = QgsFeatureRequest()
+        request.setNoAttributes()
+        if selected_only:
+            request.setFilterFids(layer.selectedFeatureIds())
+
         source_crs = layer.crs()
         processing_crs = self.get_processing_crs(layer)
         transform_context = QgsProject.instance().transformContext()
@@ -492,115 +1459,156 @@ class AtlasGitterGenerator:
         to_processing = QgsCoordinateTransform(source_crs, processing_crs, transform_context) if needs_transform else None
         to_source = QgsCoordinateTransform(processing_crs, source_crs, transform_context) if needs_transform else None
 
-        progress = QProgressDialog(
-            self.tr("Preparing geometries...", "Geometrien werden vorbereitet..."),
-            self.tr("Cancel", "Abbrechen"),
-            0,
-            100,
-            self.iface.mainWindow()
+        grid_layer_name = self.build_output_layer_name(
+            layer.name(), "-".join(str(scale) for scale in scales), orientation, size_string, selected_only
         )
-        progress.setWindowTitle(self.tr("Please wait", "Bitte warten"))
-        progress.setModal(True)
-        progress.setMinimumDuration(0)
-        progress.setValue(0)
-        progress.show()
-        QApplication.processEvents()
 
-        transformed_geometries = []
-        total = len(source_features)
-
-        try:
-            for i, feature in enumerate(source_features):
-                if progress.wasCanceled():
-                    progress.close()
-                    return
-
-                geom = QgsGeometry(feature.geometry())
-                if geom.isEmpty():
-                    continue
-
-                if needs_transform:
-                    geom.transform(to_processing)
-
-                if not geom.isEmpty():
-                    transformed_geometries.append(geom)
-
-                prep_percent = int(((i + 1) / total) * 25)
-                progress.setValue(prep_percent)
-                QApplication.processEvents()
-
-        except Exception as e:
-            progress.close()
+        output = GridOutput(
+            output_format, grid_layer_name, source_crs, transform_context, output_path,
+            pyramid=pyramid or adaptive,
+            page_extents=create_layout,
+            neighbours=neighbours,
+            sources=sources,
+            coverage=coverage
+        )
+        error_message = output.open()
+        if error_message is not None:
             QMessageBox.critical(
                 dialog,
                 self.tr("Error", "Fehler"),
                 self.tr(
-                    f"Error during geometry transformation:\n{str(e)}",
-                    f"Fehler bei der Geometrietransformation:\n{str(e)}"
+                    f"The output could not be created:\n{error_message}",
+                    f"Die Ausgabe konnte nicht erstellt werden:\n{error_message}"
                 )
             )
             return
 
-        if not transformed_geometries:
-            progress.close()
-            QMessageBox.information(
-                dialog,
-                self.tr("Information", "Hinweis"),
-                self.tr("No valid geometries were found in the layer.", "Keine gültigen Geometrien im Layer.")
-            )
-            return
-
-        first_bbox = transformed_geometries[0].boundingBox()
-        xmin = first_bbox.xMinimum()
-        xmax = first_bbox.xMaximum()
-        ymin = first_bbox.yMinimum()
-        ymax = first_bbox.yMaximum()
-
-        for geom in transformed_geometries[1:]:
-            bbox = geom.boundingBox()
-            xmin = min(xmin, bbox.xMinimum())
-            xmax = max(xmax, bbox.xMaximum())
-            ymin = min(ymin, bbox.yMinimum())
-            ymax = max(ymax, bbox.yMaximum())
-
-        offset = 10.0
-        xmin -= offset
-        xmax += offset
-        ymin -= offset
-        ymax += offset
-
-        grid_layer_name = self.build_output_layer_name(
-            layer.name(), scale, orientation, size_string, selected_only
+        detailed_stats = self.stats_checkbox.isChecked()
+        stats = RunStats(trace_memory=detailed_stats)
+        stats.set_info("layer", layer.name())
+        stats.set_info("feature_count", total)
+        stats.set_info("scales", scales)
+        stats.set_info("paper_format", size_string)
+        stats.set_info("orientation", orientation)
+        stats.set_info("output_format", output_format)
+        stats.set_info("page_order", self.order_combo.currentData())
+        stats.set_info("min_coverage", min_coverage)
+        stats.set_info("processing_crs", processing_crs.authid())
+
+        task = GridGeneratorTask(
+            description=self.tr(f"Creating grid {grid_layer_name}", f"Gitter {grid_layer_name} wird erstellt"),
+            feature_source=QgsVectorLayerFeatureSource(layer),
+            request=request,
+            feature_count=total,
+            to_processing=to_processing,
+            levels=levels,
+            worker_count=(os.cpu_count() or 1) if self.parallel_checkbox.isChecked() else 1,
+            cache=GridCache.from_settings() if self.cache_checkbox.isChecked() else None,
+            cache_parameters=(
+                source_crs.authid() or source_crs.toWkt(),
+                processing_crs.authid(),
+                grid_width_mm,
+                grid_height_mm,
+                orientation
+            ),
+            stats=stats,
+            ordering=self.order_combo.currentData(),
+            neighbours=neighbours,
+            sources=sources,
+            coverage=coverage,
+            min_coverage=min_coverage,
+            split_thresholds=split_thresholds
         )
+        stats.set_info("worker_count", task.worker_count)
+        current_phase = [GridGeneratorTask.PHASE_PREPARING]
+        multi_level = pyramid or adaptive
+
+        # The job runs in the background, so its progress is shown in the message bar
+        # instead of a modal dialog.
+        message_bar = self.iface.messageBar()
+        status_item = message_bar.createMessage(grid_layer_name, "")
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 100)
+        status_item.layout().addWidget(progress_bar)
+        status = {
+            "label": self.tr("Preparing geometries...", "Geometrien werden vorbereitet..."),
+            "rate": ""
+        }
+
+        def update_status():
+            try:
+                status_item.setText(f"{status['label']} {status['rate']}".strip())
+            except RuntimeError:
+                # The user closed the message.
+                pass
 
-        grid_layer = QgsVectorLayer(f"Polygon?crs={source_crs.authid()}", grid_layer_name, "memory")
-        provider = grid_layer.dataProvider()
-        provider.addAttributes([
-            QgsField("grid", QMetaType.Type.QString),
-            QgsField("serial", QMetaType.Type.Int)
-        ])
-        grid_layer.updateFields()
+        def set_status_label(text):
+            status["label"] = text
+            update_status()
 
-        self.worker = GridGeneratorThread(
-            transformed_geometries=transformed_geometries,
-            grid_width=grid_width,
-            grid_height=grid_height,
-            xmin=xmin,
-            xmax=xmax,
-            ymin=ymin,
-            ymax=ymax
-        )
+        def close_status():
+            try:
+                message_bar.popWidget(status_item)
+            except RuntimeError:
+                pass
+
+        write_state = {"count": 0, "total": 0, "scale": None, "error": None}
+
+        def on_phase(phase):
+            current_phase[0] = phase
+            if phase == GridGeneratorTask.PHASE_CELLS and not multi_level:
+                set_status_label(self.tr("Creating grid cells...", "Gitterzellen werden erzeugt..."))
+            elif phase == GridGeneratorTask.PHASE_WRITING and not multi_level:
+                set_status_label(self.tr("Writing grid cells...", "Gitterzellen werden geschrieben..."))
+
+        def on_level_started(scale):
+            write_state["scale"] = scale
+            # Serials restart per pyramid level but run through all levels of an adaptive grid.
+            if pyramid:
+                write_state["count"] = 0
+            if multi_level:
+                set_status_label(self.tr(
+                    f"Creating grid cells for 1:{scale}...",
+                    f"Gitterzellen für 1:{scale} werden erzeugt..."
+                ))
 
         def on_progress(val):
-            mapped_val = 25 + int(val * 0.75)
-            progress.setLabelText(self.tr("Creating grid cells...", "Gitterzellen werden erzeugt..."))
-            progress.setValue(mapped_val)
-            QApplication.processEvents()
+            try:
+                progress_bar.setValue(int(val))
+            except RuntimeError:
+                pass
+
+        def on_rate(cells_per_second, remaining_seconds):
+            eta = "--:--"
+            if remaining_seconds >= 0:
+                minutes, seconds = divmod(int(remaining_seconds), 60)
+                eta = f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}"
+            if cells_per_second > 0:
+                status["rate"] = self.tr(
+                    f"({cells_per_second:,.0f} cells/s, ETA {eta})",
+                    f"({cells_per_second:,.0f} Zellen/s, Restzeit {eta})"
+                )
+            else:
+                status["rate"] = self.tr(f"(ETA {eta})", f"(Restzeit {eta})")
+            update_status()
 
         def on_failed(message):
-            progress.close()
+            close_status()
+            output.discard()
+            self.report_run_stats(stats, outcome="failed")
+            if current_phase[0] == GridGeneratorTask.PHASE_PREPARING:
+                QMessageBox.critical(
+                    self.iface.mainWindow(),
+                    self.tr("Error", "Fehler"),
+                    self.tr(
+                        f"Error during geometry transformation:\n{message}",
+                        f"Fehler bei der Geometrietransformation:\n{message}"
+                    )
+                )
+                return
+
             QMessageBox.critical(
-                dialog,
+                self.iface.mainWindow(),
                 self.tr("Error", "Fehler"),
                 self.tr(
                     f"Grid generation failed:\n{message}",
@@ -608,20 +1616,91 @@ class AtlasGitterGenerator:
                 )
             )
 
-        def on_cancelled():
-            progress.close()
+        def on_no_geometries():
+            close_status()
+            output.discard()
+            self.report_run_stats(stats, outcome="no_geometries")
             QMessageBox.information(
-                dialog,
-                self.tr("Cancelled", "Abgebrochen"),
-                self.tr("Grid generation was cancelled.", "Die Gittererzeugung wurde abgebrochen.")
+                self.iface.mainWindow(),
+                self.tr("Information", "Hinweis"),
+                self.tr("No valid geometries were found in the layer.", "Keine gültigen Geometrien im Layer.")
             )
 
-        def on_finished(raw_cells):
-            progress.close()
+        def show_write_error(message):
+            QMessageBox.critical(
+                self.iface.mainWindow(),
+                self.tr("Error", "Fehler"),
+                self.tr(
+                    f"Error while writing the result layer:\n{message}",
+                    f"Fehler beim Schreiben des Ergebnislayers:\n{message}"
+                )
+            )
+
+        def on_cells_ready(descriptor, top_row, batch, cell_attributes):
+            try:
+                if write_state["error"] is not None:
+                    return
+
+                with stats.phase("add_grid_features"):
+                    written = self.add_grid_features(
+                        lattice=descriptor,
+                        keys=batch,
+                        fields=output.fields,
+                        sink=output.sink,
+                        to_source_transform=to_source,
+                        first_serial=write_state["count"] + 1,
+                        top_row=top_row,
+                        scale=write_state["scale"] if multi_level else None,
+                        parent_labels=cell_attributes.get("parents") if multi_level else None,
+                        neighbour_serials=cell_attributes.get("neighbours"),
+                        coverage=cell_attributes.get("coverage"),
+                        labels=cell_attributes.get("labels")
+                    )
+                if sources:
+                    with stats.phase("add_source_rows"):
+                        self.add_source_rows(
+                            batch,
+                            cell_attributes["sources"],
+                            output.sources_fields,
+                            output.sources_sink,
+                            first_serial=write_state["count"] + 1
+                        )
+                write_state["count"] += written
+                write_state["total"] += written
+            except Exception as e:
+                write_state["error"] = str(e)
+                task.cancel()
+            finally:
+                task.release_batch()
+
+        def on_cancelled():
+            close_status()
+            output.discard()
+            self.report_run_stats(stats, outcome="cancelled" if write_state["error"] is None else "failed")
+            if write_state["error"] is not None:
+                show_write_error(write_state["error"])
+                return
+
+            message_bar.pushMessage(
+                grid_layer_name,
+                self.tr("Grid generation was cancelled.", "Die Gittererzeugung wurde abgebrochen."),
+                Qgis.MessageLevel.Info
+            )
+
+        def on_finished(total_cells):
+            close_status()
+
+            if write_state["error"] is not None:
+                output.discard()
+                self.report_run_stats(stats, outcome="failed")
+                show_write_error(write_state["error"])
+                return
 
-            if not raw_cells:
+            if total_cells == 0:
+                output.discard()
+                self.report_run_stats(stats, outcome="empty")
                 QMessageBox.information(
-                    dialog,
+                    self.iface.mainWindow(),
                     self.tr("Information", "Hinweis"),
                     self.tr(
                         "No matching grid cells were found.",
@@ -631,15 +1710,11 @@ class AtlasGitterGenerator:
                 return
 
             try:
-                count = self.add_grid_features(
-                    raw_cells=raw_cells,
-                    grid_layer=grid_layer,
-                    provider=provider,
-                    to_source_transform=to_source
-                )
-
-                grid_layer.updateExtents()
+                count = write_state["total"]
+                with stats.phase("finish_output"):
+                    grid_layer = output.finish()
 
+                styling_start = time.perf_counter()
                 symbol = QgsFillSymbol.createSimple({
                     "color": "102,255,230,100",
                     "outline_color": "0,0,128",
@@ -667,12 +1742,60 @@ class AtlasGitterGenerator:
 
                 grid_layer.setLabeling(QgsVectorLayerSimpleLabeling(label_settings))
                 grid_layer.setLabelsEnabled(True)
+                stats.add_time("styling", time.perf_counter() - styling_start)
+
+                if live:
+                    LiveGridUpdater.store_parameters(
+                        grid_layer,
+                        layer,
+                        processing_crs,
+                        task.grid_origin[0],
+                        task.grid_origin[1],
+                        levels[0][1],
+                        levels[0][2],
+                        task.top_row
+                    )
 
-                QgsProject.instance().addMapLayer(grid_layer)
-                grid_layer.triggerRepaint()
-                self.iface.layerTreeView().refreshLayerSymbology(grid_layer.id())
+                with stats.phase("add_map_layer"):
+                    QgsProject.instance().addMapLayer(grid_layer)
+                    grid_layer.triggerRepaint()
+                    self.iface.layerTreeView().refreshLayerSymbology(grid_layer.id())
+                    if sources:
+                        QgsProject.instance().addMapLayer(output.sources_layer)
+                        output.add_sources_relation(QgsProject.instance())
+
+                self.report_run_stats(stats, output if detailed_stats else None)
+
+                if create_layout:
+                    print_layout = atlas_layout.create_atlas_layout(
+                        QgsProject.instance(),
+                        grid_layer,
+                        processing_crs,
+                        scales[0],
+                        grid_width_mm,
+                        grid_height_mm,
+                        grid_layer_name
+                    )
+                    message_bar.pushMessage(
+                        self.tr("Print layout", "Drucklayout"),
+                        self.tr(
+                            f"The atlas layout '{print_layout.name()}' was created.",
+                            f"Das Atlas-Layout '{print_layout.name()}' wurde erstellt."
+                        ),
+                        Qgis.MessageLevel.Info
+                    )
 
-                if selected_only:
+                if pyramid:
+                    msg = self.tr(
+                        f"{count} grid cells were created at {len(scales)} scales.",
+                        f"{count} Gitterzellen wurden in {len(scales)} Maßstäben erstellt."
+                    )
+                elif adaptive:
+                    msg = self.tr(
+                        f"{count} adaptive grid cells were created, starting at 1:{scales[0]}.",
+                        f"{count} adaptive Gitterzellen wurden erstellt, beginnend bei 1:{scales[0]}."
+                    )
+                elif selected_only:
                     msg = self.tr(
                         f"{count} grid cells were created only for the selected features.",
                         f"{count} Gitterzellen wurden nur für die ausgewählten Objekte erstellt."
@@ -683,26 +1806,36 @@ class AtlasGitterGenerator:
                         f"{count} Gitterzellen wurden für den gesamten Layer erstellt."
                     )
 
-                QMessageBox.information(
-                    dialog,
-                    self.tr("Done", "Fertig"),
-                    msg
-                )
-                dialog.close()
+                message_bar.pushMessage(self.tr("Done", "Fertig"), msg, Qgis.MessageLevel.Success)
 
             except Exception as e:
-                QMessageBox.critical(
-                    dialog,
-                    self.tr("Error", "Fehler"),
-                    self.tr(
-                        f"Error while writing the result layer:\n{str(e)}",
-                        f"Fehler beim Schreiben des Ergebnislayers:\n{str(e)}"
-                    )
-                )
-
-        progress.canceled.connect(lambda: self.worker.cancel())
-        self.worker.progressChanged.connect(on_progress)
-        self.worker.failed.connect(on_failed)
-        self.worker.cancelled.connect(on_cancelled)
-        self.worker.finished.connect(on_finished)
-        self.worker.start()
\ No newline at end of file
+                if "outcome" not in stats.info:
+                    self.report_run_stats(stats, outcome="failed")
+                show_write_error(str(e))
+
+        def on_task_ended():
+            self.jobs.discard(task)
+            # Every outcome reports its statistics; this only releases the memory tracer if a
+            # run ended without one.
+            stats.stop()
+
+        task.phaseChanged.connect(on_phase)
+        task.levelStarted.connect(on_level_started)
+        task.progressChanged.connect(on_progress)
+        task.rateChanged.connect(on_rate)
+        task.failed.connect(on_failed)
+        task.noGeometries.connect(on_no_geometries)
+        task.cellsReady.connect(on_cells_ready)
+        task.cancelled.connect(on_cancelled)
+        task.gridFinished.connect(on_finished)
+        task.taskCompleted.connect(on_task_ended)
+        task.taskTerminated.connect(on_task_ended)
+
+        update_status()
+        message_bar.pushWidget(status_item, Qgis.MessageLevel.Info)
+
+        # Several grid jobs may be queued or run side by side in the task manager.
+        self.jobs.add(task)
+        stats.start()
+        QgsApplication.taskManager().addTask(task)
+        dialog.close()
\ No newline at end of file
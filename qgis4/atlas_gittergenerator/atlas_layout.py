@@ -0,0 +1,248 @@
+import os
+import subprocess
+import tempfile
+import time
+
+from qgis.PyQt.QtCore import pyqtSignal
+
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsFeedback,
+    QgsLayoutItemMap,
+    QgsLayoutObject,
+    QgsLayoutPoint,
+    QgsLayoutSize,
+    QgsPrintLayout,
+    QgsProperty,
+    QgsTask
+)
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+from .grid_engine import get_python_executable
+from .grid_output import GridOutput
+
+
+FORMAT_PDF = "pdf"
+FORMAT_PNG = "png"
+
+
+def create_atlas_layout(project, grid_layer, processing_crs, scale, width_mm, height_mm, name):
+    # Grid cells have exactly the ground size of the page at the chosen scale, so the map
+    # covers the whole page and follows the page extent stored with every cell.
+    manager = project.layoutManager()
+    layout_name = name
+    counter = 1
+    while manager.layoutByName(layout_name) is not None:
+        counter += 1
+        layout_name = f"{name} ({counter})"
+
+    layout = QgsPrintLayout(project)
+    layout.initializeDefaults()
+    layout.setName(layout_name)
+    layout.pageCollection().page(0).setPageSize(QgsLayoutSize(width_mm, height_mm, Qgis.LayoutUnit.Millimeters))
+
+    map_item = QgsLayoutItemMap(layout)
+    map_item.attemptMove(QgsLayoutPoint(0, 0, Qgis.LayoutUnit.Millimeters))
+    map_item.attemptResize(QgsLayoutSize(width_mm, height_mm, Qgis.LayoutUnit.Millimeters))
+    map_item.setCrs(processing_crs)
+    map_item.setScale(scale)
+
+    properties = map_item.dataDefinedProperties()
+    extent_properties = (
+        QgsLayoutObject.DataDefinedProperty.MapXMin,
+        QgsLayoutObject.DataDefinedProperty.MapYMin,
+        QgsLayoutObject.DataDefinedProperty.MapXMax,
+        QgsLayoutObject.DataDefinedProperty.MapYMax
+    )
+    for extent_property, field_name in zip(extent_properties, GridOutput.PAGE_EXTENT_FIELDS):
+        properties.setProperty(extent_property, QgsProperty.fromField(field_name))
+    map_item.setDataDefinedProperties(properties)
+    layout.addLayoutItem(map_item)
+
+    atlas = layout.atlas()
+    atlas.setCoverageLayer(grid_layer)
+    atlas.setPageNameExpression('"grid"')
+    atlas.setSortFeatures(True)
+    atlas.setSortExpression('"serial"')
+    atlas.setFilenameExpression("'page_' || lpad(\"serial\", 5, '0')")
+    atlas.setEnabled(True)
+
+    manager.addLayout(layout)
+    return layout
+
+
+def split_page_range(page_count, worker_count):
+    # Contiguous (first, last) page index ranges of almost equal size.
+    worker_count = max(1, min(worker_count, page_count))
+    ranges = []
+    first_page = 0
+    for worker_index in range(worker_count):
+        size = (page_count - first_page) // (worker_count - worker_index)
+        ranges.append((first_page, first_page + size - 1))
+        first_page += size
+    return ranges
+
+
+def get_page_path(output_dir, page_index, output_format):
+    return os.path.join(output_dir, f"page_{page_index + 1:05d}.{output_format}")
+
+
+def get_part_path(output_dir, page_index, output_format):
+    # Name of a page while atlas_export_worker.py is still writing it.
+    return os.path.join(output_dir, f"page_{page_index + 1:05d}.part.{output_format}")
+
+
+def merge_pdfs(paths, target_path):
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    with open(target_path, "wb") as f:
+        writer.write(f)
+
+
+class AtlasExportTask(QgsTask):
+    exportFinished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, description, project_path, layout_name, output_dir, output_format,
+                 page_count, worker_count, merged_path=None):
+        super().__init__(description, QgsTask.Flag.CanCancel)
+        self.feedback = QgsFeedback()
+        self.project_path = project_path
+        self.layout_name = layout_name
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.page_count = page_count
+        self.worker_count = worker_count
+        self.merged_path = merged_path
+        self.error = None
+
+    def cancel(self):
+        self.feedback.cancel()
+        super().cancel()
+
+    def start_workers(self, executable):
+        worker_script = os.path.join(os.path.dirname(__file__), "atlas_export_worker.py")
+        env = dict(os.environ)
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+        workers = []
+        for first_page, last_page in split_page_range(self.page_count, self.worker_count):
+            log_file = tempfile.TemporaryFile()
+            process = subprocess.Popen(
+                [
+                    executable,
+                    worker_script,
+                    QgsApplication.prefixPath(),
+                    self.project_path,
+                    self.layout_name,
+                    self.output_dir,
+                    self.output_format,
+                    str(first_page),
+                    str(last_page)
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=log_file,
+                env=env
+            )
+            workers.append((process, log_file))
+        return workers
+
+    def count_exported_pages(self):
+        return sum(
+            1 for page_index in range(self.page_count)
+            if os.path.exists(get_page_path(self.output_dir, page_index, self.output_format))
+        )
+
+    def remove_page_files(self):
+        for page_index in range(self.page_count):
+            for path in (
+                get_page_path(self.output_dir, page_index, self.output_format),
+                get_part_path(self.output_dir, page_index, self.output_format)
+            ):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def get_worker_error(self, process, log_file):
+        log_file.seek(0)
+        output = log_file.read().decode("utf-8", "replace").strip()
+        return output.splitlines()[-1] if output else f"Exit code {process.returncode}"
+
+    def run(self):
+        executable = get_python_executable()
+        if executable is None:
+            self.error = "No Python interpreter was found for the export processes."
+            return False
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Progress is measured by the page files, so leftovers of an earlier export go first.
+        self.remove_page_files()
+
+        workers = self.start_workers(executable)
+        exported = False
+        try:
+            while not self.feedback.isCanceled():
+                # One failed range fails the export, so the other workers are stopped right away.
+                failed = next(
+                    ((process, log_file) for process, log_file in workers if process.poll() not in (None, 0)),
+                    None
+                )
+                if failed is not None:
+                    self.error = self.get_worker_error(*failed)
+                    break
+
+                if all(process.returncode == 0 for process, _ in workers):
+                    exported = True
+                    break
+
+                self.setProgress(self.count_exported_pages() / self.page_count * 100)
+                time.sleep(self.POLL_INTERVAL)
+        finally:
+            for process, log_file in workers:
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+                log_file.close()
+
+            # Pages of a failed or cancelled export are incomplete, so none of them are kept.
+            if not exported:
+                self.remove_page_files()
+
+        if not exported:
+            return False
+
+        if self.merged_path is not None:
+            page_paths = [
+                get_page_path(self.output_dir, page_index, self.output_format)
+                for page_index in range(self.page_count)
+            ]
+            try:
+                merge_pdfs(page_paths, self.merged_path)
+            except Exception as e:
+                # The single pages are complete and stay; only the broken merged file goes.
+                if os.path.exists(self.merged_path):
+                    os.remove(self.merged_path)
+                self.error = f"The pages could not be merged: {e}"
+                return False
+
+            for path in page_paths:
+                os.remove(path)
+
+        self.setProgress(100)
+        return True
+
+    def finished(self, result):
+        if self.error is not None:
+            self.failed.emit(self.error)
+        elif not result:
+            self.cancelled.emit()
+        else:
+            self.exportFinished.emit(self.merged_path or self.output_dir)
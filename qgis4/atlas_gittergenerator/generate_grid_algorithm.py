@@ -0,0 +1,535 @@
+import os
+import threading
+from collections import OrderedDict
+
+from qgis.PyQt.QtGui import QIcon
+
+from qgis.core import (
+    Qgis,
+    QgsCoordinateTransform,
+    QgsFeatureRequest,
+    QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingOutputNumber,
+    QgsProcessingParameterBoolean,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterVectorLayer,
+    QgsVectorLayerFeatureSource
+)
+
+from .grid_engine import GridEngine, SourceGeometries
+from .grid_output import GridOutput
+from .grid_builder import GridBuilder
+from . import grid_core
+from .grid_core import CellKeys
+
+
+# Transformed geometries, spatial index and prepared GEOS engines of the most recently
+# used layers. Prepared engines of detailed layers can take several times the memory of
+# the geometries, so only a few layers are kept.
+SOURCE_CACHE_SIZE = 4
+
+_source_cache = OrderedDict()
+_source_cache_lock = threading.Lock()
+_watched_layers = set()
+
+
+def get_cached_source(key):
+    with _source_cache_lock:
+        source = _source_cache.get(key)
+        if source is None:
+            return None
+        _source_cache.move_to_end(key)
+    return source.acquire()
+
+
+def store_cached_source(key, source):
+    with _source_cache_lock:
+        _source_cache[key] = source
+        _source_cache.move_to_end(key)
+        while len(_source_cache) > SOURCE_CACHE_SIZE:
+            _source_cache.popitem(last=False)
+
+
+def drop_cached_sources(layer_id):
+    with _source_cache_lock:
+        for key in [key for key in _source_cache if key[0] == layer_id]:
+            del _source_cache[key]
+
+
+def watch_layer(layer):
+    # Committed geometry edits may keep the feature count and extent, so any data change
+    # of the layer drops its cached geometries.
+    layer_id = layer.id()
+    with _source_cache_lock:
+        if layer_id in _watched_layers:
+            return
+        _watched_layers.add(layer_id)
+
+    def on_deleted():
+        drop_cached_sources(layer_id)
+        with _source_cache_lock:
+            _watched_layers.discard(layer_id)
+
+    layer.dataChanged.connect(lambda: drop_cached_sources(layer_id))
+    layer.willBeDeleted.connect(on_deleted)
+
+
+def clear_source_cache():
+    with _source_cache_lock:
+        _source_cache.clear()
+
+
+class GenerateGridAlgorithm(GridBuilder, QgsProcessingAlgorithm):
+    INPUT = "INPUT"
+    SELECTED_ONLY = "SELECTED_ONLY"
+    SCALE = "SCALE"
+    ORIENTATION = "ORIENTATION"
+    PAPER_SIZE = "PAPER_SIZE"
+    MANUAL_SIZE = "MANUAL_SIZE"
+    WIDTH_MM = "WIDTH_MM"
+    HEIGHT_MM = "HEIGHT_MM"
+    PARALLEL = "PARALLEL"
+    INTERSECTION_ENGINE = "INTERSECTION_ENGINE"
+    PAGE_ORDER = "PAGE_ORDER"
+    NEIGHBOURS = "NEIGHBOURS"
+    COVERAGE = "COVERAGE"
+    MIN_COVERAGE = "MIN_COVERAGE"
+    OUTPUT = "OUTPUT"
+    SOURCES = "SOURCES"
+    CELL_COUNT = "CELL_COUNT"
+
+    ORIENTATIONS = ["landscape", "portrait"]
+    INTERSECTION_ENGINES = [GridEngine.ENGINE_PREPARED, GridEngine.ENGINE_SIMPLE]
+
+    PREPARE_PROGRESS_SHARE = 25
+    WRITE_PROGRESS_SHARE = 10
+    BATCH_SIZE = 5000
+
+    def createInstance(self):
+        return GenerateGridAlgorithm()
+
+    def name(self):
+        return "generategrid"
+
+    def displayName(self):
+        return self.tr("Generate atlas grid", "Atlas-Gitter erstellen")
+
+    def group(self):
+        return ""
+
+    def groupId(self):
+        return ""
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), "icon.png"))
+
+    def shortHelpString(self):
+        return self.tr(
+            "Creates a regular atlas grid for the input layer based on scale and layout format. "
+            "Only cells that intersect the input features are written. Runs on the same layer "
+            "reuse the transformed geometries, the spatial index and the prepared geometries, so batches "
+            "over several scales only read and prepare each layer once.",
+            "Erstellt ein regelmäßiges Atlas-Gitter für den Eingabelayer basierend auf Maßstab und "
+            "Layoutformat. Es werden nur Zellen geschrieben, die die Eingabeobjekte schneiden. "
+            "Läufe auf demselben Layer verwenden die transformierten Geometrien, den räumlichen Index "
+            "und die vorbereiteten Geometrien weiter, sodass Stapel über mehrere Maßstäbe jeden Layer "
+            "nur einmal lesen und vorbereiten."
+        )
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(
+            QgsProcessingParameterVectorLayer(
+                self.INPUT,
+                self.tr("Input layer", "Eingabelayer"),
+                [Qgis.ProcessingSourceType.VectorAnyGeometry]
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.SELECTED_ONLY,
+                self.tr("Create grid only for selected features", "Nur für ausgewählte Objekte ein Gitter erstellen"),
+                defaultValue=False
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.SCALE,
+                self.tr("Scale (1:x)", "Maßstab (1:x)"),
+                type=Qgis.ProcessingNumberParameterType.Integer,
+                defaultValue=1000,
+                minValue=1
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.ORIENTATION,
+                self.tr("Layout format", "Layout-Format"),
+                options=[self.tr("Landscape", "Querformat"), self.tr("Portrait", "Hochformat")],
+                defaultValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PAPER_SIZE,
+                self.tr("Paper size", "Papiergröße"),
+                options=list(self.paper_sizes_mm),
+                defaultValue=list(self.paper_sizes_mm).index("A4")
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.MANUAL_SIZE,
+                self.tr("Set map extent manually", "Kartenausschnitt manuell festlegen"),
+                defaultValue=False
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.WIDTH_MM,
+                self.tr("Manual width (mm)", "Manuelle Breite (mm)"),
+                type=Qgis.ProcessingNumberParameterType.Double,
+                defaultValue=297.0,
+                minValue=0.001
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.HEIGHT_MM,
+                self.tr("Manual height (mm)", "Manuelle Höhe (mm)"),
+                type=Qgis.ProcessingNumberParameterType.Double,
+                defaultValue=210.0,
+                minValue=0.001
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PAGE_ORDER,
+                self.tr("Page order", "Seitenreihenfolge"),
+                options=list(self.get_order_names().values()),
+                defaultValue=0
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.NEIGHBOURS,
+                self.tr("Write neighbour sheet attributes", "Nachbarblatt-Attribute schreiben"),
+                defaultValue=False
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.COVERAGE,
+                self.tr("Write coverage statistics", "Abdeckungsstatistik schreiben"),
+                defaultValue=False
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.MIN_COVERAGE,
+                self.tr("Minimum coverage (%)", "Mindestabdeckung (%)"),
+                type=Qgis.ProcessingNumberParameterType.Double,
+                defaultValue=0.0,
+                minValue=0.0,
+                maxValue=100.0
+            )
+        )
+
+        parallel_param = QgsProcessingParameterBoolean(
+            self.PARALLEL,
+            self.tr("Use parallel processing (all CPU cores)", "Parallele Verarbeitung verwenden (alle CPU-Kerne)"),
+            defaultValue=False
+        )
+        parallel_param.setFlags(parallel_param.flags() | Qgis.ProcessingParameterFlag.Advanced)
+        self.addParameter(parallel_param)
+
+        engine_param = QgsProcessingParameterEnum(
+            self.INTERSECTION_ENGINE,
+            self.tr("Intersection test", "Schnitttest"),
+            options=[
+                self.tr("Prepared geometries", "Vorbereitete Geometrien"),
+                self.tr("Simple geometry tests (no preparation)", "Einfache Geometrietests (ohne Vorbereitung)")
+            ],
+            defaultValue=0
+        )
+        engine_param.setFlags(engine_param.flags() | Qgis.ProcessingParameterFlag.Advanced)
+        self.addParameter(engine_param)
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT,
+                self.tr("Atlas grid", "Atlas-Gitter"),
+                Qgis.ProcessingSourceType.VectorPolygon
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.SOURCES,
+                self.tr("Cell/source feature relation table", "Beziehungstabelle Zelle/Quellobjekt"),
+                Qgis.ProcessingSourceType.Vector,
+                optional=True,
+                createByDefault=False
+            )
+        )
+        self.addOutput(QgsProcessingOutputNumber(self.CELL_COUNT, self.tr("Grid cells", "Gitterzellen")))
+
+    def build_cache_key(self, layer, selected_only, processing_crs):
+        # The key changes with everything that alters the prepared geometries: the data
+        # source and filter, the selection and the processing CRS.
+        selection = tuple(sorted(layer.selectedFeatureIds())) if selected_only else None
+        return (
+            layer.id(),
+            layer.source(),
+            layer.subsetString(),
+            selection,
+            processing_crs.authid(),
+            layer.featureCount(),
+            layer.extent().toString()
+        )
+
+    def prepare_source(self, layer, selected_only, processing_crs, context, feedback):
+        # Layers in edit mode may change between runs without changing the key.
+        cache_key = None
+        if not layer.isEditable():
+            cache_key = self.build_cache_key(layer, selected_only, processing_crs)
+            source = get_cached_source(cache_key)
+            if source is not None:
+                feedback.pushInfo(self.tr(
+                    "Reusing prepared geometries of the input layer.",
+                    "Vorbereitete Geometrien des Eingabelayers werden weiterverwendet."
+                ))
+                return source
+
+        request = QgsFeatureRequest()
+        request.setNoAttributes()
+        if selected_only:
+            request.setFilterFids(layer.selectedFeatureIds())
+            total = layer.selectedFeatureCount()
+        else:
+            total = layer.featureCount()
+
+        to_processing = None
+        if layer.crs().authid() != processing_crs.authid():
+            to_processing = QgsCoordinateTransform(layer.crs(), processing_crs, context.transformContext())
+
+        source = SourceGeometries().acquire()
+        completed = source.add_features(
+            QgsVectorLayerFeatureSource(layer).getFeatures(request),
+            to_processing=to_processing,
+            feature_count=total,
+            progress_callback=lambda percent: feedback.setProgress(percent * self.PREPARE_PROGRESS_SHARE / 100),
+            cancel_check=feedback.isCanceled
+        )
+        if not completed:
+            source.release()
+            return None
+
+        if cache_key is not None:
+            watch_layer(layer)
+            store_cached_source(cache_key, source)
+        return source
+
+    def processAlgorithm(self, parameters, context, feedback):
+        layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        if layer is None or not layer.isValid():
+            raise QgsProcessingException(self.tr("The selected layer is invalid.", "Der ausgewählte Layer ist ungültig."))
+
+        selected_only = self.parameterAsBoolean(parameters, self.SELECTED_ONLY, context)
+        if selected_only and layer.selectedFeatureCount() == 0:
+            raise QgsProcessingException(self.tr(
+                "Selected-features mode is enabled, but no features are selected.",
+                "Die Option für ausgewählte Objekte ist aktiviert, aber im Layer ist nichts selektiert."
+            ))
+
+        scale = self.parameterAsInt(parameters, self.SCALE, context)
+        orientation = self.ORIENTATIONS[self.parameterAsEnum(parameters, self.ORIENTATION, context)]
+
+        if self.parameterAsBoolean(parameters, self.MANUAL_SIZE, context):
+            grid_width_mm = self.parameterAsDouble(parameters, self.WIDTH_MM, context)
+            grid_height_mm = self.parameterAsDouble(parameters, self.HEIGHT_MM, context)
+        else:
+            paper_size = list(self.paper_sizes_mm)[self.parameterAsEnum(parameters, self.PAPER_SIZE, context)]
+            grid_width_mm, grid_height_mm = self.get_grid_dimensions_mm(orientation, paper_size)
+
+        grid_width = (grid_width_mm / 1000.0) * scale
+        grid_height = (grid_height_mm / 1000.0) * scale
+
+        source_crs = layer.crs()
+        processing_crs = self.get_processing_crs(layer)
+        to_source = None
+        if source_crs.authid() != processing_crs.authid():
+            to_source = QgsCoordinateTransform(processing_crs, source_crs, context.transformContext())
+
+        neighbours = self.parameterAsBoolean(parameters, self.NEIGHBOURS, context)
+        coverage = self.parameterAsBoolean(parameters, self.COVERAGE, context)
+        min_coverage = self.parameterAsDouble(parameters, self.MIN_COVERAGE, context) / 100.0
+        sink, dest_id = self.parameterAsSink(
+            parameters,
+            self.OUTPUT,
+            context,
+            GridOutput.create_fields(neighbours=neighbours, coverage=coverage),
+            Qgis.WkbType.Polygon,
+            source_crs
+        )
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        sources_sink, sources_dest_id = self.parameterAsSink(
+            parameters,
+            self.SOURCES,
+            context,
+            GridOutput.create_source_fields(),
+            Qgis.WkbType.NoGeometry,
+            source_crs
+        )
+
+        feedback.setProgressText(self.tr("Preparing geometries...", "Geometrien werden vorbereitet..."))
+        source = self.prepare_source(layer, selected_only, processing_crs, context, feedback)
+        if source is None:
+            return {}
+
+        # A cached source keeps its prepared engines for the next run on the same layer.
+        try:
+            if source.is_empty():
+                raise QgsProcessingException(self.tr(
+                    "No valid geometries were found in the layer.",
+                    "Keine gültigen Geometrien im Layer."
+                ))
+
+            feedback.setProgressText(self.tr("Creating grid cells...", "Gitterzellen werden erzeugt..."))
+            cell_share = 100 - self.PREPARE_PROGRESS_SHARE - self.WRITE_PROGRESS_SHARE
+            engine = GridEngine.for_source(
+                source,
+                grid_width,
+                grid_height,
+                offset=self.GRID_OFFSET,
+                record_hits=sources_sink is not None or coverage or min_coverage > 0,
+                intersection_engine=self.INTERSECTION_ENGINES[
+                    self.parameterAsEnum(parameters, self.INTERSECTION_ENGINE, context)
+                ],
+                progress_callback=lambda percent: feedback.setProgress(
+                    self.PREPARE_PROGRESS_SHARE + percent * cell_share / 100
+                ),
+                cancel_check=feedback.isCanceled
+            )
+
+            if self.parameterAsBoolean(parameters, self.PARALLEL, context):
+                keys = engine.run_parallel(os.cpu_count() or 1)
+            else:
+                keys = engine.run()
+
+            if keys is None:
+                return {}
+
+            engine.log_predicate_counts()
+            engine.progress_callback = None
+
+            # Labels count from the topmost hit, as in the dialog, even if the coverage filter
+            # drops it.
+            top_row = keys[-1][0] if keys else None
+            cell_coverage = None
+            if coverage or min_coverage > 0:
+                feedback.setProgressText(self.tr("Measuring cell coverage...", "Zellabdeckung wird gemessen..."))
+                cell_coverage = engine.measure_cell_coverage(keys)
+                if cell_coverage is None:
+                    return {}
+                if min_coverage > 0:
+                    kept = CellKeys.from_keys(key for key in keys if cell_coverage[key][3] >= min_coverage)
+                    feedback.pushInfo(self.tr(
+                        f"{len(keys) - len(kept)} cells below the minimum coverage were dropped.",
+                        f"{len(keys) - len(kept)} Zellen unter der Mindestabdeckung wurden verworfen."
+                    ))
+                    keys = kept
+
+            cell_sources = None
+            if sources_sink is not None:
+                feedback.setProgressText(self.tr(
+                    "Collecting source features per cell...",
+                    "Quellobjekte je Zelle werden gesammelt..."
+                ))
+                geometry_ids = engine.collect_cell_sources(keys)
+                if geometry_ids is None:
+                    return {}
+                cell_sources = {
+                    key: [source.feature_ids[geom_id] for geom_id in geom_ids]
+                    for key, geom_ids in geometry_ids.items()
+                }
+
+            feedback.setProgressText(self.tr("Writing grid cells...", "Gitterzellen werden geschrieben..."))
+            ordering = grid_core.ORDERS[self.parameterAsEnum(parameters, self.PAGE_ORDER, context)]
+            count = self.write_cells(
+                engine, keys, sink, to_source, feedback, ordering, neighbours, cell_sources, sources_sink,
+                cell_coverage if coverage else None, top_row
+            )
+            if count is None:
+                return {}
+
+            results = {self.OUTPUT: dest_id, self.CELL_COUNT: count}
+            if sources_sink is not None:
+                results[self.SOURCES] = sources_dest_id
+            return results
+        finally:
+            source.release()
+
+    def write_cells(self, engine, keys, sink, to_source, feedback, ordering=grid_core.ORDER_ROWS,
+                    neighbours=False, cell_sources=None, sources_sink=None, cell_coverage=None, top_row=None):
+        if not keys:
+            return 0
+
+        fields = GridOutput.create_fields(neighbours=neighbours, coverage=cell_coverage is not None)
+        source_fields = GridOutput.create_source_fields()
+        start = 100 - self.WRITE_PROGRESS_SHARE
+        descriptor = engine.get_descriptor()
+        if top_row is None:
+            top_row = keys[-1][0]
+        count = 0
+        batch_keys = []
+
+        serial_map = None
+        ordered_keys = engine.iter_ordered(keys, ordering)
+        if neighbours:
+            serial_map = engine.build_serial_map(keys, ordering)
+            ordered_keys = iter(serial_map)
+
+        def write_batch():
+            nonlocal count
+            neighbour_serials = None
+            if serial_map is not None:
+                neighbour_serials = {key: grid_core.get_neighbour_serials(key, serial_map) for key in batch_keys}
+
+            if cell_sources is not None:
+                self.add_source_rows(batch_keys, cell_sources, source_fields, sources_sink, first_serial=count + 1)
+
+            count += self.add_grid_features(
+                lattice=descriptor,
+                keys=batch_keys,
+                fields=fields,
+                sink=sink,
+                to_source_transform=to_source,
+                first_serial=count + 1,
+                top_row=top_row,
+                neighbour_serials=neighbour_serials,
+                coverage=cell_coverage
+            )
+            feedback.setProgress(start + count / len(keys) * self.WRITE_PROGRESS_SHARE)
+
+        for key in ordered_keys:
+            batch_keys.append(key)
+            if len(batch_keys) < self.BATCH_SIZE:
+                continue
+
+            if feedback.isCanceled():
+                return None
+
+            write_batch()
+            batch_keys = []
+
+        if batch_keys:
+            write_batch()
+
+        return count
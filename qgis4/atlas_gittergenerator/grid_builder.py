@@ -0,0 +1,170 @@
+from qgis.PyQt.QtCore import QSettings
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsRectangle,
+    QgsFeature,
+    QgsGeometry,
+    QgsPointXY,
+    QgsLineString
+)
+
+from . import grid_core
+from .grid_output import GridOutput
+
+
+class GridBuilder:
+    GRID_OFFSET = grid_core.GRID_OFFSET
+
+    paper_sizes_mm = grid_core.PAPER_SIZES_MM
+
+    def tr(self, en, de):
+        lang = QSettings().value("locale/userLocale", "en")
+        return de if str(lang)[:2].lower() == "de" else en
+
+    def get_processing_crs(self, layer):
+        source_crs = layer.crs()
+        extent = layer.extent()
+
+        if not source_crs.isValid() or extent.isEmpty():
+            return QgsCoordinateReferenceSystem("EPSG:25832")
+
+        if source_crs.isGeographic():
+            center_x = (extent.xMinimum() + extent.xMaximum()) / 2.0
+            center_y = (extent.yMinimum() + extent.yMaximum()) / 2.0
+            return QgsCoordinateReferenceSystem(f"EPSG:{grid_core.get_utm_epsg(center_x, center_y)}")
+
+        return source_crs
+
+    get_column_label = staticmethod(grid_core.get_column_label)
+    get_cell_label = staticmethod(grid_core.get_cell_label)
+
+    def get_order_names(self):
+        return {
+            grid_core.ORDER_ROWS: self.tr("Rows from top to bottom", "Zeilenweise von oben nach unten"),
+            grid_core.ORDER_SERPENTINE: self.tr("Serpentine rows", "Zeilen in Schlangenlinie"),
+            grid_core.ORDER_HILBERT: self.tr("Hilbert curve", "Hilbert-Kurve"),
+            grid_core.ORDER_MORTON: self.tr("Z-order curve", "Z-Kurve")
+        }
+
+    def get_grid_dimensions_mm(self, orientation, paper_size):
+        return grid_core.get_grid_dimensions_mm(orientation, paper_size)
+
+    def rect_to_source_polygon(self, rect, to_source_transform=None):
+        points = [
+            QgsPointXY(rect.xMinimum(), rect.yMinimum()),
+            QgsPointXY(rect.xMaximum(), rect.yMinimum()),
+            QgsPointXY(rect.xMaximum(), rect.yMaximum()),
+            QgsPointXY(rect.xMinimum(), rect.yMaximum())
+        ]
+
+        if to_source_transform is not None:
+            points = [to_source_transform.transform(pt) for pt in points]
+
+        points.append(points[0])
+        return QgsGeometry.fromPolygonXY([points])
+
+    def transform_cell_corners(self, lattice, keys, to_source_transform):
+        # Neighbouring cells share their corners, so every lattice corner is reprojected
+        # once, and all of them in a single bulk transform of one line string.
+        corners = set()
+        for row_index, col_index in keys:
+            corners.update((
+                (row_index, col_index),
+                (row_index, col_index + 1),
+                (row_index + 1, col_index + 1),
+                (row_index + 1, col_index)
+            ))
+
+        corners = list(corners)
+        line = QgsLineString(
+            [lattice.xmin + col_index * lattice.grid_width for _, col_index in corners],
+            [lattice.ymin + row_index * lattice.grid_height for row_index, _ in corners]
+        )
+        line.transform(to_source_transform)
+        return {corner: QgsPointXY(line.xAt(i), line.yAt(i)) for i, corner in enumerate(corners)}
+
+    @staticmethod
+    def corners_to_polygon(corner_points, row_index, col_index):
+        points = [
+            corner_points[(row_index, col_index)],
+            corner_points[(row_index, col_index + 1)],
+            corner_points[(row_index + 1, col_index + 1)],
+            corner_points[(row_index + 1, col_index)]
+        ]
+        points.append(points[0])
+        return QgsGeometry.fromPolygonXY([points])
+
+    def add_grid_features(self, lattice, keys, fields, sink, to_source_transform=None,
+                          first_serial=1, top_row=None, scale=None, parent_labels=None,
+                          neighbour_serials=None, coverage=None, labels=None):
+        # keys are (row, col) lattice indices with row 0 at the bottom, already in serial
+        # order; the cell coordinates are only derived here, right before the features are
+        # written.
+        if not keys:
+            return 0
+
+        if top_row is None:
+            top_row = max(row_index for row_index, _ in keys)
+
+        corner_points = None
+        if to_source_transform is not None:
+            corner_points = self.transform_cell_corners(lattice, keys, to_source_transform)
+
+        page_extents = fields.indexOf("page_xmin") >= 0
+
+        new_features = []
+        for serial, (row_index, col_index) in enumerate(keys, start=first_serial):
+            feat = QgsFeature(fields)
+            if corner_points is not None:
+                feat.setGeometry(self.corners_to_polygon(corner_points, row_index, col_index))
+            else:
+                rect = QgsRectangle(*lattice.get_cell_bounds(row_index, col_index))
+                feat.setGeometry(self.rect_to_source_polygon(rect))
+
+            if labels is not None:
+                feat.setAttribute("grid", labels[(row_index, col_index)])
+            else:
+                feat.setAttribute("grid", self.get_cell_label(col_index + 1, top_row - row_index + 1))
+            feat.setAttribute("serial", serial)
+            if scale is not None:
+                feat.setAttribute("scale", scale)
+            if parent_labels is not None:
+                feat.setAttribute("parent", parent_labels.get((row_index, col_index)))
+            if page_extents:
+                page_xmin, page_ymin, page_xmax, page_ymax = lattice.get_cell_bounds(row_index, col_index)
+                feat.setAttribute("page_xmin", page_xmin)
+                feat.setAttribute("page_ymin", page_ymin)
+                feat.setAttribute("page_xmax", page_xmax)
+                feat.setAttribute("page_ymax", page_ymax)
+            if neighbour_serials is not None:
+                serials = neighbour_serials[(row_index, col_index)]
+                for (name, row_offset, col_offset), neighbour_serial in zip(grid_core.NEIGHBOUR_OFFSETS, serials):
+                    feat.setAttribute(f"{name}_serial", neighbour_serial)
+                    feat.setAttribute(
+                        f"{name}_grid",
+                        self.get_cell_label(col_index + col_offset + 1, top_row - row_index - row_offset + 1)
+                        if neighbour_serial is not None else None
+                    )
+            if coverage is not None:
+                for name, value in zip(GridOutput.COVERAGE_FIELDS, coverage[(row_index, col_index)]):
+                    feat.setAttribute(name, value)
+
+            new_features.append(feat)
+
+        sink.addFeatures(new_features)
+        return len(new_features)
+
+    def add_source_rows(self, keys, cell_sources, fields, sink, first_serial=1):
+        # One (cell serial, source fid) row per intersecting source feature.
+        new_features = []
+        for serial, key in enumerate(keys, start=first_serial):
+            for feature_id in cell_sources.get(key, ()):
+                feat = QgsFeature(fields)
+                feat.setAttribute("cell_serial", serial)
+                feat.setAttribute("source_fid", feature_id)
+                new_features.append(feat)
+
+        if new_features:
+            sink.addFeatures(new_features)
+        return len(new_features)
@@ -0,0 +1,150 @@
+import os
+import sys
+import struct
+import hashlib
+from array import array
+
+from qgis.PyQt.QtCore import QSettings
+
+from qgis.core import Qgis, QgsApplication, QgsMessageLog
+
+from .grid_core import CellKeys
+
+
+class GridCache:
+    SETTINGS_DIR = "atlas_gittergenerator/cache_dir"
+    SETTINGS_MAX_MB = "atlas_gittergenerator/cache_max_mb"
+    DEFAULT_MAX_MB = 256
+
+    MAGIC = b"AGGC"
+    VERSION = 1
+    FILE_EXTENSION = ".grid"
+    # magic, version, xmin, ymin, grid width, grid height, columns, rows, cell count
+    HEADER = struct.Struct("<4sI4dIII")
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_settings(cls):
+        settings = QSettings()
+        directory = settings.value(cls.SETTINGS_DIR, "") or os.path.join(
+            QgsApplication.qgisSettingsDirPath(), "atlas_gittergenerator", "cache"
+        )
+        max_mb = int(settings.value(cls.SETTINGS_MAX_MB, cls.DEFAULT_MAX_MB))
+        return cls(directory, max_mb * 1024 * 1024)
+
+    @staticmethod
+    def create_fingerprint():
+        return hashlib.blake2b(digest_size=20)
+
+    def make_key(self, fingerprint, source_crs, processing_crs, scale, width_mm, height_mm, orientation, offset):
+        # The fingerprint hashes source coordinates, which only mean the same place in the
+        # same source CRS.
+        key = fingerprint.copy()
+        key.update(
+            f"|{self.VERSION}|{source_crs}|{processing_crs}|{scale}|{width_mm!r}|{height_mm!r}|{orientation}|{offset!r}"
+            .encode()
+        )
+        return key.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + self.FILE_EXTENSION)
+
+    def log(self, message, level=Qgis.MessageLevel.Info):
+        QgsMessageLog.logMessage(message, "Atlas Grid Generator", level)
+
+    @staticmethod
+    def to_little_endian(values):
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values
+
+    def load(self, key):
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as f:
+                header = f.read(self.HEADER.size)
+                if len(header) != self.HEADER.size:
+                    return None
+
+                magic, version, xmin, ymin, grid_width, grid_height, column_count, row_count, count = \
+                    self.HEADER.unpack(header)
+                if magic != self.MAGIC or version != self.VERSION:
+                    return None
+
+                rows = array("i")
+                cols = array("i")
+                rows.fromfile(f, count)
+                cols.fromfile(f, count)
+
+            # Eviction removes the entries with the oldest modification time first.
+            os.utime(path)
+        except (OSError, EOFError):
+            return None
+
+        rows = self.to_little_endian(rows)
+        cols = self.to_little_endian(cols)
+        return {
+            "xmin": xmin,
+            "ymin": ymin,
+            "grid_width": grid_width,
+            "grid_height": grid_height,
+            "column_count": column_count,
+            "row_count": row_count,
+            "keys": CellKeys(rows, cols)
+        }
+
+    def store(self, key, engine, keys):
+        rows = self.to_little_endian(array("i", keys.rows))
+        cols = self.to_little_endian(array("i", keys.cols))
+        path = self.get_path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(self.HEADER.pack(
+                    self.MAGIC,
+                    self.VERSION,
+                    engine.xmin,
+                    engine.ymin,
+                    engine.grid_width,
+                    engine.grid_height,
+                    engine.get_column_count(),
+                    engine.get_row_count(),
+                    len(keys)
+                ))
+                rows.tofile(f)
+                cols.tofile(f)
+            # Other machines may read the same shared directory, so entries only appear
+            # once they are complete.
+            os.replace(temp_path, path)
+        except OSError as e:
+            self.log(f"Grid cache entry could not be written: {e}", Qgis.MessageLevel.Warning)
+            return
+
+        self.evict()
+
+    def evict(self):
+        try:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(self.FILE_EXTENSION):
+                    continue
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                continue
@@ -0,0 +1,705 @@
+import os
+import sys
+import math
+import shutil
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsRectangle,
+    QgsGeometry,
+    QgsSpatialIndex,
+    QgsMessageLog
+)
+
+from .grid_core import GridLattice, CellKeys
+
+
+_band_cancel_event = None
+
+
+def get_python_executable():
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+
+    # Inside QGIS sys.executable points to the application binary, so look for the
+    # interpreter of the embedded Python where the platform installers put it.
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    prefix_path = QgsApplication.prefixPath()
+    if sys.platform == "win32":
+        # OSGeo4W and the standalone installer: <root>/apps/qgis and <root>/apps/PythonXY
+        candidates = [
+            os.path.join(sys.exec_prefix, "python.exe"),
+            os.path.join(prefix_path, "..", f"Python{sys.version_info.major}{sys.version_info.minor}", "python.exe"),
+            os.path.join(prefix_path, "..", "..", "bin", "python.exe")
+        ]
+    elif sys.platform == "darwin":
+        # QGIS.app/Contents/MacOS is the prefix and ships the interpreter in its bin folder.
+        candidates = [
+            os.path.join(prefix_path, "bin", f"python{version}"),
+            os.path.join(prefix_path, "bin", "python3"),
+            os.path.join(sys.exec_prefix, "bin", f"python{version}"),
+            os.path.join(sys.exec_prefix, "bin", "python3")
+        ]
+    else:
+        candidates = [
+            os.path.join(sys.exec_prefix, "bin", f"python{version}"),
+            os.path.join(sys.exec_prefix, "bin", "python3"),
+            shutil.which(f"python{version}")
+        ]
+
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return os.path.normpath(candidate)
+
+    return None
+
+
+def get_process_context():
+    executable = get_python_executable()
+    if executable is None:
+        return None
+
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(executable)
+    return context
+
+
+def init_band_worker(cancel_event, prefix_path):
+    global _band_cancel_event
+    _band_cancel_event = cancel_event
+    QgsApplication.setPrefixPath(prefix_path, True)
+
+
+def run_band(job):
+    source = SourceGeometries()
+    for wkb in job["wkbs"]:
+        geom = QgsGeometry()
+        geom.fromWkb(wkb)
+        source.add_geometry(geom)
+
+    engine = GridEngine(
+        source=source,
+        grid_width=job["grid_width"],
+        grid_height=job["grid_height"],
+        xmin=job["xmin"],
+        ymin=job["ymin"],
+        column_count=job["column_count"],
+        row_count=job["row_count"],
+        intersection_engine=job["intersection_engine"],
+        enumeration_mode=job["enumeration_mode"],
+        cancel_check=_band_cancel_event.is_set if _band_cancel_event is not None else None
+    )
+    keys = engine.run()
+    return job["first_row"], keys, engine.predicate_counts, engine.prepared_geometry_count, engine.cells_visited
+
+
+class SourceGeometries:
+    def __init__(self):
+        self.geometries = []
+        self.feature_ids = []
+        self.xmin = math.inf
+        self.ymin = math.inf
+        self.xmax = -math.inf
+        self.ymax = -math.inf
+        self.prepared_geometry_count = 0
+        self._prepared_engines = {}
+        self._spatial_index = None
+        self._lock = threading.Lock()
+        self._in_use = False
+
+    def add_geometry(self, geom, feature_id=None):
+        bbox = geom.boundingBox()
+        self.xmin = min(self.xmin, bbox.xMinimum())
+        self.ymin = min(self.ymin, bbox.yMinimum())
+        self.xmax = max(self.xmax, bbox.xMaximum())
+        self.ymax = max(self.ymax, bbox.yMaximum())
+        self.geometries.append(geom)
+        self.feature_ids.append(feature_id)
+
+        if self._spatial_index is not None:
+            self._spatial_index.addFeature(len(self.geometries) - 1, bbox)
+
+    def add_features(self, features, to_processing=None, feature_count=0,
+                     progress_callback=None, cancel_check=None, fingerprint=None, stats=None):
+        total = max(1, feature_count)
+        transform_time = 0.0
+        bounds_time = 0.0
+        features_read = 0
+
+        for i, feature in enumerate(features):
+            if cancel_check is not None and cancel_check():
+                return False
+
+            features_read += 1
+            geom = feature.geometry()
+            if geom.isEmpty():
+                continue
+
+            if fingerprint is not None:
+                fingerprint.update(bytes(geom.asWkb()))
+
+            if to_processing is not None:
+                start = time.perf_counter()
+                geom.transform(to_processing)
+                transform_time += time.perf_counter() - start
+
+            if not geom.isEmpty():
+                start = time.perf_counter()
+                self.add_geometry(geom, feature.id())
+                bounds_time += time.perf_counter() - start
+
+            if progress_callback is not None:
+                progress_callback(int(min(1.0, (i + 1) / total) * 100))
+
+        if stats is not None:
+            stats.add_time("crs_transform", transform_time)
+            stats.add_time("bbox_union", bounds_time)
+            stats.add_count("features_read", features_read)
+            stats.add_count("geometries", len(self.geometries))
+
+        return True
+
+    def is_empty(self):
+        return not self.geometries
+
+    def copy(self):
+        # The geometries are implicitly shared and so is the spatial index, which guards its
+        # queries with its own mutex. Prepared engines are not thread-safe and stay with
+        # the source that built them.
+        source = SourceGeometries()
+        source.geometries = [QgsGeometry(geom) for geom in self.geometries]
+        source.feature_ids = list(self.feature_ids)
+        source.xmin, source.ymin, source.xmax, source.ymax = self.xmin, self.ymin, self.xmax, self.ymax
+        source._spatial_index = self.get_spatial_index()
+        return source
+
+    def acquire(self):
+        # A shared source serves one run at a time together with its prepared engines; a
+        # run that starts while it is busy gets a copy that prepares its own.
+        with self._lock:
+            if not self._in_use:
+                self._in_use = True
+                return self
+        return self.copy()
+
+    def release(self):
+        with self._lock:
+            self._in_use = False
+
+    def get_spatial_index(self):
+        if self._spatial_index is not None:
+            return self._spatial_index
+
+        with self._lock:
+            if self._spatial_index is None:
+                spatial_index = QgsSpatialIndex()
+                for geom_id, geom in enumerate(self.geometries):
+                    spatial_index.addFeature(geom_id, geom.boundingBox())
+                self._spatial_index = spatial_index
+            return self._spatial_index
+
+    def get_prepared_engine(self, geom_id):
+        if geom_id not in self._prepared_engines:
+            engine = QgsGeometry.createGeometryEngine(self.geometries[geom_id].constGet())
+            if engine is not None:
+                engine.prepareGeometry()
+                self.prepared_geometry_count += 1
+            self._prepared_engines[geom_id] = engine
+        return self._prepared_engines[geom_id]
+
+
+class GridEngine(GridLattice):
+    ENGINE_SIMPLE = "simple"
+    ENGINE_PREPARED = "prepared"
+
+    ENUMERATION_SCAN = "scan"
+    ENUMERATION_FEATURES = "features"
+    ENUMERATION_LATTICE = "lattice"
+
+    SCANLINE_MIN_CELLS = 64
+    BANDS_PER_WORKER = 4
+
+    def __init__(self, source, grid_width, grid_height, xmin, ymin, column_count, row_count,
+                 intersection_engine=ENGINE_PREPARED, enumeration_mode=ENUMERATION_LATTICE,
+                 record_hits=False, progress_callback=None, cancel_check=None):
+        super().__init__(
+            grid_width, grid_height, xmin, ymin, column_count, row_count,
+            progress_callback=progress_callback, cancel_check=cancel_check
+        )
+        self.source = source
+        self.geometries = source.geometries
+        self.intersection_engine = intersection_engine
+        self.enumeration_mode = enumeration_mode
+        self.predicate_counts = {"prepared": 0, "unprepared": 0}
+        self.prepared_geometry_count = 0
+        # (row, col) -> [(geom_id, interior), ...] for every geometry that hits the cell, filled
+        # during the enumeration when the source, coverage or load passes need all hits.
+        self.recorded_hits = {} if record_hits else None
+
+    @classmethod
+    def for_source(cls, source, grid_width, grid_height, offset=0.0, **kwargs):
+        return cls.from_extent(
+            source.xmin, source.ymin, source.xmax, source.ymax, grid_width, grid_height,
+            offset=offset, source=source, **kwargs
+        )
+
+    def intersects(self, geom_id, rect_geom):
+        if self.intersection_engine == self.ENGINE_PREPARED:
+            engine = self.source.get_prepared_engine(geom_id)
+            if engine is not None:
+                self.predicate_counts["prepared"] += 1
+                return engine.intersects(rect_geom.constGet())
+
+        self.predicate_counts["unprepared"] += 1
+        return self.geometries[geom_id].intersects(rect_geom)
+
+    def intersects_any(self, candidate_ids, rect_geom):
+        return any(self.intersects(geom_id, rect_geom) for geom_id in candidate_ids)
+
+    def log_predicate_counts(self):
+        QgsMessageLog.logMessage(
+            f"Intersection engine '{self.intersection_engine}': "
+            f"{self.predicate_counts['prepared']} prepared and "
+            f"{self.predicate_counts['unprepared']} unprepared predicate calls, "
+            f"{self.prepared_geometry_count} prepared geometries.",
+            "Atlas Grid Generator",
+            Qgis.MessageLevel.Info
+        )
+
+    def get_cell_rect(self, row_index, col_index):
+        return QgsRectangle(*self.get_cell_bounds(row_index, col_index))
+
+    def get_geometry_bounds(self):
+        bounds = []
+        for geom in self.geometries:
+            bbox = geom.boundingBox()
+            bounds.append((bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum()))
+        return bounds
+
+    def intersects_cell(self, row_index, col_index):
+        rect = self.get_cell_rect(row_index, col_index)
+        candidate_ids = self.source.get_spatial_index().intersects(rect)
+        if not candidate_ids:
+            return False
+
+        rect_geom = QgsGeometry.fromRect(rect)
+        if self.recorded_hits is None:
+            return self.intersects_any(candidate_ids, rect_geom)
+
+        geom_ids = sorted(geom_id for geom_id in candidate_ids if self.intersects(geom_id, rect_geom))
+        if geom_ids:
+            self.recorded_hits[(row_index, col_index)] = [(geom_id, False) for geom_id in geom_ids]
+        return bool(geom_ids)
+
+    def enumerate_by_scan(self):
+        total_rows = self.get_row_count()
+        total_cols = self.get_column_count()
+        hits = CellKeys()
+        spatial_index = self.source.get_spatial_index()
+
+        for row_index in range(total_rows):
+            for col_index in range(total_cols):
+                if self.is_cancelled():
+                    return None
+
+                self.cells_visited += 1
+                rect = self.get_cell_rect(row_index, col_index)
+                candidate_ids = spatial_index.intersects(rect)
+
+                if candidate_ids and self.intersects_any(candidate_ids, QgsGeometry.fromRect(rect)):
+                    hits.append(row_index, col_index)
+
+            percent = int(((row_index + 1) / total_rows) * 100)
+            self.report_progress(percent)
+
+        return hits
+
+    def enumerate_by_features(self):
+        total_rows = self.get_row_count()
+        total_cols = self.get_column_count()
+        total_geometries = len(self.geometries)
+        last_percent = -1
+        hits = set()
+
+        for geom_id, geom in enumerate(self.geometries):
+            bbox = geom.boundingBox()
+            first_row, last_row = self.get_index_range(
+                bbox.yMinimum(), bbox.yMaximum(), self.ymin, self.grid_height, total_rows
+            )
+            first_col, last_col = self.get_index_range(
+                bbox.xMinimum(), bbox.xMaximum(), self.xmin, self.grid_width, total_cols
+            )
+
+            rings = self.get_scanline_rings(geom, bbox)
+            if rings is not None:
+                boundary, interior = self.classify_polygon_cells(rings, total_rows, total_cols)
+                hits.update(interior)
+                keys = sorted(boundary)
+            else:
+                keys = (
+                    (row_index, col_index)
+                    for row_index in range(first_row, last_row + 1)
+                    for col_index in range(first_col, last_col + 1)
+                )
+
+            for key in keys:
+                if self.is_cancelled():
+                    return None
+
+                if key in hits:
+                    continue
+
+                self.cells_visited += 1
+                rect_geom = QgsGeometry.fromRect(self.get_cell_rect(*key))
+                if self.intersects(geom_id, rect_geom):
+                    hits.add(key)
+
+            percent = int(((geom_id + 1) / total_geometries) * 100)
+            if percent != last_percent:
+                last_percent = percent
+                self.report_progress(percent)
+
+        return CellKeys.from_keys(sorted(hits))
+
+    def iter_cell_hits(self, keys):
+        # Yields (geom_id, key, interior) for every geometry that hits one of keys. Hits
+        # recorded during the enumeration are replayed without another predicate call;
+        # otherwise the enumeration stopped at the first geometry per cell and a second
+        # pass tests every geometry against the hit cells.
+        if self.recorded_hits is not None:
+            for key in keys:
+                for geom_id, interior in self.recorded_hits.get(key, ()):
+                    yield geom_id, key, interior
+            return
+
+        yield from self.iter_geometry_hits(keys)
+
+    def iter_geometry_hits(self, keys=None):
+        # Tests every geometry against the cells inside its bounding box, or only against
+        # keys when given. Yields (geom_id, key, interior) and stops early when cancelled.
+        total_rows = self.get_row_count()
+        total_cols = self.get_column_count()
+        total_geometries = len(self.geometries)
+        last_percent = -1
+        hits = set(keys) if keys is not None else None
+
+        for geom_id, geom in enumerate(self.geometries):
+            bbox = geom.boundingBox()
+            first_row, last_row = self.get_index_range(
+                bbox.yMinimum(), bbox.yMaximum(), self.ymin, self.grid_height, total_rows
+            )
+            first_col, last_col = self.get_index_range(
+                bbox.xMinimum(), bbox.xMaximum(), self.xmin, self.grid_width, total_cols
+            )
+
+            rings = self.get_scanline_rings(geom, bbox)
+            if rings is not None:
+                boundary, interior = self.classify_polygon_cells(rings, total_rows, total_cols)
+                for key in interior:
+                    if hits is None or key in hits:
+                        yield geom_id, key, True
+                candidates = sorted(boundary)
+            else:
+                candidates = (
+                    (row_index, col_index)
+                    for row_index in range(first_row, last_row + 1)
+                    for col_index in range(first_col, last_col + 1)
+                )
+
+            for key in candidates:
+                if self.is_cancelled():
+                    return
+
+                if hits is not None and key not in hits:
+                    continue
+
+                self.cells_visited += 1
+                rect_geom = QgsGeometry.fromRect(self.get_cell_rect(*key))
+                if self.intersects(geom_id, rect_geom):
+                    yield geom_id, key, False
+
+            percent = int(((geom_id + 1) / total_geometries) * 100)
+            if percent != last_percent:
+                last_percent = percent
+                self.report_progress(percent)
+
+    def collect_cell_sources(self, keys):
+        cell_sources = {}
+        for geom_id, key, _ in self.iter_cell_hits(keys):
+            cell_sources.setdefault(key, []).append(geom_id)
+        return None if self.is_cancelled() else cell_sources
+
+    def measure_cell_coverage(self, keys):
+        # Interior cells are covered completely; only boundary cells are clipped.
+        cell_area = self.grid_width * self.grid_height
+        coverage = {key: [0, 0.0, 0.0, False] for key in keys}
+
+        for geom_id, key, interior in self.iter_cell_hits(keys):
+            stats = coverage[key]
+            stats[0] += 1
+            geom = self.geometries[geom_id]
+            geometry_type = geom.type()
+
+            if interior:
+                stats[1] += cell_area
+            elif geometry_type == Qgis.GeometryType.Point:
+                stats[3] = True
+            elif geometry_type in (Qgis.GeometryType.Line, Qgis.GeometryType.Polygon):
+                clipped = geom.clipped(self.get_cell_rect(*key))
+                if geometry_type == Qgis.GeometryType.Polygon:
+                    stats[1] += clipped.area()
+                else:
+                    stats[2] += clipped.length()
+
+        if self.is_cancelled():
+            return None
+
+        # (feature count, covered area, line length, coverage fraction) per cell. Lines
+        # count as covering the cell when they are as long as the cell is wide, points
+        # cover it completely, and overlapping features are capped at a full cell.
+        return {
+            key: (
+                count,
+                area,
+                length,
+                1.0 if has_points else min(1.0, area / cell_area + length / self.grid_width)
+            )
+            for key, (count, area, length, has_points) in coverage.items()
+        }
+
+    def measure_cell_load(self, keys):
+        # (feature count, vertex count) per cell. No edge crosses an interior cell, so it
+        # holds no vertices of that geometry.
+        load = {key: [0, 0] for key in keys}
+
+        for geom_id, key, interior in self.iter_cell_hits(keys):
+            cell_load = load[key]
+            cell_load[0] += 1
+            geom = self.geometries[geom_id]
+
+            if geom.type() == Qgis.GeometryType.Point:
+                cell_load[1] += 1
+            elif not interior:
+                cell_load[1] += geom.clipped(self.get_cell_rect(*key)).constGet().nCoordinates()
+
+        return None if self.is_cancelled() else load
+
+    def get_scanline_rings(self, geom, bbox):
+        if geom.type() != Qgis.GeometryType.Polygon or geom.constGet().hasCurvedSegments():
+            return None
+
+        cell_count = (bbox.width() / self.grid_width + 1) * (bbox.height() / self.grid_height + 1)
+        if cell_count < self.SCANLINE_MIN_CELLS:
+            return None
+
+        polygons = geom.asMultiPolygon() if geom.isMultipart() else [geom.asPolygon()]
+        return [[[(pt.x(), pt.y()) for pt in ring] for ring in polygon] for polygon in polygons]
+
+    def is_bbox_exact(self, geom):
+        if geom.isMultipart():
+            return False
+
+        if geom.type() == Qgis.GeometryType.Point:
+            return True
+
+        if geom.type() != Qgis.GeometryType.Polygon or geom.constGet().nCoordinates() != 5:
+            return False
+
+        bbox_area = geom.boundingBox().area()
+        return bbox_area > 0 and abs(geom.area() - bbox_area) <= bbox_area * self.RANGE_EPSILON
+
+    def enumerate_by_lattice(self):
+        bounds = []
+        exact = []
+        rings = {}
+
+        for geom_id, geom in enumerate(self.geometries):
+            if self.is_cancelled():
+                return None
+
+            bbox = geom.boundingBox()
+            bounds.append((bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum()))
+            exact.append(self.is_bbox_exact(geom))
+
+            geom_rings = None if exact[-1] else self.get_scanline_rings(geom, bbox)
+            if geom_rings is not None:
+                rings[geom_id] = geom_rings
+
+        return self.enumerate_lattice(bounds, exact, rings, self.intersects_cell)
+
+    def enumerate_recording(self):
+        # One pass over every geometry records all hits per cell instead of stopping at the
+        # first one, which replaces the lattice prefilter and the second pass.
+        for geom_id, key, interior in self.iter_geometry_hits():
+            self.recorded_hits.setdefault(key, []).append((geom_id, interior))
+
+        if self.is_cancelled():
+            return None
+        return CellKeys.from_keys(sorted(self.recorded_hits))
+
+    def run(self):
+        enumeration_mode = self.enumeration_mode
+        if enumeration_mode == self.ENUMERATION_LATTICE and not self.can_use_lattice():
+            enumeration_mode = self.ENUMERATION_FEATURES
+
+        if self.recorded_hits is not None:
+            keys = self.enumerate_recording()
+        elif enumeration_mode == self.ENUMERATION_LATTICE:
+            keys = self.enumerate_by_lattice()
+        elif enumeration_mode == self.ENUMERATION_FEATURES:
+            keys = self.enumerate_by_features()
+        else:
+            keys = self.enumerate_by_scan()
+
+        self.prepared_geometry_count = self.source.prepared_geometry_count
+        return keys
+
+    def get_child_engine(self, **kwargs):
+        return GridEngine(
+            self.source,
+            self.grid_width / 2,
+            self.grid_height / 2,
+            self.xmin,
+            self.ymin,
+            self.get_column_count() * 2,
+            self.get_row_count() * 2,
+            intersection_engine=self.intersection_engine,
+            **kwargs
+        )
+
+    def run_within(self, parent, parent_keys):
+        return self.run_candidates(self.get_candidates_within(parent, parent_keys))
+
+    def run_children(self, parent_keys):
+        return self.run_candidates(self.get_child_keys(parent_keys))
+
+    def run_candidates(self, candidates):
+        total_candidates = len(candidates)
+        last_percent = -1
+        hits = CellKeys()
+
+        for i, key in enumerate(candidates):
+            if self.is_cancelled():
+                return None
+
+            self.cells_visited += 1
+            if self.intersects_cell(*key):
+                hits.append(*key)
+
+            percent = int(((i + 1) / total_candidates) * 100)
+            if percent != last_percent:
+                last_percent = percent
+                self.report_progress(percent)
+
+        self.prepared_geometry_count = self.source.prepared_geometry_count
+        return hits
+
+    def build_band_jobs(self, bands):
+        band_starts = [first_row for first_row, _, _ in bands]
+        band_wkbs = [[] for _ in bands]
+
+        for geom in self.geometries:
+            bbox = geom.boundingBox()
+            first_row, last_row = self.get_index_range(
+                bbox.yMinimum(), bbox.yMaximum(), self.ymin, self.grid_height, self.get_row_count()
+            )
+            wkb = bytes(geom.asWkb())
+            first_band = max(0, bisect_right(band_starts, first_row) - 1)
+            for band_index in range(first_band, len(bands)):
+                if bands[band_index][0] > last_row:
+                    break
+                if bands[band_index][1] >= first_row:
+                    band_wkbs[band_index].append(wkb)
+
+        jobs = []
+        for (first_row, last_row, weight), wkbs in zip(bands, band_wkbs):
+            jobs.append(({
+                "wkbs": wkbs,
+                "grid_width": self.grid_width,
+                "grid_height": self.grid_height,
+                "xmin": self.xmin,
+                "ymin": self.ymin + first_row * self.grid_height,
+                "column_count": self.get_column_count(),
+                "row_count": last_row - first_row + 1,
+                "first_row": first_row,
+                "intersection_engine": self.intersection_engine,
+                "enumeration_mode": self.enumeration_mode
+            }, weight))
+        return jobs
+
+    def run_parallel(self, worker_count):
+        context = get_process_context()
+        bands = self.split_row_bands(worker_count * self.BANDS_PER_WORKER, self.get_geometry_bounds())
+        if context is None or len(bands) < 2:
+            return self.run()
+
+        try:
+            keys = self.run_bands(context, bands, worker_count)
+            # Band workers only send their cells back, so the hits are tested again when
+            # they are needed.
+            self.recorded_hits = None
+            return keys
+        except (BrokenProcessPool, OSError) as e:
+            QgsMessageLog.logMessage(
+                f"Parallel processing is not available ({e}), the grid is created in a single process.",
+                "Atlas Grid Generator",
+                Qgis.MessageLevel.Warning
+            )
+
+        self.predicate_counts = {"prepared": 0, "unprepared": 0}
+        self.prepared_geometry_count = 0
+        self.cells_visited = 0
+        self.report_progress(0)
+        return self.run()
+
+    def run_bands(self, context, bands, worker_count):
+        jobs = self.build_band_jobs(bands)
+        total_weight = sum(weight for _, weight in jobs)
+        done_weight = 0
+        band_results = []
+        cancel_event = context.Event()
+
+        with ProcessPoolExecutor(
+            max_workers=worker_count,
+            mp_context=context,
+            initializer=init_band_worker,
+            initargs=(cancel_event, QgsApplication.prefixPath())
+        ) as executor:
+            pending = {executor.submit(run_band, job): weight for job, weight in jobs}
+
+            while pending:
+                if self.is_cancelled():
+                    cancel_event.set()
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    return None
+
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    weight = pending.pop(future)
+                    first_row, keys, predicate_counts, prepared_geometry_count, cells_visited = future.result()
+                    if keys is None:
+                        cancel_event.set()
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        return None
+
+                    band_results.append((first_row, keys))
+                    self.predicate_counts["prepared"] += predicate_counts["prepared"]
+                    self.predicate_counts["unprepared"] += predicate_counts["unprepared"]
+                    self.prepared_geometry_count += prepared_geometry_count
+                    self.cells_visited += cells_visited
+
+                    done_weight += weight
+                    self.report_progress(int((done_weight / total_weight) * 100))
+
+        band_results.sort(key=lambda item: item[0])
+        hits = CellKeys()
+        for first_row, keys in band_results:
+            hits.extend(keys, row_offset=first_row)
+        return hits
@@ -0,0 +1,245 @@
+import os
+
+from osgeo import ogr
+
+from qgis.PyQt.QtCore import QMetaType
+
+from qgis.core import (
+    Qgis,
+    QgsField,
+    QgsFields,
+    QgsRelation,
+    QgsVectorLayer,
+    QgsVectorFileWriter
+)
+
+from .grid_core import NEIGHBOUR_OFFSETS
+
+
+class GridOutput:
+    FORMAT_MEMORY = "memory"
+    FORMAT_GEOPACKAGE = "GPKG"
+    FORMAT_FLATGEOBUF = "FlatGeobuf"
+
+    FILE_EXTENSIONS = {
+        FORMAT_GEOPACKAGE: ".gpkg",
+        FORMAT_FLATGEOBUF: ".fgb"
+    }
+
+    # Page extent in the processing CRS, which drives the map item of a generated atlas layout.
+    PAGE_EXTENT_FIELDS = ("page_xmin", "page_ymin", "page_xmax", "page_ymax")
+
+    # Many-to-many table between grid cells and the source features they intersect.
+    SOURCES_LAYER_SUFFIX = "_sources"
+
+    # Per-cell statistics of the intersecting source features.
+    COVERAGE_FIELDS = ("feature_count", "covered_area", "covered_length", "coverage")
+
+    def __init__(self, output_format, layer_name, crs, transform_context, path=None, pyramid=False,
+                 page_extents=False, neighbours=False, sources=False, coverage=False):
+        self.output_format = output_format
+        self.layer_name = layer_name
+        self.crs = crs
+        self.transform_context = transform_context
+        self.path = path
+        self.layer = None
+        self.sink = None
+        self.fields = self.create_fields(pyramid, page_extents, neighbours, coverage)
+        self.sources_layer = None
+        self.sources_sink = None
+        self.sources_fields = self.create_source_fields() if sources else None
+        self._writer = None
+        self._created_file = False
+
+    @staticmethod
+    def create_fields(pyramid=False, page_extents=False, neighbours=False, coverage=False):
+        fields = QgsFields()
+        fields.append(QgsField("grid", QMetaType.Type.QString))
+        fields.append(QgsField("serial", QMetaType.Type.Int))
+        if pyramid:
+            fields.append(QgsField("scale", QMetaType.Type.Int))
+            fields.append(QgsField("parent", QMetaType.Type.QString))
+        if page_extents:
+            for name in GridOutput.PAGE_EXTENT_FIELDS:
+                fields.append(QgsField(name, QMetaType.Type.Double))
+        if neighbours:
+            for name, _, _ in NEIGHBOUR_OFFSETS:
+                fields.append(QgsField(f"{name}_serial", QMetaType.Type.Int))
+                fields.append(QgsField(f"{name}_grid", QMetaType.Type.QString))
+        if coverage:
+            fields.append(QgsField("feature_count", QMetaType.Type.Int))
+            for name in GridOutput.COVERAGE_FIELDS[1:]:
+                fields.append(QgsField(name, QMetaType.Type.Double))
+        return fields
+
+    @staticmethod
+    def create_source_fields():
+        fields = QgsFields()
+        fields.append(QgsField("cell_serial", QMetaType.Type.Int))
+        fields.append(QgsField("source_fid", QMetaType.Type.LongLong))
+        return fields
+
+    def get_sources_layer_name(self):
+        return f"{self.layer_name}{self.SOURCES_LAYER_SUFFIX}"
+
+    @classmethod
+    def normalize_path(cls, path, output_format):
+        extension = cls.FILE_EXTENSIONS[output_format]
+        if not path.lower().endswith(extension):
+            path += extension
+        return path
+
+    def is_file_output(self):
+        return self.output_format != self.FORMAT_MEMORY
+
+    def open(self):
+        if not self.is_file_output():
+            self.layer = QgsVectorLayer(f"Polygon?crs={self.crs.authid()}", self.layer_name, "memory")
+            self.sink = self.layer.dataProvider()
+            self.sink.addAttributes(self.fields.toList())
+            self.layer.updateFields()
+            self.fields = self.layer.fields()
+            if self.sources_fields is not None:
+                self.sources_layer = QgsVectorLayer("None", self.get_sources_layer_name(), "memory")
+                self.sources_sink = self.sources_layer.dataProvider()
+                self.sources_sink.addAttributes(self.sources_fields.toList())
+                self.sources_layer.updateFields()
+                self.sources_fields = self.sources_layer.fields()
+            return None
+
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = self.output_format
+        options.layerName = self.layer_name
+        options.fileEncoding = "UTF-8"
+
+        if self.output_format == self.FORMAT_GEOPACKAGE and os.path.exists(self.path):
+            options.actionOnExistingFile = QgsVectorFileWriter.ActionOnExistingFile.CreateOrOverwriteLayer
+        else:
+            options.actionOnExistingFile = QgsVectorFileWriter.ActionOnExistingFile.CreateOrOverwriteFile
+            self._created_file = True
+
+        # The GeoPackage R-tree is built once after all cells are written instead of being
+        # maintained by triggers on every insert. FlatGeobuf builds its index on close.
+        if self.output_format == self.FORMAT_GEOPACKAGE:
+            options.layerOptions = ["SPATIAL_INDEX=NO"]
+        else:
+            options.layerOptions = ["SPATIAL_INDEX=YES"]
+
+        writer = QgsVectorFileWriter.create(
+            self.path,
+            self.fields,
+            Qgis.WkbType.Polygon,
+            self.crs,
+            self.transform_context,
+            options
+        )
+        if writer.hasError() != QgsVectorFileWriter.WriterError.NoError:
+            return writer.errorMessage()
+
+        if self.output_format == self.FORMAT_FLATGEOBUF:
+            # FlatGeobuf files cannot be reopened for appending, so cells are streamed
+            # through the writer until finish() closes it.
+            self._writer = writer
+            self.sink = writer
+            return None
+
+        del writer
+
+        # GeoPackage cells go through the OGR provider, which wraps every addFeatures
+        # call, i.e. every written batch, in a single transaction.
+        self.layer = QgsVectorLayer(f"{self.path}|layername={self.layer_name}", self.layer_name, "ogr")
+        if not self.layer.isValid():
+            return f"Unable to open {self.path}"
+
+        self.sink = self.layer.dataProvider()
+        self.fields = self.layer.fields()
+        if self.sources_fields is not None:
+            return self.open_sources_table()
+        return None
+
+    def open_sources_table(self):
+        # The relation table lives as a plain attribute table in the same GeoPackage.
+        layer_name = self.get_sources_layer_name()
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = self.output_format
+        options.layerName = layer_name
+        options.fileEncoding = "UTF-8"
+        options.actionOnExistingFile = QgsVectorFileWriter.ActionOnExistingFile.CreateOrOverwriteLayer
+
+        writer = QgsVectorFileWriter.create(
+            self.path,
+            self.sources_fields,
+            Qgis.WkbType.NoGeometry,
+            self.crs,
+            self.transform_context,
+            options
+        )
+        if writer.hasError() != QgsVectorFileWriter.WriterError.NoError:
+            return writer.errorMessage()
+        del writer
+
+        self.sources_layer = QgsVectorLayer(f"{self.path}|layername={layer_name}", layer_name, "ogr")
+        if not self.sources_layer.isValid():
+            return f"Unable to open {self.path}|layername={layer_name}"
+
+        self.sources_sink = self.sources_layer.dataProvider()
+        self.sources_fields = self.sources_layer.fields()
+        return None
+
+    def finish(self):
+        if self.output_format == self.FORMAT_FLATGEOBUF:
+            self.sink = None
+            del self._writer
+            self._writer = None
+            self.layer = QgsVectorLayer(self.path, self.layer_name, "ogr")
+        elif self.output_format == self.FORMAT_GEOPACKAGE:
+            self.sink.createSpatialIndex()
+
+        self.sink = None
+        self.sources_sink = None
+        self.layer.updateExtents()
+        return self.layer
+
+    def add_sources_relation(self, project):
+        # Both layers must already be part of the project.
+        relation = QgsRelation()
+        relation.setId(f"{self.layer.id()}{self.SOURCES_LAYER_SUFFIX}")
+        relation.setName(self.get_sources_layer_name())
+        relation.setReferencingLayer(self.sources_layer.id())
+        relation.setReferencedLayer(self.layer.id())
+        relation.addFieldPair("cell_serial", "serial")
+        if not relation.isValid():
+            return None
+
+        project.relationManager().addRelation(relation)
+        return relation
+
+    def discard(self):
+        # Removes what open() created, so a failed or cancelled run leaves nothing behind
+        # that looks like a finished grid.
+        self.sink = None
+        self.sources_sink = None
+        self._writer = None
+        self.layer = None
+        self.sources_layer = None
+        if not self.is_file_output() or self.path is None:
+            return
+
+        if self._created_file:
+            for path in (self.path, f"{self.path}-wal", f"{self.path}-shm"):
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError:
+                    pass
+            return
+
+        # An existing GeoPackage only loses the layers of this run.
+        dataset = ogr.Open(self.path, 1)
+        if dataset is None:
+            return
+        layer_names = {self.layer_name, self.get_sources_layer_name()}
+        for index in reversed(range(dataset.GetLayerCount())):
+            if dataset.GetLayerByIndex(index).GetName() in layer_names:
+                dataset.DeleteLayer(index)
+        dataset = None
@@ -0,0 +1,271 @@
+import math
+
+from qgis.PyQt.QtCore import QObject, QTimer
+
+from qgis.core import (
+    Qgis,
+    QgsProject,
+    QgsRectangle,
+    QgsGeometry,
+    QgsFeatureRequest,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsMessageLog
+)
+
+from .grid_engine import GridEngine, SourceGeometries
+from .grid_core import GridLattice, CellKeys
+
+
+class LiveGridUpdater(QObject):
+    PROPERTY_PREFIX = "atlas_gittergenerator/"
+    DEBOUNCE_MS = 500
+
+    def __init__(self, grid_layer, source_layer, builder):
+        super().__init__(grid_layer)
+        self.grid_layer = grid_layer
+        self.source_layer = source_layer
+        self.builder = builder
+
+        self.origin_x = float(self.get_property(grid_layer, "origin_x"))
+        self.origin_y = float(self.get_property(grid_layer, "origin_y"))
+        self.grid_width = float(self.get_property(grid_layer, "grid_width"))
+        self.grid_height = float(self.get_property(grid_layer, "grid_height"))
+        self.top_row = int(self.get_property(grid_layer, "top_row"))
+        processing_crs = QgsCoordinateReferenceSystem(self.get_property(grid_layer, "processing_crs"))
+
+        transform_context = QgsProject.instance().transformContext()
+        source_crs = source_layer.crs()
+        self.to_processing = None
+        self.to_source = None
+        if source_crs.authid() != processing_crs.authid():
+            self.to_processing = QgsCoordinateTransform(source_crs, processing_crs, transform_context)
+            self.to_source = QgsCoordinateTransform(processing_crs, source_crs, transform_context)
+
+        # Only used for cell rectangles and coordinates; indices may lie outside the
+        # originally generated rows and columns.
+        self.lattice = GridLattice(self.grid_width, self.grid_height, self.origin_x, self.origin_y, 1, 1)
+
+        self.feature_bboxes = {}
+        self.cell_fids = {}
+        self.next_serial = 1
+        self.dirty_rects = []
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.apply_updates)
+
+    @classmethod
+    def get_property(cls, layer, name):
+        return layer.customProperty(cls.PROPERTY_PREFIX + name)
+
+    @classmethod
+    def is_live_grid(cls, layer):
+        return str(cls.get_property(layer, "live") or "") == "true"
+
+    @classmethod
+    def store_parameters(cls, grid_layer, source_layer, processing_crs, origin_x, origin_y,
+                         grid_width, grid_height, top_row):
+        values = {
+            "live": "true",
+            "source_layer": source_layer.id(),
+            "processing_crs": processing_crs.authid(),
+            "origin_x": repr(origin_x),
+            "origin_y": repr(origin_y),
+            "grid_width": repr(grid_width),
+            "grid_height": repr(grid_height),
+            "top_row": str(top_row)
+        }
+        for name, value in values.items():
+            grid_layer.setCustomProperty(cls.PROPERTY_PREFIX + name, value)
+
+    def start(self):
+        self.rebuild_feature_bboxes()
+        self.rebuild_cell_index()
+
+        self.source_layer.featureAdded.connect(self.on_feature_added)
+        self.source_layer.featureDeleted.connect(self.on_feature_deleted)
+        self.source_layer.geometryChanged.connect(self.on_geometry_changed)
+        self.source_layer.afterCommitChanges.connect(self.rebuild_feature_bboxes)
+
+    def stop(self):
+        self.timer.stop()
+        try:
+            self.source_layer.featureAdded.disconnect(self.on_feature_added)
+            self.source_layer.featureDeleted.disconnect(self.on_feature_deleted)
+            self.source_layer.geometryChanged.disconnect(self.on_geometry_changed)
+            self.source_layer.afterCommitChanges.disconnect(self.rebuild_feature_bboxes)
+        except (TypeError, RuntimeError):
+            pass
+
+    def to_processing_geometry(self, geom):
+        if geom is None or geom.isEmpty():
+            return None
+        if self.to_processing is not None:
+            geom.transform(self.to_processing)
+        return geom
+
+    def rebuild_feature_bboxes(self):
+        # Deleted features cannot be fetched anymore, so their old extent is kept here.
+        # Committing new features assigns new ids, which is why this runs after commits.
+        request = QgsFeatureRequest()
+        request.setNoAttributes()
+
+        self.feature_bboxes = {}
+        for feature in self.source_layer.getFeatures(request):
+            geom = self.to_processing_geometry(feature.geometry())
+            if geom is not None:
+                self.feature_bboxes[feature.id()] = geom.boundingBox()
+
+    def get_cell_key(self, geom):
+        center = geom.boundingBox().center()
+        if self.to_processing is not None:
+            center = self.to_processing.transform(center)
+        return (
+            math.floor((center.y() - self.origin_y) / self.grid_height),
+            math.floor((center.x() - self.origin_x) / self.grid_width)
+        )
+
+    def index_cells(self, request=None):
+        max_serial = 0
+        for feature in self.grid_layer.getFeatures(request or QgsFeatureRequest()):
+            geom = feature.geometry()
+            if geom is None or geom.isEmpty():
+                continue
+            self.cell_fids[self.get_cell_key(geom)] = feature.id()
+            serial = feature["serial"]
+            if isinstance(serial, int):
+                max_serial = max(max_serial, serial)
+        return max_serial
+
+    def rebuild_cell_index(self):
+        self.cell_fids = {}
+        self.next_serial = self.index_cells() + 1
+
+    def mark_dirty(self, bbox):
+        if bbox is not None and not bbox.isNull():
+            self.dirty_rects.append(QgsRectangle(bbox))
+            self.timer.start()
+
+    def fetch_processing_geometry(self, fid):
+        request = QgsFeatureRequest(fid)
+        request.setNoAttributes()
+        for feature in self.source_layer.getFeatures(request):
+            return self.to_processing_geometry(feature.geometry())
+        return None
+
+    def on_feature_added(self, fid):
+        geom = self.fetch_processing_geometry(fid)
+        if geom is not None:
+            self.feature_bboxes[fid] = geom.boundingBox()
+            self.mark_dirty(self.feature_bboxes[fid])
+
+    def on_feature_deleted(self, fid):
+        self.mark_dirty(self.feature_bboxes.pop(fid, None))
+
+    def on_geometry_changed(self, fid, geometry):
+        self.mark_dirty(self.feature_bboxes.pop(fid, None))
+        geom = self.to_processing_geometry(QgsGeometry(geometry))
+        if geom is not None:
+            self.feature_bboxes[fid] = geom.boundingBox()
+            self.mark_dirty(self.feature_bboxes[fid])
+
+    def get_cell_block(self, bbox):
+        first_row = math.ceil((bbox.yMinimum() - self.origin_y) / self.grid_height - GridLattice.RANGE_EPSILON) - 1
+        last_row = math.floor((bbox.yMaximum() - self.origin_y) / self.grid_height + GridLattice.RANGE_EPSILON)
+        first_col = math.ceil((bbox.xMinimum() - self.origin_x) / self.grid_width - GridLattice.RANGE_EPSILON) - 1
+        last_col = math.floor((bbox.xMaximum() - self.origin_x) / self.grid_width + GridLattice.RANGE_EPSILON)
+        return first_row, last_row, first_col, last_col
+
+    def find_block_hits(self, first_row, last_row, first_col, last_col):
+        block_xmin = self.origin_x + first_col * self.grid_width
+        block_ymin = self.origin_y + first_row * self.grid_height
+        block_rect = QgsRectangle(
+            block_xmin,
+            block_ymin,
+            block_xmin + (last_col - first_col + 1) * self.grid_width,
+            block_ymin + (last_row - first_row + 1) * self.grid_height
+        )
+
+        request = QgsFeatureRequest()
+        request.setNoAttributes()
+        if self.to_source is not None:
+            request.setFilterRect(self.to_source.transformBoundingBox(block_rect))
+        else:
+            request.setFilterRect(block_rect)
+
+        source = SourceGeometries()
+        source.add_features(self.source_layer.getFeatures(request), to_processing=self.to_processing)
+        if source.is_empty():
+            return set()
+
+        # The scan mode only tests the block's own cells, which keeps geometries that
+        # extend beyond the block from being clipped into its edge cells.
+        engine = GridEngine(
+            source,
+            self.grid_width,
+            self.grid_height,
+            block_xmin,
+            block_ymin,
+            last_col - first_col + 1,
+            last_row - first_row + 1,
+            enumeration_mode=GridEngine.ENUMERATION_SCAN
+        )
+        return {(row_index + first_row, col_index + first_col) for row_index, col_index in engine.run()}
+
+    def apply_updates(self):
+        dirty_rects = self.dirty_rects
+        self.dirty_rects = []
+        if not dirty_rects or not self.source_layer.isValid():
+            return
+
+        affected = set()
+        hits = set()
+        for bbox in dirty_rects:
+            block = self.get_cell_block(bbox)
+            first_row, last_row, first_col, last_col = block
+            affected.update(
+                (row_index, col_index)
+                for row_index in range(first_row, last_row + 1)
+                for col_index in range(first_col, last_col + 1)
+            )
+            hits.update(self.find_block_hits(*block))
+
+        removed = [key for key in affected if key in self.cell_fids and key not in hits]
+        added = CellKeys.from_keys(sorted(key for key in hits if key not in self.cell_fids))
+        if not removed and not added:
+            return
+
+        provider = self.grid_layer.dataProvider()
+        if removed:
+            provider.deleteFeatures([self.cell_fids.pop(key) for key in removed])
+
+        if added:
+            self.builder.add_grid_features(
+                lattice=self.lattice,
+                keys=list(self.lattice.iter_top_down(added)),
+                fields=self.grid_layer.fields(),
+                sink=provider,
+                to_source_transform=self.to_source,
+                first_serial=self.next_serial,
+                top_row=self.top_row
+            )
+            self.next_serial += len(added)
+
+            # Pick up the ids of the new cells without rereading the whole grid.
+            added_rect = QgsRectangle()
+            for key in added:
+                added_rect.combineExtentWith(QgsRectangle(*self.lattice.get_cell_bounds(*key)))
+            if self.to_source is not None:
+                added_rect = self.to_source.transformBoundingBox(added_rect)
+            self.index_cells(QgsFeatureRequest(added_rect))
+
+        self.grid_layer.updateExtents()
+        self.grid_layer.triggerRepaint()
+
+        QgsMessageLog.logMessage(
+            f"Live grid '{self.grid_layer.name()}': {len(added)} cells added, {len(removed)} cells removed.",
+            "Atlas Grid Generator",
+            Qgis.MessageLevel.Info
+        )
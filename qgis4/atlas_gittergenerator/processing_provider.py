@@ -0,0 +1,25 @@
+import os
+
+from qgis.PyQt.QtGui import QIcon
+
+from qgis.core import QgsProcessingProvider
+
+from .generate_grid_algorithm import GenerateGridAlgorithm, clear_source_cache
+from .grid_builder import GridBuilder
+
+
+class AtlasGridProvider(QgsProcessingProvider):
+    def loadAlgorithms(self):
+        self.addAlgorithm(GenerateGridAlgorithm())
+
+    def unload(self):
+        clear_source_cache()
+
+    def id(self):
+        return "atlasgridgenerator"
+
+    def name(self):
+        return GridBuilder().tr("Atlas Grid Generator", "Atlas-Gittergenerator")
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), "icon.png"))
@@ -0,0 +1,102 @@
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from qgis.core import Qgis, QgsMessageLog
+
+
+class RunStats:
+    # tracemalloc is process-wide, so queued and parallel runs share one tracer. It runs
+    # while any run traces memory, and the peak covers every job in the process.
+    _tracing_runs = 0
+    _started_tracing = False
+    _tracing_lock = threading.Lock()
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.timings = {}
+        self.counters = {}
+        self.info = {}
+        self.peak_memory = None
+        self._lock = threading.Lock()
+        self._tracing = False
+        self._start_time = None
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        if not self.trace_memory or self._tracing:
+            return
+
+        with RunStats._tracing_lock:
+            if RunStats._tracing_runs == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                RunStats._started_tracing = True
+            RunStats._tracing_runs += 1
+        self._tracing = True
+
+    def stop(self):
+        if self._start_time is not None:
+            self.add_time("total", time.perf_counter() - self._start_time)
+            self._start_time = None
+
+        if not self._tracing:
+            return
+
+        with RunStats._tracing_lock:
+            if tracemalloc.is_tracing():
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+            RunStats._tracing_runs -= 1
+            if RunStats._tracing_runs == 0 and RunStats._started_tracing:
+                tracemalloc.stop()
+                RunStats._started_tracing = False
+        self._tracing = False
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def add_count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_info(self, name, value):
+        self.info[name] = value
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_engine(self, engine):
+        self.add_count("cells_visited", engine.cells_visited)
+        self.add_count("predicate_calls_prepared", engine.predicate_counts["prepared"])
+        self.add_count("predicate_calls_unprepared", engine.predicate_counts["unprepared"])
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "info": dict(self.info),
+                "timings_s": {name: round(seconds, 6) for name, seconds in self.timings.items()},
+                "counters": dict(self.counters),
+                "peak_python_memory_process_bytes": self.peak_memory
+            }
+
+    def log(self):
+        data = self.as_dict()
+        timings = ", ".join(f"{name} {seconds:.3f} s" for name, seconds in data["timings_s"].items())
+        counters = ", ".join(f"{name} {value}" for name, value in data["counters"].items())
+        outcome = data["info"].get("outcome")
+        message = f"Run statistics ({outcome}): {timings}; {counters}" if outcome else f"Run statistics: {timings}; {counters}"
+        if self.peak_memory is not None:
+            message += f"; peak Python memory of the process {self.peak_memory / (1024 * 1024):.1f} MB"
+
+        QgsMessageLog.logMessage(message, "Atlas Grid Generator", Qgis.MessageLevel.Info)
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
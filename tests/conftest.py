@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The package __init__ only imports QGIS inside classFactory, so grid_core loads without it.
+sys.path.insert(0, os.path.join(ROOT, "qgis4"))
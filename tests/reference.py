@@ -0,0 +1,145 @@
+import math
+import random
+
+from atlas_gittergenerator.grid_core import GridLattice
+
+
+# Brute-force references the grid engines are checked against. Geometries are
+# (bbox, parts, exact) tuples: parts holds the rings of every polygon part, or None for
+# points and axis-aligned rectangles, which coincide with their bounding box.
+
+def make_star(random_state, center_x, center_y, radius, vertex_count=9):
+    ring = []
+    for i in range(vertex_count):
+        angle = 2 * math.pi * i / vertex_count
+        r = radius * random_state.uniform(0.45, 1.0)
+        ring.append((center_x + r * math.cos(angle), center_y + r * math.sin(angle)))
+    ring.append(ring[0])
+    return ring
+
+
+def make_hole(center_x, center_y, size):
+    ring = [
+        (center_x - size, center_y - size),
+        (center_x - size, center_y + size),
+        (center_x + size, center_y + size),
+        (center_x + size, center_y - size)
+    ]
+    ring.append(ring[0])
+    return ring
+
+
+def point_in_rings(x, y, rings):
+    inside = False
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+
+def segments_intersect(p1, p2, p3, p4):
+    def orientation(a, b, c):
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+    def on_segment(a, b, c):
+        return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+    d1 = orientation(p3, p4, p1)
+    d2 = orientation(p3, p4, p2)
+    d3 = orientation(p1, p2, p3)
+    d4 = orientation(p1, p2, p4)
+    if ((d1 > 0) != (d2 > 0)) and d1 != 0 and d2 != 0 and ((d3 > 0) != (d4 > 0)) and d3 != 0 and d4 != 0:
+        return True
+    return (
+        (d1 == 0 and on_segment(p3, p4, p1))
+        or (d2 == 0 and on_segment(p3, p4, p2))
+        or (d3 == 0 and on_segment(p1, p2, p3))
+        or (d4 == 0 and on_segment(p1, p2, p4))
+    )
+
+
+def part_intersects_box(rings, box):
+    xmin, ymin, xmax, ymax = box
+    corners = [(xmin, ymin), (xmin, ymax), (xmax, ymax), (xmax, ymin), (xmin, ymin)]
+    for ring in rings:
+        for x, y in ring:
+            if xmin <= x <= xmax and ymin <= y <= ymax:
+                return True
+    if any(point_in_rings(x, y, rings) for x, y in corners[:-1]):
+        return True
+    for ring in rings:
+        for a, b in zip(ring, ring[1:]):
+            for c, d in zip(corners, corners[1:]):
+                if segments_intersect(a, b, c, d):
+                    return True
+    return False
+
+
+def box_intersects_box(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def get_reference_hits(lattice, geometries):
+    # Brute force over every cell: bounding box test first, then the exact test.
+    hits = []
+    for row_index in range(lattice.get_row_count()):
+        for col_index in range(lattice.get_column_count()):
+            cell = lattice.get_cell_bounds(row_index, col_index)
+            for bbox, parts in geometries:
+                if not box_intersects_box(bbox, cell):
+                    continue
+                if parts is None or any(part_intersects_box(rings, cell) for rings in parts):
+                    hits.append((row_index, col_index))
+                    break
+    return hits
+
+
+def get_bounds(parts):
+    xs = [x for rings in parts for ring in rings for x, _ in ring]
+    ys = [y for rings in parts for ring in rings for _, y in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def make_geometries(seed):
+    # Polygons with holes go through the scanline path, points and rectangles are exact.
+    random_state = random.Random(seed)
+    geometries = []
+    for _ in range(4):
+        center_x = random_state.uniform(3.1, 16.9)
+        center_y = random_state.uniform(3.1, 12.9)
+        parts = [[make_star(random_state, center_x, center_y, random_state.uniform(1.3, 3.7))]]
+        if random_state.random() < 0.5:
+            parts[0].append(make_hole(center_x, center_y, 0.37))
+        geometries.append((get_bounds(parts), parts, False))
+    for _ in range(3):
+        x = random_state.uniform(0.1, 19.9)
+        y = random_state.uniform(0.1, 15.9)
+        width = random_state.uniform(0.2, 3.3)
+        height = random_state.uniform(0.2, 2.7)
+        geometries.append(((x, y, min(x + width, 19.95), min(y + height, 15.95)), None, True))
+    for _ in range(3):
+        x = random_state.uniform(0.1, 19.9)
+        y = random_state.uniform(0.1, 15.9)
+        geometries.append(((x, y, x, y), None, True))
+    return geometries
+
+
+def enumerate_geometries(lattice, geometries):
+    bounds = [bbox for bbox, _, _ in geometries]
+    exact = [is_exact for _, _, is_exact in geometries]
+    rings = {geom_id: parts for geom_id, (_, parts, _) in enumerate(geometries) if parts is not None}
+
+    def intersects_cell(row_index, col_index):
+        cell = lattice.get_cell_bounds(row_index, col_index)
+        return any(
+            box_intersects_box(bbox, cell)
+            and (parts is None or any(part_intersects_box(part, cell) for part in parts))
+            for bbox, parts, _ in geometries
+        )
+
+    return lattice.enumerate_lattice(bounds, exact, rings, intersects_cell), intersects_cell
+
+
+def make_lattice():
+    return GridLattice(1.0, 1.0, 0.0, 0.0, 20, 16)
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("qgis")
+
+from atlas_gittergenerator import atlas_layout
+from atlas_gittergenerator.atlas_layout import AtlasExportTask
+
+
+# Stand-in for atlas_export_worker.py: finishes all but its last page, leaves that one
+# half written and then sleeps or fails.
+FAKE_WORKER = """
+import os, sys, time
+output_dir, first_page, last_page, mode = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+for page_index in range(first_page, last_page):
+    open(os.path.join(output_dir, f"page_{page_index + 1:05d}.png"), "wb").close()
+open(os.path.join(output_dir, f"page_{last_page + 1:05d}.part.png"), "wb").close()
+if mode == "fail":
+    sys.exit("page could not be exported")
+time.sleep(30)
+"""
+
+
+def make_task(tmp_path, monkeypatch, modes):
+    task = AtlasExportTask("export", "project.qgz", "layout", str(tmp_path), atlas_layout.FORMAT_PNG, 4, 2)
+    task.POLL_INTERVAL = 0.05
+    processes = []
+
+    def start_workers(executable):
+        workers = []
+        for (first_page, last_page), mode in zip(atlas_layout.split_page_range(4, 2), modes):
+            log_file = tempfile.TemporaryFile()
+            process = subprocess.Popen(
+                [executable, "-c", FAKE_WORKER, str(tmp_path), str(first_page), str(last_page), mode],
+                stdout=subprocess.DEVNULL,
+                stderr=log_file
+            )
+            processes.append(process)
+            workers.append((process, log_file))
+        return workers
+
+    monkeypatch.setattr(atlas_layout, "get_python_executable", lambda: sys.executable)
+    monkeypatch.setattr(task, "start_workers", start_workers)
+    return task, processes
+
+
+def test_split_page_range():
+    assert atlas_layout.split_page_range(10, 3) == [(0, 2), (3, 5), (6, 9)]
+    assert atlas_layout.split_page_range(2, 8) == [(0, 0), (1, 1)]
+
+
+def test_failed_worker_stops_the_others(tmp_path, monkeypatch):
+    task, processes = make_task(tmp_path, monkeypatch, ["fail", "sleep"])
+    start = time.perf_counter()
+
+    assert not task.run()
+    assert time.perf_counter() - start < 10
+    assert task.error == "page could not be exported"
+    assert all(process.returncode is not None for process in processes)
+    assert os.listdir(tmp_path) == []
+
+
+def test_cancel_removes_partial_pages(tmp_path, monkeypatch):
+    task, processes = make_task(tmp_path, monkeypatch, ["sleep", "sleep"])
+    timer = threading.Timer(1.0, task.cancel)
+    timer.start()
+    try:
+        assert not task.run()
+    finally:
+        timer.cancel()
+
+    assert task.error is None
+    assert all(process.returncode is not None for process in processes)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,27 @@
+import pytest
+
+from atlas_gittergenerator.grid_core import CellKeys
+
+from reference import make_lattice
+
+
+def test_cell_keys():
+    keys = CellKeys.from_keys([(0, 1), (0, 3), (2, 0)])
+    assert len(keys) == 3
+    assert list(keys) == [(0, 1), (0, 3), (2, 0)]
+    assert keys[1] == (0, 3)
+    assert list(keys[1:]) == [(0, 3), (2, 0)]
+
+    keys.extend(CellKeys.from_keys([(0, 5), (1, 2)]), row_offset=4)
+    assert list(keys) == [(0, 1), (0, 3), (2, 0), (4, 5), (5, 2)]
+
+
+def test_cell_keys_from_numpy():
+    np = pytest.importorskip("numpy")
+    keys = CellKeys.from_numpy(np.array([0, 1, 1], dtype=np.int64), np.array([2, 0, 4], dtype=np.int64))
+    assert list(keys) == [(0, 2), (1, 0), (1, 4)]
+
+
+def test_cell_keys_top_down_order():
+    keys = CellKeys.from_keys([(0, 1), (0, 3), (2, 0), (2, 5)])
+    assert list(make_lattice().iter_top_down(keys)) == [(2, 0), (2, 5), (0, 1), (0, 3)]
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+pytest.importorskip("qgis")
+
+from atlas_gittergenerator.grid_cache import GridCache
+from atlas_gittergenerator.grid_core import CellKeys, GridLattice
+
+
+def make_key(cache, source_crs="EPSG:25832", orientation="portrait"):
+    fingerprint = cache.create_fingerprint()
+    fingerprint.update(b"layer")
+    return cache.make_key(fingerprint, source_crs, "EPSG:25832", 25000, 210.0, 297.0, orientation, 10.0)
+
+
+def test_round_trip(tmp_path):
+    cache = GridCache(str(tmp_path), 1024 * 1024)
+    lattice = GridLattice(250.0, 125.0, 1000.5, -20.25, 20, 16)
+    keys = CellKeys.from_keys([(0, 0), (3, 7), (15, 19)])
+    key = make_key(cache)
+
+    assert cache.load(key) is None
+    cache.store(key, lattice, keys)
+    entry = cache.load(key)
+
+    assert list(entry.pop("keys")) == list(keys)
+    assert entry == {
+        "xmin": 1000.5,
+        "ymin": -20.25,
+        "grid_width": 250.0,
+        "grid_height": 125.0,
+        "column_count": 20,
+        "row_count": 16
+    }
+
+
+def test_key_depends_on_parameters(tmp_path):
+    cache = GridCache(str(tmp_path), 1024 * 1024)
+
+    assert make_key(cache) == make_key(cache)
+    assert make_key(cache) != make_key(cache, orientation="landscape")
+    # Identical coordinates in two geographic CRSs share the processing CRS but not the cells.
+    assert make_key(cache, source_crs="EPSG:4326") != make_key(cache, source_crs="EPSG:4258")
+
+
+def test_eviction_keeps_newest_entries(tmp_path):
+    lattice = GridLattice(1.0, 1.0, 0.0, 0.0, 100, 100)
+    keys = CellKeys.from_keys((row_index, col_index) for row_index in range(10) for col_index in range(10))
+    entry_size = GridCache.HEADER.size + 8 * len(keys)
+    cache = GridCache(str(tmp_path), 2 * entry_size)
+
+    for index in range(3):
+        path = cache.get_path(f"entry{index}")
+        cache.store(f"entry{index}", lattice, keys)
+        os.utime(path, (index, index))
+
+    cache.evict()
+    assert cache.load("entry0") is None
+    assert list(cache.load("entry2")["keys"]) == list(keys)
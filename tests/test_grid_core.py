@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from atlas_gittergenerator import grid_core
+
+from conftest import ROOT
+
+
+def test_grid_core_copies_are_identical():
+    paths = [
+        os.path.join(ROOT, plugin, "atlas_gittergenerator", "grid_core.py")
+        for plugin in ("qgis3", "qgis4")
+    ]
+    with open(paths[0], "rb") as f3, open(paths[1], "rb") as f4:
+        assert f3.read() == f4.read()
+
+
+def test_cell_labels():
+    assert [grid_core.get_column_label(index) for index in (1, 26, 27, 52, 703)] == ["A", "Z", "AA", "AZ", "AAA"]
+    assert grid_core.get_cell_label(2, 3) == "B3"
+    assert grid_core.get_cell_label(0, 3) is None
+
+
+def test_output_layer_name_counts_up():
+    name = grid_core.build_output_layer_name("Roads: main", 5000, "landscape", "A3", False, [])
+    assert name == "Gitter_1:5000_landscape_A3_layer_Roads__main_01"
+    assert grid_core.build_output_layer_name(
+        "Roads: main", 5000, "landscape", "A3", False, [name]
+    ) == "Gitter_1:5000_landscape_A3_layer_Roads__main_02"
+
+
+def test_output_layer_name_replaced_chars():
+    assert grid_core.build_output_layer_name("a/b", 1000, "portrait", "A4", True, []) == \
+        "Gitter_1:1000_portrait_A4_selected_a_b_01"
+    # The QGIS 3 plugin keeps slashes, as it always did.
+    assert grid_core.build_output_layer_name("a/b", 1000, "portrait", "A4", True, [], replaced_chars=(" ", ":")) == \
+        "Gitter_1:1000_portrait_A4_selected_a/b_01"
+
+
+def test_grid_dimensions():
+    assert grid_core.get_grid_dimensions_mm("landscape", "A4") == (297, 210)
+    assert grid_core.get_grid_dimensions_mm("portrait", "A4") == (210, 297)
+    assert grid_core.get_ground_size(297, 1000) == pytest.approx(297.0)
@@ -0,0 +1,195 @@
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+pytest.importorskip("qgis")
+
+from qgis.core import QgsGeometry, QgsRectangle
+
+from atlas_gittergenerator import grid_engine
+from atlas_gittergenerator.grid_core import CellKeys
+from atlas_gittergenerator.grid_engine import GridEngine, SourceGeometries
+
+from reference import get_reference_hits, make_geometries
+
+
+def to_geometry(bbox, parts):
+    if parts is None:
+        if bbox[0] == bbox[2] and bbox[1] == bbox[3]:
+            return QgsGeometry.fromWkt(f"POINT({bbox[0]!r} {bbox[1]!r})")
+        return QgsGeometry.fromRect(QgsRectangle(*bbox))
+
+    polygons = ", ".join(
+        "(" + ", ".join("(" + ", ".join(f"{x!r} {y!r}" for x, y in ring) + ")" for ring in rings) + ")"
+        for rings in parts
+    )
+    return QgsGeometry.fromWkt(f"MULTIPOLYGON({polygons})")
+
+
+def make_source(geometries):
+    source = SourceGeometries()
+    for feature_id, (bbox, parts, _) in enumerate(geometries):
+        source.add_geometry(to_geometry(bbox, parts), feature_id)
+    return source
+
+
+def make_engine(source, **kwargs):
+    return GridEngine(source, 1.0, 1.0, 0.0, 0.0, 20, 16, **kwargs)
+
+
+def get_naive_hits(engine):
+    # The original cell loop: every cell of the extent against every geometry.
+    return [
+        (row_index, col_index)
+        for row_index in range(engine.get_row_count())
+        for col_index in range(engine.get_column_count())
+        if any(
+            geom.intersects(QgsGeometry.fromRect(engine.get_cell_rect(row_index, col_index)))
+            for geom in engine.geometries
+        )
+    ]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_spatial_index_scan_matches_naive_loop(seed):
+    geometries = make_geometries(seed)
+    engine = make_engine(make_source(geometries), enumeration_mode=GridEngine.ENUMERATION_SCAN)
+    keys = engine.run()
+
+    assert list(keys) == get_naive_hits(engine)
+    assert list(keys) == get_reference_hits(engine, [(bbox, parts) for bbox, parts, _ in geometries])
+    # The index limits the exact tests to geometries whose bounding box touches the cell.
+    assert sum(engine.predicate_counts.values()) < engine.cells_visited * len(geometries)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_feature_enumeration_matches_scan(seed):
+    source = make_source(make_geometries(seed))
+    scan_keys = make_engine(source, enumeration_mode=GridEngine.ENUMERATION_SCAN).run()
+    engine = make_engine(source, enumeration_mode=GridEngine.ENUMERATION_FEATURES)
+
+    assert list(engine.run()) == list(scan_keys)
+    # Only cells inside the bounding boxes are visited, not the whole extent.
+    assert engine.cells_visited < engine.get_row_count() * engine.get_column_count()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_lattice_enumeration_matches_scan(seed):
+    pytest.importorskip("numpy")
+    source = make_source(make_geometries(seed))
+    scan_keys = make_engine(source, enumeration_mode=GridEngine.ENUMERATION_SCAN).run()
+
+    assert list(make_engine(source, enumeration_mode=GridEngine.ENUMERATION_LATTICE).run()) == list(scan_keys)
+
+
+def test_feature_enumeration_fills_overlapping_parts():
+    # Large enough for the scanline fill; the overlap must not cancel out.
+    parts = [
+        [[(1.5, 1.5), (1.5, 9.5), (9.5, 9.5), (9.5, 1.5), (1.5, 1.5)]],
+        [[(4.5, 4.5), (4.5, 13.5), (13.5, 13.5), (13.5, 4.5), (4.5, 4.5)]]
+    ]
+    source = SourceGeometries()
+    source.add_geometry(to_geometry(None, parts))
+    engine = make_engine(source, enumeration_mode=GridEngine.ENUMERATION_FEATURES)
+
+    assert engine.get_scanline_rings(engine.geometries[0], engine.geometries[0].boundingBox()) is not None
+    assert list(engine.run()) == get_reference_hits(engine, [((1.5, 1.5, 13.5, 13.5), parts)])
+
+
+def test_band_jobs_merge_matches_single_run():
+    source = make_source(make_geometries(4))
+    engine = make_engine(source)
+    bands = engine.split_row_bands(5, engine.get_geometry_bounds())
+    assert len(bands) > 1
+
+    merged = CellKeys()
+    for job, _ in engine.build_band_jobs(bands):
+        first_row, keys, _, _, _ = grid_engine.run_band(job)
+        merged.extend(keys, row_offset=first_row)
+
+    assert list(merged) == list(make_engine(source).run())
+
+
+def test_parallel_run_falls_back_to_serial(monkeypatch):
+    source = make_source(make_geometries(5))
+    engine = make_engine(source)
+
+    def broken_pool(context, bands, worker_count):
+        raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(grid_engine, "get_process_context", lambda: object())
+    monkeypatch.setattr(engine, "run_bands", broken_pool)
+
+    assert list(engine.run_parallel(4)) == list(make_engine(source).run())
+
+
+def test_finer_level_within_parent_hits_matches_full_run():
+    source = make_source(make_geometries(6))
+    parent = make_engine(source)
+    parent_keys = parent.run()
+    child = GridEngine(source, 0.5, 0.5, 0.0, 0.0, 40, 32)
+
+    assert list(child.run_within(parent, parent_keys)) == list(GridEngine(source, 0.5, 0.5, 0.0, 0.0, 40, 32).run())
+
+
+def test_quadtree_children_match_full_child_run():
+    source = make_source(make_geometries(8))
+    parent = make_engine(source)
+    child = parent.get_child_engine()
+
+    assert (child.grid_width, child.get_column_count()) == (0.5, 40)
+    assert list(child.run_children(parent.run())) == list(parent.get_child_engine().run())
+
+
+def test_cell_load_counts_features():
+    geometries = make_geometries(9)
+    engine = make_engine(make_source(geometries))
+    keys = engine.run()
+    load = engine.measure_cell_load(keys)
+    geometry_hits = [set(get_reference_hits(engine, [(bbox, parts)])) for bbox, parts, _ in geometries]
+
+    for key in keys:
+        feature_count, vertex_count = load[key]
+        assert feature_count == sum(key in hits for hits in geometry_hits)
+        assert vertex_count >= 0
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_recorded_hits_match_second_pass(seed):
+    geometries = make_geometries(seed)
+    source = make_source(geometries)
+    engine = make_engine(source)
+    keys = engine.run()
+    sources = engine.collect_cell_sources(keys)
+    second_pass_calls = sum(engine.predicate_counts.values())
+
+    recording = make_engine(source, record_hits=True)
+    assert list(recording.run()) == list(keys)
+    assert recording.collect_cell_sources(keys) == sources
+    assert recording.measure_cell_coverage(keys) == pytest.approx(engine.measure_cell_coverage(keys))
+    assert sum(recording.predicate_counts.values()) < second_pass_calls
+
+    geometry_hits = [set(get_reference_hits(engine, [(bbox, parts)])) for bbox, parts, _ in geometries]
+    for key, geom_ids in sources.items():
+        assert geom_ids == [geom_id for geom_id, hits in enumerate(geometry_hits) if key in hits]
+
+
+def test_recorded_hits_of_child_candidates():
+    source = make_source(make_geometries(10))
+    parent = make_engine(source)
+    parent_keys = parent.run()
+    child = parent.get_child_engine(record_hits=True)
+    keys = child.run_children(parent_keys)
+
+    assert child.collect_cell_sources(keys) == parent.get_child_engine().collect_cell_sources(keys)
+
+
+def test_prepared_and_simple_engines_count_predicates():
+    source = make_source(make_geometries(11))
+    prepared = make_engine(source, intersection_engine=GridEngine.ENGINE_PREPARED)
+    simple = make_engine(source, intersection_engine=GridEngine.ENGINE_SIMPLE)
+
+    assert list(prepared.run()) == list(simple.run())
+    assert prepared.predicate_counts["prepared"] > 0
+    assert simple.predicate_counts["prepared"] == 0
+    assert simple.predicate_counts["unprepared"] == sum(prepared.predicate_counts.values())
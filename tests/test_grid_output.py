@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+pytest.importorskip("qgis")
+ogr = pytest.importorskip("osgeo.ogr")
+
+from qgis.core import (
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransformContext,
+    QgsFeature,
+    QgsGeometry,
+    QgsRectangle
+)
+
+from atlas_gittergenerator.grid_output import GridOutput
+
+
+@pytest.fixture(scope="module", autouse=True)
+def qgis_app():
+    app = QgsApplication.instance()
+    if app is None:
+        app = QgsApplication([], False)
+        app.initQgis()
+    return app
+
+
+def make_output(output_format, path, layer_name="grid", **kwargs):
+    return GridOutput(
+        output_format,
+        layer_name,
+        QgsCoordinateReferenceSystem("EPSG:25832"),
+        QgsCoordinateTransformContext(),
+        path=path,
+        **kwargs
+    )
+
+
+def write_cells(output, count):
+    features = []
+    for serial in range(1, count + 1):
+        feature = QgsFeature(output.fields)
+        feature.setGeometry(QgsGeometry.fromRect(QgsRectangle(serial, 0.0, serial + 1.0, 1.0)))
+        feature.setAttribute("grid", f"A{serial}")
+        feature.setAttribute("serial", serial)
+        features.append(feature)
+    assert output.sink.addFeatures(features)
+
+
+def get_layer_names(path):
+    dataset = ogr.Open(path)
+    names = {dataset.GetLayerByIndex(index).GetName() for index in range(dataset.GetLayerCount())}
+    dataset = None
+    return names
+
+
+def test_normalize_path():
+    assert GridOutput.normalize_path("/tmp/grid", GridOutput.FORMAT_GEOPACKAGE) == "/tmp/grid.gpkg"
+    assert GridOutput.normalize_path("/tmp/grid.FGB", GridOutput.FORMAT_FLATGEOBUF) == "/tmp/grid.FGB"
+
+
+@pytest.mark.parametrize("output_format", [GridOutput.FORMAT_GEOPACKAGE, GridOutput.FORMAT_FLATGEOBUF])
+def test_file_output_writes_cells(tmp_path, output_format):
+    path = GridOutput.normalize_path(str(tmp_path / "grid"), output_format)
+    output = make_output(output_format, path)
+
+    assert output.open() is None
+    write_cells(output, 3)
+    layer = output.finish()
+
+    assert layer.isValid()
+    assert layer.featureCount() == 3
+    assert sorted(feature["serial"] for feature in layer.getFeatures()) == [1, 2, 3]
+
+
+def test_geopackage_sources_table(tmp_path):
+    path = str(tmp_path / "grid.gpkg")
+    output = make_output(GridOutput.FORMAT_GEOPACKAGE, path, sources=True)
+
+    assert output.open() is None
+    write_cells(output, 1)
+    row = QgsFeature(output.sources_fields)
+    row.setAttributes([1, 42])
+    assert output.sources_sink.addFeatures([row])
+    output.finish()
+
+    assert get_layer_names(path) == {"grid", "grid_sources"}
+
+
+@pytest.mark.parametrize("output_format", [GridOutput.FORMAT_GEOPACKAGE, GridOutput.FORMAT_FLATGEOBUF])
+def test_discard_removes_created_file(tmp_path, output_format):
+    path = GridOutput.normalize_path(str(tmp_path / "grid"), output_format)
+    output = make_output(output_format, path)
+
+    assert output.open() is None
+    write_cells(output, 2)
+    output.discard()
+
+    assert not os.path.exists(path)
+
+
+def test_discard_keeps_other_geopackage_layers(tmp_path):
+    path = str(tmp_path / "grid.gpkg")
+    existing = make_output(GridOutput.FORMAT_GEOPACKAGE, path, layer_name="other")
+    assert existing.open() is None
+    write_cells(existing, 1)
+    existing.finish()
+    existing = None
+
+    output = make_output(GridOutput.FORMAT_GEOPACKAGE, path, sources=True)
+    assert output.open() is None
+    write_cells(output, 2)
+    output.discard()
+
+    assert get_layer_names(path) == {"other"}
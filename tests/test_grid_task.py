@@ -0,0 +1,29 @@
+import types
+
+import pytest
+
+pytest.importorskip("qgis")
+
+from atlas_gittergenerator.atlas_gittergenerator import GridGeneratorTask
+
+
+def make_task():
+    return GridGeneratorTask("grid", None, None, 0, None, [(1000, 297.0, 210.0)])
+
+
+def test_rate_counts_tested_cells_while_the_engine_runs():
+    task = make_task()
+    task.set_phase(GridGeneratorTask.PHASE_PREPARING)
+    assert task.get_cell_rate(task._phase_start + 1.0) == 0.0
+
+    task.set_phase(GridGeneratorTask.PHASE_CELLS)
+    task._engine = types.SimpleNamespace(cells_visited=500)
+    assert task.get_cell_rate(task._phase_start + 2.0) == 250.0
+
+
+def test_rate_counts_written_cells_from_the_start_of_writing():
+    task = make_task()
+    task._cells_emitted = 100
+    task.set_phase(GridGeneratorTask.PHASE_WRITING)
+    task._cells_emitted = 400
+    assert task.get_cell_rate(task._phase_start + 3.0) == 100.0
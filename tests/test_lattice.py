@@ -0,0 +1,34 @@
+import pytest
+
+from atlas_gittergenerator.grid_core import GridLattice
+
+from reference import enumerate_geometries, get_reference_hits, make_geometries, make_lattice
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_enumerate_lattice_matches_reference(seed):
+    geometries = make_geometries(seed)
+    lattice = make_lattice()
+    hits, intersects_cell = enumerate_geometries(lattice, geometries)
+    reference = get_reference_hits(lattice, [(bbox, parts) for bbox, parts, _ in geometries])
+
+    assert list(hits) == reference
+    assert list(lattice.enumerate_by_bounds([bbox for bbox, _, _ in geometries], intersects_cell)) == reference
+
+
+def test_enumerate_lattice_stops_when_cancelled():
+    lattice = GridLattice(1.0, 1.0, 0.0, 0.0, 20, 16, cancel_check=lambda: True)
+    hits, _ = enumerate_geometries(lattice, make_geometries(0))
+    assert hits is None
+
+
+def test_coverage_mask_marks_box_ranges():
+    np = pytest.importorskip("numpy")
+    mask = make_lattice().build_coverage_mask(
+        np.array([0, 2, 5]), np.array([1, 3, 4]), np.array([0, 3, 1]), np.array([2, 3, 9]), 16, 20
+    )
+
+    expected = np.zeros((16, 20), dtype=bool)
+    expected[0:2, 0:3] = True
+    expected[2:4, 3:4] = True
+    assert (mask == expected).all()
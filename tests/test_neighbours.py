@@ -0,0 +1,28 @@
+from atlas_gittergenerator import grid_core
+from atlas_gittergenerator.grid_core import CellKeys
+
+from reference import make_lattice
+
+
+def test_serial_map_and_neighbours():
+    lattice = make_lattice()
+    keys = CellKeys.from_keys((row_index, col_index) for row_index in range(3) for col_index in range(3))
+
+    serial_map = lattice.build_serial_map(keys)
+    assert list(serial_map) == [(2, 0), (2, 1), (2, 2), (1, 0), (1, 1), (1, 2), (0, 0), (0, 1), (0, 2)]
+    assert list(serial_map.values()) == list(range(1, 10))
+    assert grid_core.get_neighbour_serials((1, 1), serial_map) == (2, 3, 6, 9, 8, 7, 4, 1)
+    assert grid_core.get_neighbour_serials((2, 0), serial_map) == (None, None, 2, 5, 4, None, None, None)
+
+    serpentine = lattice.build_serial_map(keys, grid_core.ORDER_SERPENTINE, first_serial=10)
+    assert list(serpentine) == [(2, 0), (2, 1), (2, 2), (1, 2), (1, 1), (1, 0), (0, 0), (0, 1), (0, 2)]
+    assert serpentine[(0, 2)] == 18
+
+
+def test_neighbours_follow_page_order():
+    lattice = make_lattice()
+    keys = CellKeys.from_keys([(0, 0), (0, 1), (1, 0), (1, 1)])
+    serial_map = lattice.build_serial_map(keys, grid_core.ORDER_SERPENTINE)
+
+    assert serial_map == {(1, 0): 1, (1, 1): 2, (0, 1): 3, (0, 0): 4}
+    assert grid_core.get_neighbour_serials((0, 0), serial_map) == (1, 2, 3, None, None, None, None, None)
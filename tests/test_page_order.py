@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from atlas_gittergenerator import grid_core
+from atlas_gittergenerator.grid_core import CellKeys
+
+from reference import enumerate_geometries, make_geometries, make_lattice
+
+
+def test_hilbert_index_walks_adjacent_cells():
+    size = 8
+    cells = sorted(((x, y) for x in range(size) for y in range(size)),
+                   key=lambda cell: grid_core.get_hilbert_index(cell[0], cell[1], size))
+
+    assert sorted(grid_core.get_hilbert_index(x, y, size) for x, y in cells) == list(range(size * size))
+    assert cells[0] == (0, 0)
+    for (x1, y1), (x2, y2) in zip(cells, cells[1:]):
+        assert abs(x1 - x2) + abs(y1 - y2) == 1
+
+
+def test_morton_index():
+    assert [grid_core.get_morton_index(x, y) for x, y in [(0, 0), (1, 0), (0, 1), (1, 1), (2, 0), (3, 3)]] == \
+        [0, 1, 2, 3, 4, 15]
+    assert sorted(grid_core.get_morton_index(x, y) for x in range(4) for y in range(4)) == list(range(16))
+
+
+def test_radix_argsort_is_stable():
+    random_state = random.Random(3)
+    values = [random_state.choice([0, 5, 70000, 1 << 33, 12345678901]) for _ in range(200)]
+    expected = sorted(range(len(values)), key=lambda position: values[position])
+    assert grid_core.radix_argsort(values, 40) == expected
+    assert grid_core.radix_argsort([], 0) == []
+
+
+@pytest.mark.parametrize("order", [grid_core.ORDER_HILBERT, grid_core.ORDER_MORTON])
+def test_curve_order_matches_pure_python(order, monkeypatch):
+    pytest.importorskip("numpy")
+    lattice = make_lattice()
+    hits, _ = enumerate_geometries(lattice, make_geometries(2))
+    with_numpy = list(lattice.iter_ordered(hits, order))
+
+    monkeypatch.setattr(grid_core, "np", None)
+    assert list(lattice.iter_ordered(hits, order)) == with_numpy
+    assert sorted(with_numpy) == list(hits)
+
+
+def test_hilbert_order_of_full_block():
+    lattice = make_lattice()
+    keys = CellKeys.from_keys((row_index, col_index) for row_index in range(3, 7) for col_index in range(2, 6))
+    ordered = list(lattice.iter_ordered(keys, grid_core.ORDER_HILBERT))
+
+    assert ordered[0] == (6, 2)
+    for (row1, col1), (row2, col2) in zip(ordered, ordered[1:]):
+        assert abs(row1 - row2) + abs(col1 - col2) == 1
+
+
+def test_serpentine_order_reverses_every_other_row():
+    keys = CellKeys.from_keys([(0, 0), (0, 2), (1, 0), (1, 1), (2, 0), (2, 1)])
+    assert list(make_lattice().iter_ordered(keys, grid_core.ORDER_SERPENTINE)) == [
+        (2, 0), (2, 1), (1, 1), (1, 0), (0, 0), (0, 2)
+    ]
@@ -0,0 +1,15 @@
+from atlas_gittergenerator.grid_core import GridLattice
+
+from reference import make_lattice
+
+
+def test_child_lattice_parent_keys():
+    parent = make_lattice()
+    child = GridLattice(0.5, 0.5, 0.0, 0.0, 40, 32)
+    parent_hits = {(3, 4), (3, 5)}
+
+    for key in GridLattice.get_child_keys(sorted(parent_hits)):
+        assert child.get_parent_key(key, parent, parent_hits) == (key[0] // 2, key[1] // 2)
+    assert child.get_candidates_within(parent, [(3, 4)]) == [
+        (row_index, col_index) for row_index in range(5, 9) for col_index in range(7, 11)
+    ]
@@ -0,0 +1,17 @@
+from atlas_gittergenerator import grid_core
+from atlas_gittergenerator.grid_core import GridLattice
+
+
+def test_quadtree_labels():
+    assert grid_core.get_quadtree_label(0, 1, 0, 2) == "B3"
+
+    children = GridLattice.get_child_keys([(0, 1)])
+    assert children == [(0, 2), (0, 3), (1, 2), (1, 3)]
+    labels = {key: grid_core.get_quadtree_label(*key, 1, 2) for key in children}
+    assert labels == {(1, 2): "B3-1", (1, 3): "B3-2", (0, 2): "B3-3", (0, 3): "B3-4"}
+
+    grandchildren = GridLattice.get_child_keys(children)
+    assert len(grandchildren) == 16
+    assert grid_core.get_quadtree_label(3, 4, 2, 2) == "B3-1-1"
+    assert grid_core.get_quadtree_label(0, 7, 2, 2) == "B3-4-4"
+    assert len({grid_core.get_quadtree_label(*key, 2, 2) for key in grandchildren}) == 16
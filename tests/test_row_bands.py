@@ -0,0 +1,36 @@
+import pytest
+
+from atlas_gittergenerator.grid_core import CellKeys, GridLattice
+
+from reference import enumerate_geometries, make_geometries, make_lattice
+
+
+@pytest.mark.parametrize("band_count", [1, 2, 3, 5])
+def test_split_row_bands_merge_matches_single_run(band_count):
+    geometries = make_geometries(7)
+    lattice = make_lattice()
+    bounds = [bbox for bbox, _, _ in geometries]
+    bands = lattice.split_row_bands(band_count, bounds)
+
+    assert 1 <= len(bands) <= band_count
+    assert sum(weight for _, _, weight in bands) == sum(lattice.get_row_weights(bounds))
+    for (_, last_row, _), (first_row, _, _) in zip(bands, bands[1:]):
+        assert first_row > last_row
+
+    # Rows between bands carry no weight, so the merged band results equal a single run.
+    merged = CellKeys()
+    for first_row, last_row, _ in bands:
+        band = GridLattice(1.0, 1.0, 0.0, float(first_row), 20, last_row - first_row + 1)
+        band_geometries = [
+            geometry for geometry in geometries
+            if geometry[0][1] <= last_row + 1 and geometry[0][3] >= first_row
+        ]
+        keys, _ = enumerate_geometries(band, band_geometries)
+        merged.extend(keys, row_offset=first_row)
+
+    hits, _ = enumerate_geometries(lattice, geometries)
+    assert list(merged) == list(hits)
+
+
+def test_split_row_bands_without_bounds():
+    assert make_lattice().split_row_bands(4, []) == []
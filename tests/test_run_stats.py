@@ -0,0 +1,51 @@
+import json
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("qgis")
+
+from atlas_gittergenerator.run_stats import RunStats
+
+
+def test_overlapping_runs_share_memory_tracing():
+    first = RunStats(trace_memory=True)
+    second = RunStats(trace_memory=True)
+
+    first.start()
+    second.start()
+    first.stop()
+    assert tracemalloc.is_tracing()
+    assert first.peak_memory is not None
+
+    second.stop()
+    assert not tracemalloc.is_tracing()
+    assert second.peak_memory is not None
+
+
+def test_stop_is_idempotent():
+    first = RunStats(trace_memory=True)
+    second = RunStats(trace_memory=True)
+    first.start()
+    second.start()
+
+    first.stop()
+    first.stop()
+    assert tracemalloc.is_tracing()
+    assert list(first.timings) == ["total"]
+
+    second.stop()
+    assert not tracemalloc.is_tracing()
+
+
+def test_outcome_is_written(tmp_path):
+    stats = RunStats()
+    stats.start()
+    stats.set_info("outcome", "cancelled")
+    stats.stop()
+    path = tmp_path / "grid.stats.json"
+    stats.write_json(str(path))
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["info"] == {"outcome": "cancelled"}
+    assert data["peak_python_memory_process_bytes"] is None
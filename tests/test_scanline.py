@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from reference import get_bounds, get_reference_hits, make_hole, make_lattice, make_star, point_in_rings
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_classify_polygon_cells_matches_reference(seed):
+    random_state = random.Random(seed)
+    lattice = make_lattice()
+    parts = [[make_star(random_state, 9.7, 7.9, 6.3, 13), make_hole(9.7, 7.9, 1.6)]]
+    boundary, interior = lattice.classify_polygon_cells(parts, 16, 20)
+    reference = set(get_reference_hits(lattice, [(get_bounds(parts), parts)]))
+
+    assert not boundary & interior
+    assert interior <= reference
+    assert reference <= boundary | interior
+    for row_index in range(16):
+        for col_index in range(20):
+            if (row_index, col_index) in boundary:
+                continue
+            center = (col_index + 0.5, row_index + 0.5)
+            assert ((row_index, col_index) in interior) == point_in_rings(*center, parts[0])
+
+
+def test_classify_polygon_cells_fills_overlapping_parts():
+    lattice = make_lattice()
+    parts = [
+        [[(1.5, 1.5), (1.5, 9.5), (9.5, 9.5), (9.5, 1.5), (1.5, 1.5)]],
+        [[(4.5, 4.5), (4.5, 13.5), (13.5, 13.5), (13.5, 4.5), (4.5, 4.5)]]
+    ]
+    boundary, interior = lattice.classify_polygon_cells(parts, 16, 20)
+
+    assert (6, 6) in interior
+    assert set(get_reference_hits(lattice, [(get_bounds(parts), parts)])) == boundary | interior
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("qgis")
+
+from qgis.core import QgsGeometry
+
+from atlas_gittergenerator import generate_grid_algorithm
+from atlas_gittergenerator.grid_engine import GridEngine, SourceGeometries
+
+
+@pytest.fixture(autouse=True)
+def empty_source_cache():
+    generate_grid_algorithm.clear_source_cache()
+    yield
+    generate_grid_algorithm.clear_source_cache()
+
+
+def make_source():
+    source = SourceGeometries().acquire()
+    for i in range(30):
+        source.add_geometry(QgsGeometry.fromWkt(f"POLYGON(({i} 0, {i + 3} 0.5, {i + 1} 5, {i} 0))"), i)
+    return source
+
+
+def test_cached_source_keeps_prepared_engines():
+    source = make_source()
+    generate_grid_algorithm.store_cached_source("layer", source)
+    keys = list(GridEngine.for_source(source, 2.0, 2.0).run())
+    prepared_count = source.prepared_geometry_count
+    source.release()
+
+    reused = generate_grid_algorithm.get_cached_source("layer")
+    assert reused is source
+    assert list(GridEngine.for_source(reused, 2.0, 2.0).run()) == keys
+    assert source.prepared_geometry_count == prepared_count
+
+
+def test_busy_cached_source_hands_out_copies():
+    source = make_source()
+    generate_grid_algorithm.store_cached_source("layer", source)
+    keys = list(GridEngine.for_source(source, 2.0, 2.0).run())
+
+    concurrent = generate_grid_algorithm.get_cached_source("layer")
+    assert concurrent is not source
+    assert concurrent.get_spatial_index() is source.get_spatial_index()
+    assert list(GridEngine.for_source(concurrent, 2.0, 2.0).run()) == keys
+
+
+def test_source_cache_keeps_several_layers():
+    sources = {}
+    for layer_id in ("a", "b", "c", "d", "e"):
+        sources[layer_id] = SourceGeometries()
+        generate_grid_algorithm.store_cached_source((layer_id,), sources[layer_id])
+
+    assert generate_grid_algorithm.get_cached_source(("a",)) is None
+    assert generate_grid_algorithm.get_cached_source(("b",)) is sources["b"]
+
+    generate_grid_algorithm.drop_cached_sources("b")
+    assert generate_grid_algorithm.get_cached_source(("b",)) is None